@@ -1,51 +1,69 @@
-from flask import Flask, send_from_directory
+import importlib
+from flask import Flask
 from flask_cors import CORS
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 import os
-from backend.config import logger, DOWNLOAD_DIR
-from backend.db import init_db
+from backend.config import logger, RATELIMIT_ENABLED, ENABLED_BLUEPRINTS, SPELLING_ENGINE
+from backend import compression, json_provider, metrics, schema
+from backend.extensions import limiter
 
-def create_app():
+# name -> (module, blueprint attribute). Modules are imported only when enabled, so a
+# process serving a subset never loads the others' dependencies (requests, smtplib, intents)
+BLUEPRINTS = {
+    'todos': ('backend.routes.todo_routes', 'todo_bp'),
+    'weather': ('backend.routes.weather_routes', 'weather_bp'),
+    'news': ('backend.routes.news_routes', 'news_bp'),
+    'wikipedia': ('backend.routes.wikipedia_routes', 'wikipedia_bp'),
+    'dictionary': ('backend.routes.dictionary_routes', 'dictionary_bp'),
+    'youtube': ('backend.routes.youtube_routes', 'youtube_bp'),
+    'email': ('backend.routes.email_routes', 'email_bp'),
+    'maps': ('backend.routes.maps_routes', 'maps_bp'),
+    'command': ('backend.routes.command_routes', 'command_bp'),
+    'briefing': ('backend.routes.briefing_routes', 'briefing_bp'),
+    'events': ('backend.routes.event_routes', 'events_bp'),
+    'media': ('backend.routes.media_routes', 'media_bp'),
+}
+
+def _selected_blueprints(names):
+    if not names:
+        return list(BLUEPRINTS)
+    unknown = [name for name in names if name not in BLUEPRINTS]
+    if unknown:
+        logger.info(f"Ignoring unknown blueprints in ENABLED_BLUEPRINTS: {', '.join(unknown)}")
+    return [name for name in names if name in BLUEPRINTS]
+
+def create_app(blueprints=None):
+    # blueprints: names from BLUEPRINTS to serve, defaulting to ENABLED_BLUEPRINTS (all when empty).
+    # /health and /metrics are always served.
     app = Flask(__name__)
     CORS(app)
-    limiter = Limiter(
-        get_remote_address,
-        app=app,
-        default_limits=["60 per minute"],
-        storage_uri="memory://"
-    )
-
-    init_db()
-
-    from backend.routes.todo_routes import todo_bp
-    from backend.routes.weather_routes import weather_bp
-    from backend.routes.news_routes import news_bp
-    from backend.routes.wikipedia_routes import wikipedia_bp
-    from backend.routes.dictionary_routes import dictionary_bp
-    from backend.routes.youtube_routes import youtube_bp
-    from backend.routes.email_routes import email_bp
-    from backend.routes.maps_routes import maps_bp
-    from backend.routes.health import health_bp
+    app.config['RATELIMIT_ENABLED'] = RATELIMIT_ENABLED
+    json_provider.init_app(app)
+    metrics.init_app(app)
+    limiter.init_app(app)
+    # After metrics, so request durations include compression
+    compression.init_app(app)
 
-    app.register_blueprint(todo_bp)
-    app.register_blueprint(weather_bp)
-    app.register_blueprint(news_bp)
-    app.register_blueprint(wikipedia_bp)
-    app.register_blueprint(dictionary_bp)
-    app.register_blueprint(youtube_bp)
-    app.register_blueprint(email_bp)
-    app.register_blueprint(maps_bp)
+    schema.migrate()
+    enabled = _selected_blueprints(ENABLED_BLUEPRINTS if blueprints is None else blueprints)
+    # Only processes that can queue mail or downloads pick up work left by a previous run,
+    # and only they import the mailer (smtplib) and the download workers
+    if {'email', 'command'} & set(enabled):
+        from backend import mailer
+        mailer.mail_queue.resume_pending()
+    if {'youtube', 'command'} & set(enabled):
+        from backend import jobs
+        jobs.download_jobs.resume_pending()
+
+    for name in enabled:
+        module, attribute = BLUEPRINTS[name]
+        app.register_blueprint(getattr(importlib.import_module(module), attribute))
+    from backend.routes.health import health_bp
     app.register_blueprint(health_bp)
 
     @app.route('/')
     def home():
         return "You are on the right track, Backend is running!"
 
-    @app.route('/downloads/<filename>')
-    def serve_downloaded_file(filename):
-        return send_from_directory(DOWNLOAD_DIR, filename)
-
     @app.after_request
     def set_security_headers(response):
         response.headers['Content-Security-Policy'] = "default-src 'self'; connect-src 'self' http://127.0.0.1:5000; script-src 'self' 'unsafe-inline' 'unsafe-eval'; style-src 'self' 'unsafe-inline'; img-src 'self' data: https:; media-src 'self' https:; frame-src 'self' https://www.youtube.com https://www.google.com;"
@@ -55,9 +73,12 @@ def create_app():
         response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
         return response
 
-    logger.info("Application factory initialized with all blueprints")
+    logger.info(f"Application factory initialized with blueprints: {', '.join(enabled)}")
     return app
 
 if __name__ == '__main__':
+    from backend import spelling
+    if SPELLING_ENGINE != 'pyspellchecker':
+        spelling.ensure_index()
     app = create_app()
     app.run(debug=os.environ.get('FLASK_DEBUG', 'False').lower() == 'true', port=5000)
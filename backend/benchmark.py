@@ -0,0 +1,328 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from backend.tests.fakes.smtp_server import FakeSMTPServer
+from backend.tests.fakes.upstream_server import FakeUpstreamServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_YTDLP = os.path.join(REPO_ROOT, 'backend', 'tests', 'fakes', 'fake_yt_dlp.py')
+DEFAULT_THRESHOLDS = os.path.join(REPO_ROOT, 'backend', 'benchmark_thresholds.json')
+API_KEY = 'benchmark-key'
+
+CITIES = ['London', 'Paris', 'Tokyo', 'Lagos', 'Lima', 'Oslo', 'Cairo', 'Delhi', 'Quito', 'Perth']
+WORDS = ['apple', 'river', 'window', 'garden', 'silver', 'planet', 'harbor', 'lantern', 'meadow', 'canyon']
+
+def _pick(values, i, distinct):
+    # Cycles through `distinct` keys, so after the first pass requests hit warm cache entries
+    n = i % distinct
+    return f"{values[n % len(values)]}{'' if n < len(values) else n // len(values)}"
+
+# name -> function(i, distinct) returning (method, path, requests kwargs); one per blueprint
+SCENARIOS = {
+    'health': lambda i, d: ('GET', '/health', {}),
+    'todos_list': lambda i, d: ('GET', '/api/todos', {}),
+    'todos_create': lambda i, d: ('POST', '/api/todos', {'json': {'task': f"Benchmark task {i}"}}),
+    'weather': lambda i, d: ('GET', '/weather', {'params': {'city': _pick(CITIES, i, d)}}),
+    'news': lambda i, d: ('GET', '/news', {'params': {'query': f"topic {i % d}"}}),
+    'wikipedia': lambda i, d: ('GET', '/wikipedia', {'params': {'query': f"Subject {i % d}"}}),
+    'dictionary': lambda i, d: ('GET', '/dictionary', {'params': {'word': _pick(WORDS, i, d)}}),
+    'youtube_search': lambda i, d: ('GET', '/youtube/search', {'params': {'query': f"song {i % d}"}}),
+    'maps': lambda i, d: ('GET', '/maps/search', {'params': {'query': f"cafe {i % d}"}}),
+    'command': lambda i, d: ('POST', '/command', {'json': {'text': f"what is the weather in {_pick(CITIES, i, d)}"}}),
+    'briefing': lambda i, d: ('GET', '/briefing', {'params': {'city': _pick(CITIES, i, d)}}),
+    'send_email': lambda i, d: ('POST', '/send-email', {
+        'headers': {'X-API-Key': API_KEY},
+        'json': {'recipient_email': f"user{i}@example.com", 'subject': 'Benchmark', 'body': f"Message {i}"}
+    }),
+    'youtube_download': lambda i, d: ('POST', '/youtube/download', {
+        'headers': {'X-API-Key': API_KEY},
+        'json': {'url': f"https://www.youtube.com/watch?v=bench{i % d:06d}"}
+    }),
+    'metrics': lambda i, d: ('GET', '/metrics', {}),
+}
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def summarize(latencies, statuses, elapsed):
+    ordered = sorted(latencies)
+    errors = sum(1 for status in statuses if status is None or status >= 500)
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+    return {
+        "requests": len(statuses),
+        "errors": errors,
+        "error_rate": round(errors / len(statuses), 4) if statuses else 0.0,
+        "throughput_rps": round(len(statuses) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1] if ordered else None),
+    }
+
+class Environment:
+    """Fake upstreams plus a backend server process wired to them, in a scratch directory."""
+
+    def __init__(self, latency, jitter, failure_rate, seed, server='werkzeug'):
+        self.workdir = tempfile.mkdtemp(prefix='voice-assistant-bench-')
+        self.upstreams = FakeUpstreamServer(latency, jitter, failure_rate, seed).start()
+        self.smtp = FakeSMTPServer(latency, failure_rate, seed).start()
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.env = {
+            **os.environ,
+            **self.upstreams.env(),
+            'PYTHONPATH': os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')])),
+            'OPENWEATHER_API_KEY': API_KEY, 'NEWS_API_KEY': API_KEY, 'YOUTUBE_API_KEY': API_KEY,
+            'GOOGLE_MAPS_API_KEY': API_KEY, 'AUTH_API_KEY': API_KEY,
+            'SENDER_EMAIL': 'bench@example.com', 'SENDER_PASSWORD': 'benchmark',
+            'SMTP_SERVER': '127.0.0.1', 'SMTP_PORT': str(self.smtp.server_address[1]), 'SMTP_STARTTLS': 'false',
+            'SMTP_RETRY_BACKOFF': '0.1',
+            'YTDLP_BINARY': f"{sys.executable} {FAKE_YTDLP}",
+            'FAKE_YTDLP_DELAY': str(latency), 'FAKE_YTDLP_FAIL_RATE': str(failure_rate), 'FAKE_YTDLP_SEED': str(seed),
+            'TODO_DB_PATH': os.path.join(self.workdir, 'todos.db'),
+            'CACHE_DB_PATH': os.path.join(self.workdir, 'cache.db'),
+            'QUOTA_DB_PATH': os.path.join(self.workdir, 'quota.db'),
+            'DOWNLOAD_DIR': os.path.join(self.workdir, 'downloads'),
+            'METRICS_DIR': os.path.join(self.workdir, 'metrics'),
+            'RATELIMIT_ENABLED': 'false',
+            'PORT': str(self.port),
+        }
+        if server == 'gunicorn':
+            command = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_ROOT, 'backend', 'gunicorn.conf.py'),
+                       '--access-logfile', os.devnull, 'backend.wsgi:app']
+        else:
+            # gunicorn builds a missing spelling index in on_starting; `flask run` does not
+            subprocess.run([sys.executable, '-m', 'backend.spelling', 'build', '--if-missing'],
+                           cwd=REPO_ROOT, env=self.env, check=True)
+            command = [sys.executable, '-m', 'flask', '--app', 'backend.app:create_app', 'run',
+                       '--port', str(self.port), '--no-reload', '--no-debugger', '--with-threads']
+        self.log_path = os.path.join(self.workdir, 'server.log')
+        self._log = open(self.log_path, 'w')
+        self.process = subprocess.Popen(command, cwd=REPO_ROOT, env=self.env, stdout=self._log, stderr=subprocess.STDOUT)
+
+    def wait_until_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if requests.get(f"{self.base_url}/health", timeout=1).status_code == 200:
+                    return
+            except requests.exceptions.RequestException:
+                time.sleep(0.1)
+        with open(self.log_path) as f:
+            raise RuntimeError(f"Backend did not start:\n{f.read()[-2000:]}")
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+        self.upstreams.stop()
+        self.smtp.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def run_scenario(base_url, build, count, concurrency, distinct, timeout=60):
+    local = threading.local()
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        method, path, kwargs = build(i, distinct)
+        started = time.perf_counter()
+        try:
+            status = session.request(method, f"{base_url}{path}", timeout=timeout, **kwargs).status_code
+        except requests.exceptions.RequestException:
+            status = None
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(count)))
+    elapsed = time.perf_counter() - started
+    return summarize([latency for latency, _ in results], [status for _, status in results], elapsed)
+
+# Runs in a fresh interpreter: times importing the app, create_app() and one request, prints JSON
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from backend.app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get(sys.argv[1]).status_code
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000, "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000, "status": status, "modules": len(sys.modules),
+}))
+"""
+STARTUP_METRICS = ('import_ms', 'create_app_ms', 'first_request_ms', 'process_ms', 'modules')
+
+def _start_once(env, path):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', STARTUP_PROBE, path], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Backend failed to start:\n{result.stderr[-2000:]}")
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = elapsed * 1000
+    return sample
+
+def measure_startup(runs=5, blueprints=None, path='/health'):
+    """Time cold starts of the backend, each in a fresh interpreter.
+
+    The first start creates the database and is reported on its own as "first_start";
+    the other `runs` reuse it, like a worker being (re)spawned, and are reported as
+    medians. process_ms includes interpreter start-up and shutdown.
+    """
+    workdir = tempfile.mkdtemp(prefix='voice-assistant-startup-')
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')])),
+        'TODO_DB_PATH': os.path.join(workdir, 'todos.db'),
+        'CACHE_DB_PATH': os.path.join(workdir, 'cache.db'),
+        'QUOTA_DB_PATH': os.path.join(workdir, 'quota.db'),
+        'DOWNLOAD_DIR': os.path.join(workdir, 'downloads'),
+        'ENABLED_BLUEPRINTS': ','.join(blueprints or []),
+    }
+    env.pop('METRICS_DIR', None)
+    try:
+        samples = [_start_once(env, path) for _ in range(runs + 1)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    def rounded(sample):
+        return {key: round(sample[key], 2) for key in STARTUP_METRICS}
+    first, warm = samples[0], samples[1:]
+    return {
+        "config": {"runs": runs, "blueprints": blueprints or 'all', "path": path},
+        "startup": {
+            "status": warm[-1]["status"] if warm else first["status"],
+            "first_start": rounded(first),
+            **{key: round(statistics.median(sample[key] for sample in warm), 2) for key in STARTUP_METRICS},
+        },
+    }
+
+def run(scenarios=None, requests_per_scenario=100, concurrency=8, distinct=10, latency=0.02, jitter=0.0,
+        failure_rate=0.0, seed=1, server='werkzeug'):
+    """Start the backend against fake upstreams and measure each scenario in turn.
+
+    Every scenario gets one untimed warm-up request first (it loads the spelling
+    index, opens pools), then requests_per_scenario requests from `concurrency`
+    client threads. Returns the JSON report as a dict.
+    """
+    names = scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)}")
+
+    environment = Environment(latency, jitter, failure_rate, seed, server)
+    try:
+        environment.wait_until_ready()
+        results = {}
+        for name in names:
+            method, path, kwargs = SCENARIOS[name](0, distinct)
+            requests.request(method, f"{environment.base_url}{path}", timeout=300, **kwargs)
+            results[name] = run_scenario(environment.base_url, SCENARIOS[name], requests_per_scenario,
+                                         concurrency, distinct)
+        upstream_calls = dict(environment.upstreams.requests)
+    finally:
+        environment.close()
+
+    return {
+        "config": {
+            "server": server, "requests_per_scenario": requests_per_scenario, "concurrency": concurrency,
+            "distinct_keys": distinct, "upstream_latency_ms": latency * 1000, "upstream_jitter_ms": jitter * 1000,
+            "failure_rate": failure_rate, "seed": seed
+        },
+        "scenarios": results,
+        "upstream_calls": upstream_calls,
+    }
+
+def check_thresholds(report, thresholds):
+    """Return a list of human-readable violations; "*" applies to every scenario.
+
+    A "startup" entry holds maximum milliseconds for the measure_startup() report.
+    """
+    violations = []
+    startup = report.get("startup")
+    if startup:
+        for metric, limit in thresholds.get('startup', {}).items():
+            if startup.get(metric) is not None and startup[metric] > limit:
+                violations.append(f"startup: {metric} {startup[metric]} > {limit}")
+    for name, result in report.get("scenarios", {}).items():
+        limits = {**thresholds.get('*', {}), **thresholds.get(name, {})}
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'error_rate'):
+            limit = limits.get(metric)
+            if limit is not None and result[metric] is not None and result[metric] > limit:
+                violations.append(f"{name}: {metric} {result[metric]} > {limit}")
+        minimum = limits.get('min_throughput_rps')
+        if minimum is not None and (result['throughput_rps'] or 0) < minimum:
+            violations.append(f"{name}: throughput_rps {result['throughput_rps']} < {minimum}")
+    return violations
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test every backend blueprint against local fake upstreams")
+    parser.add_argument('--scenarios', help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--requests', type=int, default=100, help="timed requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--distinct', type=int, default=10, help="distinct query values per scenario")
+    parser.add_argument('--latency', type=float, default=0.02, help="fake upstream latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random upstream latency, up to this many seconds")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="fraction of upstream calls that fail")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--server', choices=('werkzeug', 'gunicorn'), default='werkzeug')
+    parser.add_argument('--startup', action='store_true',
+                        help="measure cold start instead (fresh interpreter per run, --scenarios ignored)")
+    parser.add_argument('--runs', type=int, default=5, help="cold starts to measure with --startup")
+    parser.add_argument('--blueprints', help="comma-separated ENABLED_BLUEPRINTS for --startup; default all")
+    parser.add_argument('--path', default='/health', help="first request to time with --startup")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--thresholds', nargs='?', const=DEFAULT_THRESHOLDS,
+                        help="fail (exit 1) if results exceed these limits; defaults to backend/benchmark_thresholds.json")
+    args = parser.parse_args()
+
+    if args.startup:
+        report = measure_startup(args.runs, args.blueprints.split(',') if args.blueprints else None, args.path)
+    else:
+        report = run(args.scenarios.split(',') if args.scenarios else None, args.requests, args.concurrency,
+                     args.distinct, args.latency, args.jitter, args.failure_rate, args.seed, args.server)
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            report["violations"] = check_thresholds(report, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if report.get("violations"):
+        print('\n'.join(report["violations"]), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
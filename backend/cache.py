@@ -0,0 +1,356 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from flask import jsonify, request
+from backend import metrics, quota
+from backend.config import (
+    logger, CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_DB_PATH, CACHE_TTLS, CACHE_STALE_TTLS,
+    CACHE_REFRESH_WORKERS, CACHE_STALE_IF_ERROR, PREFETCH_TTL
+)
+
+CacheEntry = namedtuple('CacheEntry', ['value', 'stored_at', 'expires_at'])
+
+class MemoryBackend:
+    name = 'memory'
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteBackend:
+    name = 'sqlite'
+
+    def __init__(self, path=CACHE_DB_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache (accessed_at)')
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, stored_at, expires_at FROM response_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE response_cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
+
+    def set(self, key, entry):
+        value = json.dumps(entry.value)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, value, stored_at, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, value, entry.stored_at, entry.expires_at, time.time())
+            )
+            overflow = self._conn.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    'DELETE FROM response_cache WHERE key IN '
+                    '(SELECT key FROM response_cache ORDER BY accessed_at ASC LIMIT ?)', (overflow,)
+                )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM response_cache')
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    # Concurrent callers with the same key share one execution of fn
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+def _normalize(value):
+    return re.sub(r'\s+', ' ', str(value).strip().lower())
+
+class ResponseCache:
+    def __init__(self, backend, ttls=None, stale_ttls=None, refresh_workers=CACHE_REFRESH_WORKERS, stale_if_error=0,
+                 conserve=None):
+        # conserve(endpoint) -> True while the endpoint's upstream budget is low; entries in the
+        # stale-if-error window are then served without calling it, and stale hits are not refreshed
+        self.backend = backend
+        self.conserve = conserve
+        self.ttls = dict(ttls or {})
+        self.stale_ttls = dict(stale_ttls or {})
+        self.stale_if_error = stale_if_error
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.stale_if_error_hits = 0
+        self.quota_stale_hits = 0
+        self.coalesced = 0
+        self.prefetches = 0
+        self._counter_lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._refreshing = set()
+        self._prefetched = OrderedDict()  # key -> time until which repeat prefetches are ignored
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='cache-refresh')
+
+    def ttl_for(self, endpoint):
+        return self.ttls.get(endpoint, 0)
+
+    def stale_ttl_for(self, endpoint):
+        return self.stale_ttls.get(endpoint, 0)
+
+    def make_key(self, endpoint, params):
+        items = sorted((k, _normalize(v)) for k, v in params.items() if v is not None and _normalize(v))
+        return f"{endpoint}?{urlencode(items)}"
+
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, endpoint, params, allow_stale=False, on_error=False):
+        # allow_stale: serve within the endpoint's stale-while-revalidate window
+        # on_error: serve within the stale-if-error window, for when the upstream just failed
+        key = self.make_key(endpoint, params)
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        now = time.time()
+        if entry.expires_at > now:
+            return entry
+        stale_until = entry.expires_at + self.stale_ttl_for(endpoint)
+        error_until = entry.expires_at + self.stale_if_error
+        if (allow_stale and stale_until > now) or (on_error and error_until > now):
+            return entry
+        if max(stale_until, error_until) <= now:
+            self.backend.delete(key)
+        return None
+
+    def store(self, endpoint, params, value, ttl=None):
+        ttl = self.ttl_for(endpoint) if ttl is None else min(ttl, self.ttl_for(endpoint))
+        if ttl <= 0:
+            return None
+        now = time.time()
+        entry = CacheEntry(value, now, now + ttl)
+        self.backend.set(self.make_key(endpoint, params), entry)
+        return entry
+
+    def _fetch_and_store(self, endpoint, params, fetch, ttl=None):
+        payload, status = fetch()
+        entry = self.store(endpoint, params, payload, ttl) if status == 200 else None
+        return payload, status, entry
+
+    def _refresh(self, key, endpoint, params, fetch, ttl=None):
+        try:
+            self._flights.do(key, lambda: self._fetch_and_store(endpoint, params, fetch, ttl))
+        except Exception as e:
+            logger.info(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._counter_lock:
+                self._refreshing.discard(key)
+
+    def revalidate(self, endpoint, params, fetch):
+        key = self.make_key(endpoint, params)
+        with self._counter_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._refresher.submit(self._refresh, key, endpoint, params, fetch)
+
+    def prefetch(self, endpoint, params, fetch, ttl=PREFETCH_TTL):
+        """Start fetching an entry in the background unless it is cached, in flight or was just tried.
+
+        The entry is stored for at most ttl seconds, since a guess made from a partial
+        transcript may never be asked for. Returns True when a fetch was started.
+        """
+        if self.ttl_for(endpoint) <= 0 or self.lookup(endpoint, params) is not None:
+            return False
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        with self._counter_lock:
+            if key in self._refreshing or self._prefetched.get(key, 0) > now:
+                return False
+            self._refreshing.add(key)
+            self._prefetched[key] = now + ttl
+            self._prefetched.move_to_end(key)
+            while self._prefetched and next(iter(self._prefetched.values())) <= now:
+                self._prefetched.popitem(last=False)
+            self.prefetches += 1
+        self._refresher.submit(self._refresh, key, endpoint, params, fetch, ttl)
+        return True
+
+    def get_or_fetch(self, endpoint, params, fetch):
+        # fetch() returns (payload, status); only 200 payloads are stored
+        if self.ttl_for(endpoint) <= 0:
+            payload, status = fetch()
+            return payload, status, None
+
+        conserving = self.conserve is not None and self.conserve(endpoint)
+        entry = self.lookup(endpoint, params, allow_stale=True, on_error=conserving)
+        if entry is not None:
+            self._count('hits')
+            if entry.expires_at <= time.time():
+                self._count('stale_hits')
+                if conserving:
+                    self._count('quota_stale_hits')
+                else:
+                    self.revalidate(endpoint, params, fetch)
+            return entry.value, 200, entry
+
+        self._count('misses')
+        key = self.make_key(endpoint, params)
+        (payload, status, entry), shared = self._flights.do(
+            key, lambda: self._fetch_and_store(endpoint, params, fetch)
+        )
+        if shared:
+            self._count('coalesced')
+        if (status >= 500 or status == 429) and self.stale_if_error > 0:
+            fallback = self.lookup(endpoint, params, on_error=True)
+            if fallback is not None:
+                logger.info(f"Serving stale {endpoint} response after upstream error {status}")
+                self._count('stale_if_error_hits')
+                return fallback.value, 200, fallback
+        return payload, status, entry
+
+    def clear(self):
+        self.backend.clear()
+        with self._counter_lock:
+            self.hits = 0
+            self.misses = 0
+            self.stale_hits = 0
+            self.stale_if_error_hits = 0
+            self.quota_stale_hits = 0
+            self.coalesced = 0
+            self.prefetches = 0
+            self._prefetched.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "stale_if_error_hits": self.stale_if_error_hits,
+            "quota_stale_hits": self.quota_stale_hits,
+            "coalesced": self.coalesced,
+            "prefetches": self.prefetches,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+def _make_backend():
+    if CACHE_BACKEND == 'sqlite':
+        return SQLiteBackend(CACHE_DB_PATH, CACHE_MAX_ENTRIES)
+    if CACHE_BACKEND != 'memory':
+        logger.info(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}', falling back to in-process cache")
+    return MemoryBackend(CACHE_MAX_ENTRIES)
+
+response_cache = ResponseCache(_make_backend(), CACHE_TTLS, CACHE_STALE_TTLS, stale_if_error=CACHE_STALE_IF_ERROR,
+                               conserve=quota.is_low)
+
+def _collect_metrics():
+    for result in ('hits', 'misses', 'stale_hits', 'coalesced', 'prefetches'):
+        metrics.cache_events.set_total(getattr(response_cache, result), cache='response', result=result)
+    metrics.cache_events.set_total(response_cache.stale_if_error_hits, cache='response', result='stale_if_error')
+    metrics.cache_events.set_total(response_cache.quota_stale_hits, cache='response', result='quota_stale')
+
+metrics.registry.add_collector(_collect_metrics)
+
+def cached_response(endpoint, params, fetch):
+    payload, status, entry = response_cache.get_or_fetch(endpoint, params, fetch)
+    response = jsonify(payload)
+    response.status_code = status
+    if entry is not None:
+        now = time.time()
+        cache_control = f"public, max-age={max(int(entry.expires_at - now), 0)}"
+        stale_ttl = response_cache.stale_ttl_for(endpoint)
+        if stale_ttl > 0:
+            cache_control += f", stale-while-revalidate={stale_ttl}"
+        if response_cache.stale_if_error > 0:
+            cache_control += f", stale-if-error={response_cache.stale_if_error}"
+        response.headers['Cache-Control'] = cache_control
+        response.headers['Age'] = str(max(int(now - entry.stored_at), 0))
+        # Validators for revalidating clients: an ETag over the body (the same in every worker) and the
+        # time the entry was fetched. A match turns the response into an empty 304.
+        response.last_modified = entry.stored_at
+        response.add_etag()
+        response.make_conditional(request)
+    return response
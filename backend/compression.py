@@ -0,0 +1,63 @@
+"""Response compression negotiated from Accept-Encoding: brotli when installed, then gzip.
+
+Only whole, in-memory bodies of compressible types of at least COMPRESS_MIN_SIZE
+bytes are compressed. Streamed responses (the /events stream) and file
+passthrough (/downloads media, already compressed and served by sendfile or
+nginx) are left alone. A compressed response is another representation of the
+resource, so a strong ETag on it is made weak, as nginx does; If-None-Match
+compares weakly, so revalidation still matches.
+"""
+import gzip
+from flask import request
+from backend import metrics
+from backend.config import COMPRESS_MIN_SIZE, COMPRESS_GZIP_LEVEL, COMPRESS_BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset([
+    'application/json', 'text/plain', 'text/html', 'text/css', 'text/csv', 'application/javascript',
+])
+
+def _encoders():
+    encoders = {'gzip': lambda data: gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        encoders['br'] = lambda data: brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return encoders
+
+ENCODERS = _encoders()
+# Preferred first when the client weighs them equally
+PREFERENCE = [name for name in ('br', 'gzip') if name in ENCODERS]
+
+def _compressible(response):
+    return (response.status_code == 200
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and 'Content-Encoding' not in response.headers
+            and response.mimetype in COMPRESSIBLE_TYPES
+            and (response.content_length or 0) >= COMPRESS_MIN_SIZE)
+
+def compress_response(response):
+    if not _compressible(response):
+        return response
+    # Shared caches must key on Accept-Encoding even when this client gets the identity body
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(PREFERENCE)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    compressed = ENCODERS[encoding](data)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    metrics.compressed_bytes.inc(len(data) - len(compressed), encoding=encoding)
+    return response
+
+def init_app(app):
+    app.after_request(compress_response)
@@ -1,4 +1,5 @@
 import os
+import shlex
 import logging
 from datetime import datetime
 
@@ -18,14 +19,181 @@ SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'your_sender_email@example.com')
 SENDER_PASSWORD = os.environ.get('SENDER_PASSWORD', 'your_email_app_password')
 SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
 SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() != 'false'
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 10))
+# Authenticated SMTP sessions are reused until idle this long (seconds), then reopened on demand
+SMTP_IDLE_TIMEOUT = float(os.environ.get('SMTP_IDLE_TIMEOUT', 60))
+SMTP_MAX_ATTEMPTS = int(os.environ.get('SMTP_MAX_ATTEMPTS', 5))
+SMTP_RETRY_BACKOFF = float(os.environ.get('SMTP_RETRY_BACKOFF', 30))
 GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', 'YOUR_GOOGLE_MAPS_API_KEY_HERE')
 AUTH_API_KEY = os.environ.get('AUTH_API_KEY', '')
+# Comma-separated blueprints this process serves (names in app.BLUEPRINTS, e.g. "todos,events"); empty serves all
+ENABLED_BLUEPRINTS = [name.strip() for name in os.environ.get('ENABLED_BLUEPRINTS', '').split(',') if name.strip()]
+# Set to false to switch off per-client rate limits (load tests from one address)
+RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() != 'false'
+# Where per-client rate-limit counters live. "sqlite://" keeps them in QUOTA_DB_PATH so every worker
+# process enforces one shared limit; any flask-limiter storage URI (memory://, redis://...) also works
+RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'sqlite://')
 
-BASE_WEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
-BASE_NEWS_URL = "https://newsapi.org/v2/top-headlines"
-BASE_YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
-BASE_PLACES_TEXT_SEARCH_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-BASE_GEOCODING_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+# Daily budgets of the upstream API keys, in the provider's quota units; 0 leaves a provider unmetered.
+# Each is a token bucket shared by all workers that refills at quota/day and holds at most
+# QUOTA_BURST_FRACTION of a day, so one busy hour cannot spend the whole day.
+UPSTREAM_DAILY_QUOTAS = {
+    'news': int(os.environ.get('NEWS_DAILY_QUOTA', 100)),
+    'youtube': int(os.environ.get('YOUTUBE_DAILY_QUOTA', 10000)),
+    'maps': int(os.environ.get('MAPS_DAILY_QUOTA', 1000)),
+    'weather': int(os.environ.get('WEATHER_DAILY_QUOTA', 1000)),
+}
+# Quota units one call costs; a YouTube Data API search is 100 units
+UPSTREAM_CALL_COSTS = {
+    'youtube': int(os.environ.get('YOUTUBE_SEARCH_COST', 100)),
+}
+QUOTA_BURST_FRACTION = float(os.environ.get('QUOTA_BURST_FRACTION', 0.25))
+# Below this fraction of its bucket a provider is conserved: cached responses are served past their TTL
+# (up to CACHE_STALE_IF_ERROR) instead of calling it
+QUOTA_LOW_FRACTION = float(os.environ.get('QUOTA_LOW_FRACTION', 0.2))
+# The budgets and the sqlite:// rate-limit counters are written on every request and upstream call, so
+# they live in their own SQLite file and never wait on the todo database's write lock. Their writes are
+# a single row each; one that cannot get the lock within QUOTA_BUSY_TIMEOUT seconds is let through
+# instead of blocking a gevent worker's event loop, which SQLite's busy wait does not yield.
+QUOTA_DB_PATH = os.environ.get('QUOTA_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quota.db'))
+QUOTA_BUSY_TIMEOUT = float(os.environ.get('QUOTA_BUSY_TIMEOUT', 0.05))
+QUOTA_POOL_SIZE = int(os.environ.get('QUOTA_POOL_SIZE', 4))
 
-DOWNLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'downloads')
+# 'orjson' (when installed) serializes jsonify() responses; 'default' keeps Flask's json-based provider
+JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+# Responses of at least COMPRESS_MIN_SIZE bytes are sent brotli- (when installed) or gzip-compressed
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+
+# Upstream endpoints; overridable so benchmarks and tests can point them at local stand-ins
+BASE_WEATHER_URL = os.environ.get('WEATHER_API_URL', "http://api.openweathermap.org/data/2.5/weather")
+BASE_NEWS_URL = os.environ.get('NEWS_API_URL', "https://newsapi.org/v2/top-headlines")
+BASE_NEWS_EVERYTHING_URL = os.environ.get('NEWS_EVERYTHING_API_URL', "https://newsapi.org/v2/everything")
+BASE_YOUTUBE_SEARCH_URL = os.environ.get('YOUTUBE_API_URL', "https://www.googleapis.com/youtube/v3/search")
+BASE_PLACES_TEXT_SEARCH_URL = os.environ.get('PLACES_API_URL', "https://maps.googleapis.com/maps/api/place/textsearch/json")
+BASE_GEOCODING_URL = os.environ.get('GEOCODING_API_URL', "https://maps.googleapis.com/maps/api/geocode/json")
+BASE_DICTIONARY_URL = os.environ.get('DICTIONARY_API_URL', "https://api.dictionaryapi.dev/api/v2/entries/en")
+BASE_WIKIPEDIA_API_URL = os.environ.get('WIKIPEDIA_API_URL', "https://en.wikipedia.org/w/api.php")
+
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 20))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.environ.get('HTTP_RETRY_BACKOFF', 0.3))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+
+# Per-upstream circuit breaker: opens when at least CIRCUIT_MIN_CALLS of the last CIRCUIT_WINDOW calls
+# ran and CIRCUIT_FAILURE_RATIO of them failed (connection error, timeout, 5xx) or took longer than
+# CIRCUIT_SLOW_CALL_SECONDS; calls then fail fast for CIRCUIT_OPEN_SECONDS before one trial call is let through
+CIRCUIT_WINDOW = int(os.environ.get('CIRCUIT_WINDOW', 20))
+CIRCUIT_MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', 5))
+CIRCUIT_FAILURE_RATIO = float(os.environ.get('CIRCUIT_FAILURE_RATIO', 0.5))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.environ.get('CIRCUIT_SLOW_CALL_SECONDS', 5))
+CIRCUIT_OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', 30))
+# Calls to one upstream allowed in flight at once per process; further calls fail fast
+UPSTREAM_MAX_CONCURRENCY = int(os.environ.get('UPSTREAM_MAX_CONCURRENCY', 32))
+# Once ADAPTIVE_TIMEOUT_MIN_SAMPLES calls have succeeded, read timeouts shrink to
+# ADAPTIVE_TIMEOUT_MULTIPLIER x the p99 of the last ADAPTIVE_TIMEOUT_SAMPLES latencies,
+# never below ADAPTIVE_TIMEOUT_FLOOR nor above the configured read timeout
+ADAPTIVE_TIMEOUT_SAMPLES = int(os.environ.get('ADAPTIVE_TIMEOUT_SAMPLES', 200))
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = int(os.environ.get('ADAPTIVE_TIMEOUT_MIN_SAMPLES', 20))
+ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.environ.get('ADAPTIVE_TIMEOUT_MULTIPLIER', 3))
+ADAPTIVE_TIMEOUT_FLOOR = float(os.environ.get('ADAPTIVE_TIMEOUT_FLOOR', 2))
+
+# Read timeouts (seconds) per upstream route, overridable as e.g. WEATHER_READ_TIMEOUT=5
+UPSTREAM_READ_TIMEOUTS = {
+    'weather': float(os.environ.get('WEATHER_READ_TIMEOUT', 30)),
+    'news': float(os.environ.get('NEWS_READ_TIMEOUT', 30)),
+    'maps': float(os.environ.get('MAPS_READ_TIMEOUT', 30)),
+    'youtube': float(os.environ.get('YOUTUBE_READ_TIMEOUT', 30)),
+    'dictionary': float(os.environ.get('DICTIONARY_READ_TIMEOUT', 10)),
+    'wikipedia': float(os.environ.get('WIKIPEDIA_READ_TIMEOUT', 10)),
+}
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+CACHE_DB_PATH = os.environ.get('CACHE_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache.db'))
+
+# Response cache TTLs (seconds) per endpoint; 0 disables caching for that endpoint
+CACHE_TTLS = {
+    'weather': int(os.environ.get('WEATHER_CACHE_TTL', 600)),
+    'news': int(os.environ.get('NEWS_CACHE_TTL', 300)),
+    'maps': int(os.environ.get('MAPS_CACHE_TTL', 3600)),
+    'youtube': int(os.environ.get('YOUTUBE_CACHE_TTL', 1800)),
+    'dictionary': int(os.environ.get('DICTIONARY_CACHE_TTL', 7 * 24 * 3600)),
+    'wikipedia': int(os.environ.get('WIKIPEDIA_CACHE_TTL', 24 * 3600)),
+}
+
+# How long (seconds) an expired entry may still be served while one background refresh runs
+CACHE_STALE_TTLS = {
+    'weather': int(os.environ.get('WEATHER_CACHE_STALE_TTL', 1800)),
+    'news': int(os.environ.get('NEWS_CACHE_STALE_TTL', 900)),
+    'wikipedia': int(os.environ.get('WIKIPEDIA_CACHE_STALE_TTL', 7 * 24 * 3600)),
+}
+# How long (seconds) past expiry an entry is kept to answer in place of a failed (5xx) upstream call
+CACHE_STALE_IF_ERROR = int(os.environ.get('CACHE_STALE_IF_ERROR', 24 * 3600))
+CACHE_REFRESH_WORKERS = int(os.environ.get('CACHE_REFRESH_WORKERS', 4))
+# Lifetime (seconds) of entries warmed from partial transcripts by /prefetch
+PREFETCH_TTL = int(os.environ.get('PREFETCH_TTL', 30))
+
+# Resolved titles (query -> canonical page) and truncated summaries kept by the Wikipedia service
+WIKIPEDIA_CACHE_SIZE = int(os.environ.get('WIKIPEDIA_CACHE_SIZE', 2048))
+WIKIPEDIA_BATCH_MAX = int(os.environ.get('WIKIPEDIA_BATCH_MAX', 20))
+
+# Set to a directory shared by all gunicorn workers to merge their metrics on /metrics
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+# /briefing runs its sub-requests concurrently; each gets BRIEFING_TIMEOUT seconds unless it asks for less
+BRIEFING_WORKERS = int(os.environ.get('BRIEFING_WORKERS', 8))
+BRIEFING_TIMEOUT = float(os.environ.get('BRIEFING_TIMEOUT', 5))
+BRIEFING_MAX_REQUESTS = int(os.environ.get('BRIEFING_MAX_REQUESTS', 10))
+
+# /events server-sent event stream: each process tails the SQLite change feed every EVENTS_POLL_INTERVAL
+# seconds; a subscriber more than EVENTS_BUFFER_SIZE events behind is disconnected and resumes via Last-Event-ID
+EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 0.25))
+EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE', 256))
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', 500))
+EVENTS_RETENTION = int(os.environ.get('EVENTS_RETENTION', 600))
+EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 3000))
+
+SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 64 * 1024 * 1024))
+SQLITE_CACHED_STATEMENTS = int(os.environ.get('SQLITE_CACHED_STATEMENTS', 128))
+TODO_BULK_MAX_ITEMS = int(os.environ.get('TODO_BULK_MAX_ITEMS', 500))
+TODO_PAGE_MAX_LIMIT = int(os.environ.get('TODO_PAGE_MAX_LIMIT', 200))
+TODO_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TODO_TOMBSTONE_RETENTION_DAYS', 30))
+
+# 'symspell' serves corrections from a prebuilt memory-mapped index, 'pyspellchecker' uses the library directly
+SPELLING_ENGINE = os.environ.get('SPELLING_ENGINE', 'symspell')
+SPELLING_INDEX_PATH = os.environ.get(
+    'SPELLING_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spelling_en.idx')
+)
+SPELLING_CACHE_SIZE = int(os.environ.get('SPELLING_CACHE_SIZE', 4096))
+
+# A claimed download job or outgoing email belongs to the claiming process until its lease runs out.
+# The owner renews the lease every third of this while it works, so on restart only rows whose lease
+# has expired are taken back, wherever (on whichever host) their owner ran.
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', 60))
+
+YTDLP_COMMAND = shlex.split(os.environ.get('YTDLP_BINARY', 'yt-dlp'))
+YTDLP_CONCURRENCY = int(os.environ.get('YTDLP_CONCURRENCY', 2))
+YTDLP_TIMEOUT = int(os.environ.get('YTDLP_TIMEOUT', 300))
+DOWNLOAD_FORMAT = os.environ.get('DOWNLOAD_FORMAT', 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/mp4')
+DOWNLOAD_MAX_BYTES = int(os.environ.get('DOWNLOAD_MAX_BYTES', 5 * 1024 ** 3))
+DOWNLOAD_MAX_AGE_DAYS = float(os.environ.get('DOWNLOAD_MAX_AGE_DAYS', 7))
+
+# How /downloads/ files are sent: 'sendfile' answers range requests through the server's zero-copy
+# file wrapper, 'x-accel' only checks the request and hands the transfer to nginx via X-Accel-Redirect
+# to the internal location MEDIA_ACCEL_PREFIX (see nginx.conf)
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'sendfile')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-downloads')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 24 * 3600))
+# A file's last_accessed (LRU eviction) is refreshed at most this often (seconds), not on every range request
+MEDIA_TOUCH_INTERVAL = float(os.environ.get('MEDIA_TOUCH_INTERVAL', 60))
+
+DOWNLOAD_DIR = os.environ.get('DOWNLOAD_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'downloads'))
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
@@ -1,85 +1,463 @@
+import json
 import sqlite3
+import socket
 import uuid
 import os
-from datetime import datetime
+import re
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from backend import metrics
+from backend.config import (
+    logger, SQLITE_POOL_SIZE, SQLITE_BUSY_TIMEOUT, SQLITE_MMAP_SIZE, SQLITE_CACHED_STATEMENTS,
+    TODO_TOMBSTONE_RETENTION_DAYS, EVENTS_RETENTION, JOB_LEASE_SECONDS
+)
 
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'todos.db')
+DB_PATH = os.environ.get('TODO_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'todos.db'))
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS todos (
-            id TEXT PRIMARY KEY,
-            task TEXT NOT NULL,
-            completed BOOLEAN DEFAULT 0,
-            created_at TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
+_pool = queue.LifoQueue(maxsize=SQLITE_POOL_SIZE)
 
-def get_all_todos():
-    conn = sqlite3.connect(DB_PATH)
+def _connect():
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=SQLITE_BUSY_TIMEOUT,
+        check_same_thread=False,
+        cached_statements=SQLITE_CACHED_STATEMENTS
+    )
     conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, task, completed, created_at FROM todos ORDER BY created_at ASC')
-    rows = cursor.fetchall()
-    conn.close()
-
-    todos = []
-    for row in rows:
-        todos.append({
-            "id": row["id"],
-            "task": row["task"],
-            "completed": bool(row["completed"]),
-            "createdAt": row["created_at"]
-        })
-    return todos
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
 
-def create_todo(task):
-    todo_id = str(uuid.uuid4())
-    created_at = datetime.utcnow().isoformat() + 'Z'
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('INSERT INTO todos (id, task, completed, created_at) VALUES (?, ?, ?, ?)',
-                   (todo_id, task.strip(), 0, created_at))
-    conn.commit()
-    conn.close()
+@contextmanager
+def get_connection():
+    # Connections are reused across requests; statements prepared on a
+    # connection stay in its statement cache for the next caller.
+    started = time.perf_counter()
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        metrics.sqlite_transaction_duration.observe(time.perf_counter() - started)
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def close_connections():
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+def _utcnow():
+    return datetime.utcnow().isoformat() + 'Z'
+
+def owner_id():
+    # Identifies the process holding a claimed row (download job, outgoing email)
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def lease_expiry():
+    # lease_expires_at for a row claimed or renewed now
+    return time.time() + JOB_LEASE_SECONDS
+
+@contextmanager
+def keep_lease(table, row_id):
+    """Renew the lease on a row this process claimed until the block exits.
+
+    A row whose lease has expired is treated as abandoned by resume_pending(), so
+    the renewal runs on its own thread: a long yt-dlp merge or SMTP DATA phase
+    does not let the lease lapse while the owner is still working.
+    """
+    stop = threading.Event()
+    owner = owner_id()
+
+    def renew():
+        while not stop.wait(JOB_LEASE_SECONDS / 3):
+            try:
+                with get_connection() as conn:
+                    conn.execute(f'UPDATE {table} SET lease_expires_at = ? WHERE id = ? AND owner = ?',
+                                 (lease_expiry(), row_id, owner))
+            except sqlite3.Error as e:
+                logger.info(f"Could not renew the lease on {table} {row_id}: {e}")
+
+    thread = threading.Thread(target=renew, name=f'lease-{row_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+
+def init_db():
+    with get_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS todos (
+                id TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                completed BOOLEAN DEFAULT 0,
+                created_at TEXT NOT NULL
+            )
+        ''')
+        columns = {row["name"] for row in conn.execute('PRAGMA table_info(todos)')}
+        if 'version' not in columns:
+            # Rows that predate change tracking get version 1 so a first sync with since=0 returns them
+            conn.execute('ALTER TABLE todos ADD COLUMN updated_at TEXT')
+            conn.execute('ALTER TABLE todos ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+            conn.execute('UPDATE todos SET updated_at = created_at, version = 1')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS todo_tombstones (
+                id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                deleted_at TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS todo_sync_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL,
+                min_version INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO todo_sync_state (id, version, min_version)
+            SELECT 1, COALESCE(MAX(version), 0), 0 FROM todos
+        ''')
+        # Change feed behind /events; AUTOINCREMENT keeps ids increasing in commit order and never reused
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                key TEXT,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_todos_created ON todos (created_at, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos (completed, created_at, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_todos_version ON todos (version)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tombstones_version ON todo_tombstones (version)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_todos_updated ON todos (updated_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tombstones_deleted ON todo_tombstones (deleted_at)')
+    _init_search_index()
+    prune_tombstones()
+    prune_events(EVENTS_RETENTION)
+
+def _init_search_index():
+    # External-content FTS5 index over todos.task, kept in sync by triggers
+    try:
+        with get_connection() as conn:
+            if _has_search_index(conn):
+                return
+            conn.execute('''
+                CREATE VIRTUAL TABLE todos_fts USING fts5(
+                    task, content='todos', content_rowid='rowid', tokenize='porter unicode61'
+                )
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+                    INSERT INTO todos_fts (rowid, task) VALUES (new.rowid, new.task);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+                    INSERT INTO todos_fts (todos_fts, rowid, task) VALUES ('delete', old.rowid, old.task);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF task ON todos BEGIN
+                    INSERT INTO todos_fts (todos_fts, rowid, task) VALUES ('delete', old.rowid, old.task);
+                    INSERT INTO todos_fts (rowid, task) VALUES (new.rowid, new.task);
+                END
+            ''')
+            conn.execute("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError as e:
+        logger.info(f"FTS5 unavailable, todo search falls back to LIKE matching: {e}")
+
+def _has_search_index(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'todos_fts'").fetchone() is not None
+
+def _next_version(conn):
+    # Taking the write lock here serializes writers, so versions are allocated in commit order
+    return conn.execute('UPDATE todo_sync_state SET version = version + 1 WHERE id = 1 RETURNING version').fetchone()[0]
+
+def _bury(conn, todo_ids, version):
+    deleted_at = _utcnow()
+    conn.executemany('INSERT OR REPLACE INTO todo_tombstones (id, version, deleted_at) VALUES (?, ?, ?)',
+                     [(todo_id, version, deleted_at) for todo_id in todo_ids])
+
+def append_event(conn, topic, data, key=None):
+    # Written in the caller's transaction, so an event is visible exactly when its change is
+    conn.execute('INSERT INTO events (topic, key, data, created_at) VALUES (?, ?, ?, ?)',
+                 (topic, key, json.dumps(data), time.time()))
+
+def latest_event_id():
+    with get_connection() as conn:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'events'").fetchone()
+    return row["seq"] if row else 0
+
+def get_events(after, limit=500):
+    # -> (rows, reset); reset means events after `after` were already pruned, or `after`
+    # comes from another database, so the caller must reload state instead of replaying
+    with get_connection() as conn:
+        conn.execute('BEGIN')
+        oldest = conn.execute('SELECT MIN(id) FROM events').fetchone()[0]
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'events'").fetchone()
+        latest = row["seq"] if row else 0
+        rows = conn.execute(
+            'SELECT id, topic, key, data FROM events WHERE id > ? ORDER BY id LIMIT ?', (after, limit)
+        ).fetchall()
+    reset = after > latest or (after < latest and (oldest is None or oldest > after + 1))
+    return rows, reset
+
+def prune_events(max_age):
+    with get_connection() as conn:
+        conn.execute('DELETE FROM events WHERE created_at < ?', (time.time() - max_age,))
+
+def prune_tombstones(retention_days=TODO_TOMBSTONE_RETENTION_DAYS):
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat() + 'Z'
+    with get_connection() as conn:
+        rows = conn.execute(
+            'DELETE FROM todo_tombstones WHERE deleted_at < ? RETURNING version', (cutoff,)
+        ).fetchall()
+        if rows:
+            # Clients that last synced before the pruned deletions need a full resync
+            conn.execute('UPDATE todo_sync_state SET min_version = MAX(min_version, ?) WHERE id = 1',
+                         (max(row["version"] for row in rows),))
+
+def _row_to_todo(row):
     return {
-        "id": todo_id,
-        "task": task.strip(),
-        "completed": False,
-        "createdAt": created_at
+        "id": row["id"],
+        "task": row["task"],
+        "completed": bool(row["completed"]),
+        "createdAt": row["created_at"]
     }
 
-def update_todo(todo_id, task=None, completed=None):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def _todos_at_version(conn, version):
+    rows = conn.execute('SELECT id, task, completed, created_at FROM todos WHERE version = ?', (version,)).fetchall()
+    return [_row_to_todo(row) for row in rows]
+
+def _todo_event(conn, version, changed=(), deleted=()):
+    # Same shape as get_todo_changes(), so clients apply pushed and pulled deltas alike
+    append_event(conn, 'todos', {"changed": list(changed), "deleted": list(deleted), "version": version, "reset": False})
+
+def _select_all_todos(conn, completed):
+    if completed is None:
+        return conn.execute('SELECT id, task, completed, created_at FROM todos ORDER BY created_at ASC, id ASC').fetchall()
+    return conn.execute(
+        'SELECT id, task, completed, created_at FROM todos WHERE completed = ? ORDER BY created_at ASC, id ASC',
+        (1 if completed else 0,)
+    ).fetchall()
+
+def get_all_todos(completed=None):
+    with get_connection() as conn:
+        rows = _select_all_todos(conn, completed)
+    return [_row_to_todo(row) for row in rows]
+
+def _todo_list_state(conn):
+    # -> (version, last_modified): the sync version is bumped by every write, deletions included, and the
+    # newest updated_at / deleted_at is when that happened. Both MAX()es are index lookups.
+    row = conn.execute('''
+        SELECT version,
+               (SELECT MAX(updated_at) FROM todos) AS updated_at,
+               (SELECT MAX(deleted_at) FROM todo_tombstones) AS deleted_at
+        FROM todo_sync_state WHERE id = 1
+    ''').fetchone()
+    stamps = [stamp for stamp in (row["updated_at"], row["deleted_at"]) if stamp]
+    last_modified = datetime.fromisoformat(max(stamps).rstrip('Z')) if stamps else None
+    return row["version"], last_modified
 
-    cursor.execute('SELECT id FROM todos WHERE id = ?', (todo_id,))
-    if not cursor.fetchone():
-        conn.close()
-        return None
+def get_todo_list_state():
+    # GET /api/todos builds its validators from this without reading the list
+    with get_connection() as conn:
+        return _todo_list_state(conn)
 
-    if task is not None:
-        cursor.execute('UPDATE todos SET task = ? WHERE id = ?', (task.strip(), todo_id))
+def get_all_todos_with_state(completed=None):
+    with get_connection() as conn:
+        # One read transaction, so the version and time label exactly these rows
+        conn.execute('BEGIN')
+        version, last_modified = _todo_list_state(conn)
+        rows = _select_all_todos(conn, completed)
+    return [_row_to_todo(row) for row in rows], version, last_modified
+
+def get_todos_page(limit, after=None, completed=None):
+    # Keyset pagination over (created_at, id); `after` is the (created_at, id) of the last row seen
+    clauses, params = [], []
     if completed is not None:
-        cursor.execute('UPDATE todos SET completed = ? WHERE id = ?', (1 if completed else 0, todo_id))
+        clauses.append('completed = ?')
+        params.append(1 if completed else 0)
+    if after is not None:
+        clauses.append('(created_at, id) > (?, ?)')
+        params.extend(after)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    with get_connection() as conn:
+        rows = conn.execute(
+            f'SELECT id, task, completed, created_at FROM todos {where} ORDER BY created_at ASC, id ASC LIMIT ?',
+            params + [limit + 1]
+        ).fetchall()
+    todos = [_row_to_todo(row) for row in rows[:limit]]
+    next_after = (rows[limit - 1]["created_at"], rows[limit - 1]["id"]) if len(rows) > limit else None
+    return todos, next_after
+
+def get_todo_changes(since):
+    with get_connection() as conn:
+        # One read transaction so the rows and the returned version come from the same snapshot
+        conn.execute('BEGIN')
+        state = conn.execute('SELECT version, min_version FROM todo_sync_state WHERE id = 1').fetchone()
+        reset = since < state["min_version"]
+        if reset:
+            changed = conn.execute('SELECT id, task, completed, created_at FROM todos ORDER BY created_at ASC, id ASC').fetchall()
+            deleted = []
+        else:
+            changed = conn.execute(
+                'SELECT id, task, completed, created_at FROM todos WHERE version > ? ORDER BY version ASC', (since,)
+            ).fetchall()
+            deleted = conn.execute(
+                'SELECT id FROM todo_tombstones WHERE version > ? ORDER BY version ASC', (since,)
+            ).fetchall()
+    return {
+        "changed": [_row_to_todo(row) for row in changed],
+        "deleted": [row["id"] for row in deleted],
+        "version": state["version"],
+        "reset": reset
+    }
+
+def search_todos(query, limit=10, completed=None):
+    # Any spoken word may match (OR of prefix terms); BM25 ranks todos sharing the rarest words first
+    tokens = re.findall(r'\w+', query.lower())
+    if not tokens:
+        return []
+    completed_clause = '' if completed is None else 'AND t.completed = ?'
+    completed_params = [] if completed is None else [1 if completed else 0]
+    with get_connection() as conn:
+        if _has_search_index(conn):
+            match = ' OR '.join(f'"{token}"*' for token in tokens)
+            rows = conn.execute(
+                'SELECT t.id, t.task, t.completed, t.created_at, bm25(todos_fts) AS rank '
+                'FROM todos_fts JOIN todos t ON t.rowid = todos_fts.rowid '
+                f'WHERE todos_fts MATCH ? {completed_clause} ORDER BY rank LIMIT ?',
+                [match] + completed_params + [limit]
+            ).fetchall()
+        else:
+            like = ' OR '.join('t.task LIKE ?' for _ in tokens)
+            rows = conn.execute(
+                'SELECT t.id, t.task, t.completed, t.created_at, 0 AS rank FROM todos t '
+                f'WHERE ({like}) {completed_clause} ORDER BY t.created_at ASC LIMIT ?',
+                [f'%{token}%' for token in tokens] + completed_params + [limit]
+            ).fetchall()
+    return [dict(_row_to_todo(row), score=round(-row["rank"], 4)) for row in rows]
+
+def create_todo(task):
+    todo_id = str(uuid.uuid4())
+    created_at = _utcnow()
+    with get_connection() as conn:
+        version = _next_version(conn)
+        conn.execute('INSERT INTO todos (id, task, completed, created_at, updated_at, version) VALUES (?, ?, ?, ?, ?, ?)',
+                     (todo_id, task.strip(), 0, created_at, created_at, version))
+        todo = {
+            "id": todo_id,
+            "task": task.strip(),
+            "completed": False,
+            "createdAt": created_at
+        }
+        _todo_event(conn, version, changed=[todo])
+    return todo
 
-    conn.commit()
-    conn.close()
+def update_todo(todo_id, task=None, completed=None):
+    with get_connection() as conn:
+        version = _next_version(conn)
+        cursor = conn.execute(
+            'UPDATE todos SET task = COALESCE(?, task), completed = COALESCE(?, completed), '
+            'updated_at = ?, version = ? WHERE id = ?',
+            (task.strip() if task is not None else None,
+             None if completed is None else (1 if completed else 0),
+             _utcnow(), version, todo_id)
+        )
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return None
+        _todo_event(conn, version, changed=_todos_at_version(conn, version))
     return {"message": "Todo updated successfully"}
 
 def delete_todo(todo_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT id FROM todos WHERE id = ?', (todo_id,))
-    if not cursor.fetchone():
-        conn.close()
-        return False
-
-    cursor.execute('DELETE FROM todos WHERE id = ?', (todo_id,))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.execute('DELETE FROM todos WHERE id = ?', (todo_id,))
+        if cursor.rowcount == 0:
+            return False
+        version = _next_version(conn)
+        _bury(conn, [todo_id], version)
+        _todo_event(conn, version, deleted=[todo_id])
     return True
+
+def _existing_ids(conn, todo_ids):
+    if not todo_ids:
+        return set()
+    placeholders = ','.join('?' * len(todo_ids))
+    rows = conn.execute(f'SELECT id FROM todos WHERE id IN ({placeholders})', list(todo_ids)).fetchall()
+    return {row["id"] for row in rows}
+
+def create_todos(tasks):
+    created_at = _utcnow()
+    todos = [{
+        "id": str(uuid.uuid4()),
+        "task": task.strip(),
+        "completed": False,
+        "createdAt": created_at
+    } for task in tasks]
+    with get_connection() as conn:
+        version = _next_version(conn)
+        conn.executemany('INSERT INTO todos (id, task, completed, created_at, updated_at, version) VALUES (?, ?, ?, ?, ?, ?)',
+                         [(todo["id"], todo["task"], 0, created_at, created_at, version) for todo in todos])
+        if todos:
+            _todo_event(conn, version, changed=todos)
+    return todos
+
+def update_todos(updates):
+    # updates: list of {"id", "task"?, "completed"?}; returns one result per item, in order
+    updated_at = _utcnow()
+    with get_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        existing = _existing_ids(conn, {u["id"] for u in updates})
+        if existing:
+            version = _next_version(conn)
+            conn.executemany(
+                'UPDATE todos SET task = COALESCE(?, task), completed = COALESCE(?, completed), '
+                'updated_at = ?, version = ? WHERE id = ?',
+                [(u["task"].strip() if u.get("task") is not None else None,
+                  None if u.get("completed") is None else (1 if u["completed"] else 0),
+                  updated_at, version, u["id"]) for u in updates if u["id"] in existing]
+            )
+            _todo_event(conn, version, changed=_todos_at_version(conn, version))
+    return [{"id": u["id"], "status": "updated" if u["id"] in existing else "not_found"} for u in updates]
+
+def delete_todos(todo_ids):
+    with get_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        existing = _existing_ids(conn, set(todo_ids))
+        if existing:
+            conn.executemany('DELETE FROM todos WHERE id = ?', [(todo_id,) for todo_id in existing])
+            version = _next_version(conn)
+            _bury(conn, existing, version)
+            _todo_event(conn, version, deleted=sorted(existing))
+    return [{"id": todo_id, "status": "deleted" if todo_id in existing else "not_found"} for todo_id in todo_ids]
+
+def clear_completed_todos():
+    with get_connection() as conn:
+        rows = conn.execute('DELETE FROM todos WHERE completed = 1 RETURNING id').fetchall()
+        deleted_ids = [row["id"] for row in rows]
+        if deleted_ids:
+            version = _next_version(conn)
+            _bury(conn, deleted_ids, version)
+            _todo_event(conn, version, deleted=deleted_ids)
+    return deleted_ids
@@ -0,0 +1,101 @@
+import argparse
+import gzip
+import json
+import time
+import zlib
+from backend import db
+from backend.config import logger
+
+IMPORT_BATCH_SIZE = 1000
+
+def init_db():
+    # Definitions are kept in the shape the /dictionary endpoint returns, zlib-compressed JSON keyed by word
+    with db.get_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS dictionary_entries (
+                word TEXT PRIMARY KEY,
+                definitions BLOB NOT NULL,
+                source TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+def format_entries(entries):
+    # dictionaryapi.dev entries -> [{"part_of_speech", "meanings"}]
+    formatted_definitions = []
+    for entry in entries:
+        for meaning in entry.get('meanings', []):
+            part_of_speech = meaning.get('partOfSpeech', '')
+            definitions = [d.get('definition', '') for d in meaning.get('definitions', []) if d.get('definition')]
+            if definitions:
+                formatted_definitions.append({
+                    "part_of_speech": part_of_speech,
+                    "meanings": definitions
+                })
+    return formatted_definitions
+
+def _pack(definitions):
+    return zlib.compress(json.dumps(definitions, separators=(',', ':')).encode('utf-8'))
+
+def lookup(word):
+    with db.get_connection() as conn:
+        row = conn.execute('SELECT definitions FROM dictionary_entries WHERE word = ?', (word.lower(),)).fetchone()
+    return json.loads(zlib.decompress(row["definitions"])) if row else None
+
+def store(word, definitions, source='api'):
+    with db.get_connection() as conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO dictionary_entries (word, definitions, source, updated_at) VALUES (?, ?, ?, ?)',
+            (word.lower(), _pack(definitions), source, time.time())
+        )
+
+def _read_dump(path):
+    # JSON lines, optionally gzipped. Each line is either {"word", "definitions"} in the
+    # stored shape or a raw dictionaryapi.dev entry ({"word", "meanings"}); raw entries
+    # for the same word are merged.
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'definitions' in record:
+                yield record['word'], record['definitions']
+            else:
+                yield record['word'], format_entries([record])
+
+def import_dump(path, source='dump'):
+    """Bulk-load a definitions dump, replacing any stored entries for the same words.
+
+    Returns the number of words written.
+    """
+    merged = {}
+    for word, definitions in _read_dump(path):
+        if definitions:
+            merged.setdefault(word.lower(), []).extend(definitions)
+
+    now = time.time()
+    rows = [(word, _pack(definitions), source, now) for word, definitions in merged.items()]
+    with db.get_connection() as conn:
+        for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+            conn.executemany(
+                'INSERT OR REPLACE INTO dictionary_entries (word, definitions, source, updated_at) VALUES (?, ?, ?, ?)',
+                rows[start:start + IMPORT_BATCH_SIZE]
+            )
+    logger.info(f"Imported {len(rows)} dictionary entries from {path}")
+    return len(rows)
+
+def count():
+    with db.get_connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM dictionary_entries').fetchone()[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load definitions into the local dictionary store")
+    parser.add_argument('dump', help="JSON lines file (.jsonl or .jsonl.gz)")
+    args = parser.parse_args()
+    init_db()
+    print(f"Imported {import_dump(args.dump)} words, {count()} stored")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from backend import db, metrics
+from backend.config import (
+    logger, EVENTS_POLL_INTERVAL, EVENTS_HEARTBEAT, EVENTS_BUFFER_SIZE, EVENTS_MAX_SUBSCRIBERS,
+    EVENTS_RETENTION, EVENTS_RETRY_MS
+)
+
+TOPICS = ('todos', 'downloads', 'emails')
+PAGE_SIZE = 500
+PRUNE_INTERVAL = 60
+
+# frame is the encoded SSE message, built once per event and shared by every subscriber
+Event = namedtuple('Event', ['id', 'topic', 'key', 'frame'])
+
+def format_event(event_id, topic, data):
+    # data is JSON text; JSON never contains a raw newline, so it fits on one data: line
+    return f"id: {event_id}\nevent: {topic}\ndata: {data}\n\n"
+
+def _to_event(row):
+    return Event(row["id"], row["topic"], row["key"], format_event(row["id"], row["topic"], row["data"]))
+
+class SubscriberLimitError(Exception):
+    pass
+
+class Subscriber:
+    def __init__(self, topics, keys=None, buffer_size=EVENTS_BUFFER_SIZE):
+        self.topics = frozenset(topics)
+        self.keys = None if keys is None else frozenset(keys)  # download job / email ids; None for all
+        self.queue = queue.Queue(maxsize=buffer_size)
+        self.overflowed = False
+        self.last_id = 0
+
+    def wants(self, topic, key):
+        return topic in self.topics and (topic == 'todos' or self.keys is None or key in self.keys)
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            if not self.overflowed:
+                self.overflowed = True
+                metrics.event_overflows.inc()
+
+class EventBroker:
+    """Fans the SQLite change feed (db.append_event) out to /events subscribers.
+
+    One thread per process tails the events table while anyone is subscribed, so
+    changes made by any worker reach clients connected to every worker. Each
+    subscriber has a bounded queue; one that falls behind is disconnected and its
+    client resumes from Last-Event-ID, replayed from the table.
+    """
+
+    def __init__(self, poll_interval=EVENTS_POLL_INTERVAL, heartbeat=EVENTS_HEARTBEAT,
+                 max_subscribers=EVENTS_MAX_SUBSCRIBERS, retention=EVENTS_RETENTION):
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.max_subscribers = max_subscribers
+        self.retention = retention
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._position = 0
+        self._last_prune = 0.0
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise SubscriberLimitError(f"At most {self.max_subscribers} event subscribers per process")
+            if self._thread is None:
+                # Everything committed from here on is delivered; the subscriber skips what it has seen
+                self._position = db.latest_event_id()
+                self._thread = threading.Thread(target=self._run, name='event-broker', daemon=True)
+                self._thread.start()
+            self._subscribers.add(subscriber)
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                self._poll()
+            except Exception as e:
+                logger.info(f"Event broker poll failed: {e}")
+            time.sleep(self.poll_interval)
+
+    def _poll(self):
+        now = time.monotonic()
+        if now - self._last_prune >= PRUNE_INTERVAL:
+            db.prune_events(self.retention)
+            self._last_prune = now
+        while True:
+            rows, _ = db.get_events(self._position, PAGE_SIZE)
+            # Taken after the read: anyone subscribing later starts past these rows
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for row in rows:
+                event = _to_event(row)
+                for subscriber in subscribers:
+                    if subscriber.wants(event.topic, event.key):
+                        subscriber.offer(event)
+                self._position = event.id
+            if len(rows) < PAGE_SIZE:
+                return
+
+    def _replay(self, subscriber, last_event_id):
+        subscriber.last_id = last_event_id
+        while True:
+            rows, reset = db.get_events(subscriber.last_id, PAGE_SIZE)
+            if reset:
+                # Missed events were pruned: the client has to reload whatever it shows
+                subscriber.last_id = db.latest_event_id()
+                yield format_event(subscriber.last_id, 'reset', '{}')
+                return
+            for row in rows:
+                subscriber.last_id = row["id"]
+                if subscriber.wants(row["topic"], row["key"]):
+                    yield format_event(row["id"], row["topic"], row["data"])
+            if len(rows) < PAGE_SIZE:
+                return
+
+    def stream(self, subscriber, last_event_id=None):
+        """Yield SSE frames for a subscribed client until it disconnects or overflows.
+
+        Without last_event_id the stream opens with a 'ready' event carrying the current
+        position, after which the client loads its initial state. With one, missed events
+        are replayed first, or a single 'reset' event is sent if they are gone.
+        """
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n"
+            if last_event_id is None:
+                subscriber.last_id = db.latest_event_id()
+                yield format_event(subscriber.last_id, 'ready', '{}')
+            else:
+                yield from self._replay(subscriber, last_event_id)
+
+            while not subscriber.overflowed:
+                try:
+                    event = subscriber.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Keeps proxies from closing an idle connection and detects gone clients
+                    yield ": keepalive\n\n"
+                    continue
+                if event.id <= subscriber.last_id:
+                    continue
+                subscriber.last_id = event.id
+                yield event.frame
+        finally:
+            self.unsubscribe(subscriber)
+
+broker = EventBroker()
+
+def _collect_metrics():
+    metrics.event_subscribers.set(broker.subscriber_count())
+
+metrics.registry.add_collector(_collect_metrics)
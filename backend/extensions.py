@@ -0,0 +1,16 @@
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from backend import quota  # noqa: F401 - registers the sqlite:// rate-limit storage
+from backend.config import RATELIMIT_STORAGE_URI
+
+# Counters are shared by all workers (sqlite://); if the storage fails, each process falls back to memory
+limiter = Limiter(
+    get_remote_address,
+    default_limits=["60 per minute"],
+    storage_uri=RATELIMIT_STORAGE_URI,
+    in_memory_fallback_enabled=True
+)
+
+# Per-client budget of each action that sends mail or starts a yt-dlp job. It is a shared limit scoped
+# by action, so /send-email and /youtube/download draw from the same counters as their /command intents.
+ACTION_LIMIT = "10 per minute"
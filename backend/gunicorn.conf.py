@@ -0,0 +1,40 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+# SERVER_MODE=async runs each worker on a gevent event loop: sockets used by
+# requests, smtplib and subprocess become cooperative, so one worker can hold
+# thousands of slow upstream calls. SERVER_MODE=threaded uses a thread pool per worker.
+server_mode = os.environ.get('SERVER_MODE', 'async')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+if server_mode == 'async':
+    worker_class = 'gevent'
+    workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+else:
+    worker_class = 'gthread'
+    workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+accesslog = '-'
+errorlog = '-'
+
+def on_starting(server):
+    # Create or upgrade the SQLite schema once, in a separate interpreter so the master
+    # imports nothing gevent would later have to patch; workers then skip the DDL
+    subprocess.run([sys.executable, '-m', 'backend.schema'], check=True)
+    # /dictionary answers 503 until the spelling index exists; the Docker image ships one
+    subprocess.run([sys.executable, '-m', 'backend.spelling', 'build', '--if-missing'], check=True)
+
+    # Worker metrics snapshots from a previous run would otherwise be merged into /metrics
+    metrics_dir = os.environ.get('METRICS_DIR')
+    if metrics_dir and os.path.isdir(metrics_dir):
+        for name in os.listdir(metrics_dir):
+            if name.startswith('metrics_'):
+                os.remove(os.path.join(metrics_dir, name))
@@ -0,0 +1,276 @@
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from backend import metrics, quota
+from backend.config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_MAX_RETRIES, HTTP_RETRY_BACKOFF,
+    HTTP_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUTS, CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS, CIRCUIT_FAILURE_RATIO,
+    CIRCUIT_SLOW_CALL_SECONDS, CIRCUIT_OPEN_SECONDS, UPSTREAM_MAX_CONCURRENCY, ADAPTIVE_TIMEOUT_SAMPLES,
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES, ADAPTIVE_TIMEOUT_MULTIPLIER, ADAPTIVE_TIMEOUT_FLOOR
+)
+
+DEFAULT_READ_TIMEOUT = 30
+USER_AGENT = "AIVoiceAssistant/1.0"
+
+_session = None
+_session_lock = threading.Lock()
+
+def _build_retry():
+    # Only idempotent GETs are retried, on connection failures and gateway errors.
+    # Read timeouts are not retried (read=False) so a slow upstream still surfaces
+    # as requests.exceptions.Timeout after one wait instead of several.
+    return Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=False,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,
+    )
+
+def build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=_build_retry(),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+class UpstreamRejectedError(requests.exceptions.ConnectionError):
+    # Raised without contacting the upstream. Subclassing ConnectionError means every
+    # fetch_* handler already turns it into a 503 instead of waiting out a timeout.
+    def __init__(self, route, reason, retry_after=None):
+        super().__init__(f"{route} upstream unavailable ({reason})")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker for one upstream.
+
+    closed: calls go through and their outcomes are recorded. A call fails if it
+    raises, answers 5xx or takes slow_call_seconds or longer.
+    open: calls are rejected until open_seconds have passed.
+    half_open: one trial call goes through; success closes the breaker, failure reopens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, window=CIRCUIT_WINDOW, min_calls=CIRCUIT_MIN_CALLS, failure_ratio=CIRCUIT_FAILURE_RATIO,
+                 slow_call_seconds=CIRCUIT_SLOW_CALL_SECONDS, open_seconds=CIRCUIT_OPEN_SECONDS, clock=time.monotonic):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.opens = 0
+        self.rejected = 0
+        self._outcomes = deque(maxlen=window)  # True for a failed call
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(self._opened_at + self.open_seconds - self.clock(), 0.0)
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record(self, failed, duration=0.0):
+        failed = failed or duration >= self.slow_call_seconds
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+            elif self.state == self.CLOSED:
+                self._outcomes.append(failed)
+                if (len(self._outcomes) >= self.min_calls
+                        and sum(self._outcomes) / len(self._outcomes) >= self.failure_ratio):
+                    self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opens += 1
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+
+    def stats(self):
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": len(outcomes),
+            "recent_failures": sum(outcomes),
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
+
+class LatencyTracker:
+    # Durations of recent successful calls to one upstream, used to tighten its read timeout
+    def __init__(self, size=ADAPTIVE_TIMEOUT_SAMPLES, min_samples=ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+                 multiplier=ADAPTIVE_TIMEOUT_MULTIPLIER, floor=ADAPTIVE_TIMEOUT_FLOOR):
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.floor = floor
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def read_timeout(self, configured):
+        if len(self._samples) < self.min_samples:
+            return configured
+        return min(configured, max(self.floor, self.percentile(0.99) * self.multiplier))
+
+class Upstream:
+    def __init__(self, route):
+        self.route = route
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.max_concurrency = UPSTREAM_MAX_CONCURRENCY
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Bulkhead: a stalled upstream can hold at most max_concurrency worker threads
+        with self._lock:
+            if self.in_flight >= self.max_concurrency:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+def get_upstream(route):
+    upstream = _upstreams.get(route)
+    if upstream is None:
+        with _upstreams_lock:
+            upstream = _upstreams.setdefault(route, Upstream(route))
+    return upstream
+
+def reset_upstreams():
+    with _upstreams_lock:
+        _upstreams.clear()
+
+def upstream_stats():
+    stats = {}
+    for route, upstream in sorted(_upstreams.items()):
+        configured = UPSTREAM_READ_TIMEOUTS.get(route, DEFAULT_READ_TIMEOUT)
+        p99 = upstream.latency.percentile(0.99)
+        stats[route] = {
+            **upstream.breaker.stats(),
+            "retry_after": round(upstream.breaker.retry_after(), 1),
+            "in_flight": upstream.in_flight,
+            "p99_ms": None if p99 is None else round(p99 * 1000, 1),
+            "read_timeout": round(upstream.latency.read_timeout(configured), 3),
+        }
+    return stats
+
+def _collect_metrics():
+    for route, stats in upstream_stats().items():
+        metrics.upstream_circuit_state.set(
+            (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN).index(stats['state']), upstream=route)
+        metrics.upstream_read_timeout.set(stats['read_timeout'], upstream=route)
+
+metrics.registry.add_collector(_collect_metrics)
+
+def get_timeout(route):
+    configured = UPSTREAM_READ_TIMEOUTS.get(route, DEFAULT_READ_TIMEOUT)
+    return (HTTP_CONNECT_TIMEOUT, get_upstream(route).latency.read_timeout(configured))
+
+def get(route, url, params=None, **kwargs):
+    """GET through the shared session, guarded by the route's quota, circuit breaker and concurrency cap.
+
+    Raises UpstreamRejectedError without a network call while the breaker is open,
+    UPSTREAM_MAX_CONCURRENCY calls to the route are already in flight or the route's
+    API key budget (quota.spend) is spent.
+    """
+    upstream = get_upstream(route)
+    if not upstream.acquire():
+        metrics.upstream_rejections.inc(upstream=route, reason='concurrency')
+        raise UpstreamRejectedError(route, 'too many concurrent calls')
+    # Spent before asking the breaker, whose half-open trial slot must end in a recorded call
+    if not quota.spend(route):
+        upstream.release()
+        metrics.upstream_rejections.inc(upstream=route, reason='quota')
+        raise UpstreamRejectedError(route, 'quota exhausted')
+    if not upstream.breaker.allow():
+        upstream.release()
+        quota.refund(route)
+        metrics.upstream_rejections.inc(upstream=route, reason='circuit_open')
+        raise UpstreamRejectedError(route, 'circuit open', upstream.breaker.retry_after())
+
+    kwargs.setdefault('timeout', get_timeout(route))
+    failed = True
+    started = time.perf_counter()
+    try:
+        with metrics.time_upstream(route) as call:
+            response = get_session().get(url, params=params, **kwargs)
+            call.outcome = str(response.status_code)
+        failed = response.status_code >= 500
+        if response.status_code == 429:
+            quota.drain(route)
+        return response
+    finally:
+        duration = time.perf_counter() - started
+        upstream.release()
+        upstream.breaker.record(failed, duration)
+        if not failed:
+            upstream.latency.record(duration)
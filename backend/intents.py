@@ -0,0 +1,160 @@
+import argparse
+import re
+import time
+from collections import namedtuple
+
+# triggers: phrases that select the intent wherever they appear in the transcript.
+# patterns: slot regexes tried in order against the whole transcript (case-insensitive,
+# so URLs and email addresses keep their case); when there are none, the text after
+# the trigger becomes the 'query' slot.
+# Earlier intents win when several triggers are present, like the old client-side if-chain.
+Intent = namedtuple('Intent', ['name', 'triggers', 'patterns', 'prompt'])
+Match = namedtuple('Match', ['intent', 'slots', 'prompt'])
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+INTENTS = [
+    Intent('greeting', ('hello', 'hi assistant'), (), None),
+    Intent('time', ('what time is it',), (), None),
+    Intent('add_todo', ('add a todo', 'add to do', 'create a todo', 'add a to do', 'create a to do'),
+           (r'(?:add|create)\s+a\s+to[\s-]*do\s+(?:item\s+)?(?P<task>.*?)(?:\.|$)',),
+           "What would you like to add to your to-do list?"),
+    Intent('list_todos', ('show my todo list', 'what are my todos'), (), None),
+    Intent('complete_todo', ('mark todo as complete', 'complete todo'),
+           (r'(?:mark|complete)\s+todo\s+(?:as\s+complete\s+)?(?:number\s+)?(?P<number>\d+)',),
+           "Which to-do item would you like to mark as complete? Please say 'mark todo as complete number X'."),
+    Intent('delete_todo', ('delete todo', 'remove todo'),
+           (r'(?:delete|remove)\s+todo\s+(?:number\s+)?(?P<number>\d+)',),
+           "Which to-do item would you like to delete? Please say 'delete todo number X'."),
+    Intent('weather', ('what is the weather in',), (r'what is the weather in (?P<city>.+)',),
+           "For which city would you like to know the weather?"),
+    Intent('news', ('what is the news', 'tell me the news'),
+           (r'(?:what is the news about|tell me the news about)\s+(?P<query>.+)', r'(?P<query>)'), None),
+    Intent('wikipedia', ('tell me about', 'who is', 'what is'), (),
+           "What topic or person would you like to know about?"),
+    Intent('define', ('define', 'what does'),
+           (r'define\s+(?P<word>.+)', r'what does\s+(?P<word>.+)\s+mean'),
+           "Which word would you like me to define?"),
+    Intent('youtube_search', ('search youtube for', 'find on youtube'), (),
+           "What would you like to search for on YouTube?"),
+    Intent('play', ('play',), (), "What would you like me to play?"),
+    Intent('send_email', ('send an email to',),
+           (r'send an email to\s+(?P<recipient>[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,})\s+with subject\s+'
+            r'(?P<subject>.+?)\s+and message\s+(?P<body>.+)',),
+           "I couldn't understand the email command. Please say 'send an email to [recipient email] "
+           "with subject [subject] and message [body]'."),
+    Intent('download_video', ('download youtube video',),
+           (r'download youtube video\s+(?P<url>https?://(?:www\.)?youtube\.com/watch\?v=[\w-]+|https?://youtu\.be/[\w-]+)',),
+           "Please provide a valid YouTube video URL after 'download YouTube video'."),
+    Intent('download_current_video', ('download this video', 'download current video'), (), None),
+    Intent('female_voice', ('switch to female voice',), (), None),
+    Intent('male_voice', ('switch to male voice',), (), None),
+    Intent('open_website', ('open website',), (),
+           "Which website would you like to open? Please say 'open website example dot com'."),
+    Intent('maps', ('find', 'search for', 'maps'), (), "What would you like to search for on maps?"),
+]
+
+# Rewrites applied to 'query' slots taken from the rest of the sentence
+REMAINDER_CLEANUP = {
+    'open_website': [(re.compile(r' dot( |$)', re.IGNORECASE), '.')],
+    'maps': [(re.compile(r' (?:near me|on maps)\b', re.IGNORECASE), '')],
+}
+# 'query' slots that are not a topic but the start of another command ("what is the",
+# "what is the weather" before " in <city>"); the slot counts as missing
+REMAINDER_REJECT = {
+    'wikipedia': re.compile(r'^(?:(?:a|an|the|it|this|that|is|are|of|in|on|my)(?:\s+|$))+$|^the weather\b',
+                            re.IGNORECASE),
+}
+
+class IntentMatcher:
+    """Finds the intent of a transcript in one pass over its tokens.
+
+    Every trigger phrase of every intent goes into one token trie. Scanning the
+    transcript walks the trie from each token, so matching costs O(tokens x longest
+    trigger) no matter how many intents exist. Only the winning intent's slot
+    patterns are then run.
+    """
+
+    def __init__(self, intents=INTENTS):
+        self.intents = list(intents)
+        self._patterns = [[re.compile(p, re.IGNORECASE) for p in intent.patterns] for intent in self.intents]
+        self._trie = {}
+        for priority, intent in enumerate(self.intents):
+            for trigger in intent.triggers:
+                node = self._trie
+                for token in trigger.split():
+                    node = node.setdefault(token, {})
+                node['$'] = min(priority, node.get('$', priority))
+
+    def _find_trigger(self, tokens):
+        # (priority, end offset of the trigger) of the highest-priority trigger, leftmost on ties
+        best = None
+        for start in range(len(tokens)):
+            node = self._trie
+            for token in tokens[start:]:
+                node = node.get(token.group())
+                if node is None:
+                    break
+                if '$' in node and (best is None or node['$'] < best[0]):
+                    best = (node['$'], token.end())
+        return best
+
+    def match(self, text):
+        """Return a Match for the transcript, or None when no trigger phrase occurs in it.
+
+        Match.prompt is the intent's follow-up question when a slot it needs is missing.
+        """
+        text = ' '.join(text.split())
+        lowered = text.lower()
+        found = self._find_trigger(list(TOKEN_RE.finditer(lowered)))
+        if found is None:
+            return None
+        priority, trigger_end = found
+        intent = self.intents[priority]
+
+        slots = {}
+        if self._patterns[priority]:
+            for pattern in self._patterns[priority]:
+                slot_match = pattern.search(text)
+                if slot_match:
+                    slots = {k: v.strip(' .,?!') for k, v in slot_match.groupdict().items() if v and v.strip(' .,?!')}
+                    break
+        elif intent.prompt:
+            # lower() can change the length of a few non-ASCII strings; offsets only line up otherwise
+            remainder = (text if len(text) == len(lowered) else lowered)[trigger_end:]
+            for pattern, replacement in REMAINDER_CLEANUP.get(intent.name, ()):
+                remainder = pattern.sub(replacement, remainder)
+            remainder = remainder.strip(' .,?!')
+            reject = REMAINDER_REJECT.get(intent.name)
+            if remainder and not (reject and reject.search(remainder)):
+                slots['query'] = remainder
+
+        prompt = intent.prompt if intent.prompt and not slots else None
+        return Match(intent.name, slots, prompt)
+
+matcher = IntentMatcher()
+
+SAMPLE_COMMANDS = [
+    "hello there", "what time is it", "add a todo buy milk and eggs", "show my todo list",
+    "complete todo 2", "what is the weather in new york city", "tell me the news about the economy",
+    "who is ada lovelace", "define serendipity", "search youtube for lofi beats", "play some jazz",
+    "send an email to bob@example.com with subject lunch and message see you at noon",
+    "find coffee shops near me", "open website example dot com", "this matches nothing at all",
+]
+
+def benchmark(rounds=20000):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for command in SAMPLE_COMMANDS:
+            matcher.match(command)
+    elapsed = time.perf_counter() - started
+    per_command = elapsed / (rounds * len(SAMPLE_COMMANDS)) * 1e6
+    print(f"{rounds * len(SAMPLE_COMMANDS)} matches over {len(matcher.intents)} intents: {per_command:.1f} us per command")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the voice command matcher")
+    parser.add_argument('--rounds', type=int, default=20000)
+    benchmark(parser.parse_args().rounds)
+
+if __name__ == '__main__':
+    main()
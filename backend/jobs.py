@@ -0,0 +1,283 @@
+import os
+import re
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from backend import db, metrics
+from backend.config import (
+    logger, YTDLP_COMMAND, YTDLP_CONCURRENCY, YTDLP_TIMEOUT, DOWNLOAD_DIR, DOWNLOAD_FORMAT,
+    DOWNLOAD_MAX_BYTES, DOWNLOAD_MAX_AGE_DAYS
+)
+
+PROGRESS_RE = re.compile(r'\[download\]\s+(\d+(?:\.\d+)?)%')
+VIDEO_ID_RE = re.compile(r'(?:youtube\.com/watch\?(?:.*&)?v=|youtu\.be/)([A-Za-z0-9_-]+)')
+PROGRESS_WRITE_INTERVAL = 0.5
+
+def _utcnow():
+    return datetime.utcnow().isoformat() + 'Z'
+
+def extract_video_id(url):
+    match = VIDEO_ID_RE.search(url)
+    return match.group(1) if match else None
+
+def init_db():
+    with db.get_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS download_jobs (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                filename TEXT,
+                error TEXT,
+                owner TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        columns = {row["name"] for row in conn.execute('PRAGMA table_info(download_jobs)')}
+        if 'video_id' not in columns:
+            conn.execute('ALTER TABLE download_jobs ADD COLUMN video_id TEXT')
+            conn.execute('ALTER TABLE download_jobs ADD COLUMN format TEXT')
+        if 'lease_expires_at' not in columns:
+            conn.execute('ALTER TABLE download_jobs ADD COLUMN lease_expires_at REAL')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_download_jobs_status ON download_jobs (status)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_download_jobs_video ON download_jobs (video_id, format, status)')
+        # One finished file per (video, format); last_accessed drives LRU eviction
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS download_index (
+                video_id TEXT NOT NULL,
+                format TEXT NOT NULL,
+                filename TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                last_accessed REAL NOT NULL,
+                PRIMARY KEY (video_id, format)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_download_index_accessed ON download_index (last_accessed)')
+
+def _row_to_job(row):
+    return {
+        "job_id": row["id"],
+        "url": row["url"],
+        "status": row["status"],
+        "progress": row["progress"],
+        "filename": row["filename"],
+        "download_link": f"/downloads/{row['filename']}" if row["status"] == 'completed' else None,
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"]
+    }
+
+class DownloadJobManager:
+    def __init__(self, max_workers=YTDLP_CONCURRENCY):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='yt-dlp')
+
+    def submit(self, url, download_format=DOWNLOAD_FORMAT):
+        # A video already on disk is returned as a completed job, and a request for a
+        # video that is already queued or running joins that job instead of starting another.
+        video_id = extract_video_id(url)
+        job_id = uuid.uuid4().hex
+        now = _utcnow()
+        with db.get_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if video_id:
+                cached = conn.execute(
+                    'SELECT filename FROM download_index WHERE video_id = ? AND format = ?', (video_id, download_format)
+                ).fetchone()
+                if cached and os.path.exists(os.path.join(DOWNLOAD_DIR, cached["filename"])):
+                    conn.execute('UPDATE download_index SET last_accessed = ? WHERE filename = ?',
+                                 (time.time(), cached["filename"]))
+                    conn.execute(
+                        'INSERT INTO download_jobs (id, url, status, progress, filename, video_id, format, created_at, updated_at) '
+                        "VALUES (?, ?, 'completed', 100, ?, ?, ?, ?, ?)",
+                        (job_id, url, cached["filename"], video_id, download_format, now, now)
+                    )
+                    return self._publish(conn, job_id)
+                if cached:
+                    conn.execute('DELETE FROM download_index WHERE filename = ?', (cached["filename"],))
+
+                active = conn.execute(
+                    "SELECT id FROM download_jobs WHERE video_id = ? AND format = ? AND status IN ('queued', 'running') "
+                    'ORDER BY created_at LIMIT 1', (video_id, download_format)
+                ).fetchone()
+                if active:
+                    return self._get(conn, active["id"])
+
+            conn.execute(
+                'INSERT INTO download_jobs (id, url, status, progress, video_id, format, created_at, updated_at) '
+                "VALUES (?, ?, 'queued', 0, ?, ?, ?, ?)",
+                (job_id, url, video_id, download_format, now, now)
+            )
+            job = self._publish(conn, job_id)
+        self._executor.submit(self._run, job_id)
+        return job
+
+    def _get(self, conn, job_id):
+        row = conn.execute('SELECT * FROM download_jobs WHERE id = ?', (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def _publish(self, conn, job_id):
+        # Every state or progress change is pushed to /events subscribers watching the job
+        job = self._get(conn, job_id)
+        if job is not None:
+            db.append_event(conn, 'downloads', job, key=job_id)
+        return job
+
+    def get(self, job_id):
+        with db.get_connection() as conn:
+            return self._get(conn, job_id)
+
+    def resume_pending(self):
+        # Jobs survive restarts: re-queue running jobs whose lease has expired (their owner
+        # stopped renewing it), then schedule everything queued. _claim() makes sure only
+        # one worker runs each job.
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE download_jobs SET status = 'queued', owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at <= ?)",
+                (_utcnow(), time.time())
+            )
+            queued = conn.execute("SELECT id FROM download_jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        for row in queued:
+            self._executor.submit(self._run, row["id"])
+        return len(queued)
+
+    def _claim(self, job_id):
+        with db.get_connection() as conn:
+            cursor = conn.execute(
+                "UPDATE download_jobs SET status = 'running', owner = ?, lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (db.owner_id(), db.lease_expiry(), _utcnow(), job_id)
+            )
+            if cursor.rowcount == 0:
+                return None
+            self._publish(conn, job_id)
+            return conn.execute('SELECT url, video_id, format FROM download_jobs WHERE id = ?', (job_id,)).fetchone()
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = _utcnow()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with db.get_connection() as conn:
+            conn.execute(f'UPDATE download_jobs SET {assignments} WHERE id = ?', list(fields.values()) + [job_id])
+            self._publish(conn, job_id)
+
+    def _run(self, job_id):
+        job = self._claim(job_id)
+        if job is None:
+            return
+        try:
+            filename = f"{job_id}.mp4"
+            output_path = os.path.join(DOWNLOAD_DIR, filename)
+            download_format = job["format"] or DOWNLOAD_FORMAT
+            with metrics.time_upstream('yt-dlp'), db.keep_lease('download_jobs', job_id):
+                self._download(job_id, job["url"], output_path, download_format)
+            with db.get_connection() as conn:
+                conn.execute(
+                    "UPDATE download_jobs SET status = 'completed', progress = 100, filename = ?, error = NULL, "
+                    'updated_at = ? WHERE id = ?', (filename, _utcnow(), job_id)
+                )
+                if job["video_id"]:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO download_index (video_id, format, filename, size, created_at, last_accessed) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (job["video_id"], download_format, filename, os.path.getsize(output_path), _utcnow(), time.time())
+                    )
+                self._publish(conn, job_id)
+            logger.info(f"Download job {job_id} completed")
+        except Exception as e:
+            logger.info(f"Download job {job_id} failed: {e}")
+            self._update(job_id, status='failed', error=str(e))
+            return
+        enforce_storage_limits(keep=filename)
+
+    def _download(self, job_id, url, output_path, download_format):
+        command = YTDLP_COMMAND + [
+            "--newline",
+            "-f", download_format,
+            "--merge-output-format", "mp4",
+            "-o", output_path,
+            url
+        ]
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        except FileNotFoundError:
+            raise RuntimeError("yt-dlp not found. Please ensure it's installed and in your system's PATH.")
+
+        timed_out = threading.Event()
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(YTDLP_TIMEOUT, kill)
+        timer.start()
+        tail = deque(maxlen=20)
+        last_write = 0
+        try:
+            for line in process.stdout:
+                tail.append(line.rstrip())
+                match = PROGRESS_RE.search(line)
+                now = time.monotonic()
+                if match and now - last_write >= PROGRESS_WRITE_INTERVAL:
+                    self._update(job_id, progress=float(match.group(1)))
+                    last_write = now
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+
+        if returncode != 0:
+            if timed_out.is_set():
+                raise RuntimeError(f"yt-dlp timed out after {YTDLP_TIMEOUT} seconds")
+            raise RuntimeError(f"yt-dlp exited with status {returncode}: {' '.join(tail)[-500:]}")
+
+def touch_download(filename):
+    with db.get_connection() as conn:
+        conn.execute('UPDATE download_index SET last_accessed = ? WHERE filename = ?', (time.time(), filename))
+
+def _evict(conn, filename):
+    try:
+        os.remove(os.path.join(DOWNLOAD_DIR, filename))
+    except FileNotFoundError:
+        pass
+    conn.execute('DELETE FROM download_index WHERE filename = ?', (filename,))
+    conn.execute("UPDATE download_jobs SET status = 'expired', updated_at = ? WHERE filename = ? AND status = 'completed'",
+                 (_utcnow(), filename))
+
+def enforce_storage_limits(max_bytes=DOWNLOAD_MAX_BYTES, max_age_days=DOWNLOAD_MAX_AGE_DAYS, keep=None):
+    # Drop files idle for longer than max_age_days, then least recently used files until
+    # the directory fits in max_bytes. Returns the evicted filenames.
+    cutoff = time.time() - max_age_days * 86400
+    evicted = []
+    with db.get_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        rows = conn.execute('SELECT filename, size, last_accessed FROM download_index ORDER BY last_accessed ASC').fetchall()
+        total = sum(row["size"] for row in rows)
+        for row in rows:
+            if row["filename"] == keep:
+                continue
+            if row["last_accessed"] >= cutoff and total <= max_bytes:
+                break
+            _evict(conn, row["filename"])
+            total -= row["size"]
+            evicted.append(row["filename"])
+
+        # Files the index does not know about (older downloads, leftovers of failed jobs)
+        indexed = {row["filename"] for row in rows}
+        active = {f"{row['id']}.mp4" for row in conn.execute(
+            "SELECT id FROM download_jobs WHERE status IN ('queued', 'running')"
+        )}
+        for entry in os.scandir(DOWNLOAD_DIR):
+            name = entry.name.split('.', 1)[0] + '.mp4'
+            if entry.is_file() and entry.name not in indexed and name not in active and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                evicted.append(entry.name)
+    if evicted:
+        logger.info(f"Evicted {len(evicted)} downloaded files to stay within storage limits")
+    return evicted
+
+download_jobs = DownloadJobManager()
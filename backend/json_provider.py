@@ -0,0 +1,52 @@
+"""orjson-backed JSON for jsonify() and request.get_json().
+
+orjson serializes the payloads these routes build several times faster than the
+standard library and writes UTF-8 bytes directly. Output differs from Flask's
+provider only in leaving non-ASCII text unescaped. Anything orjson cannot encode
+(datetimes, big integers, custom types) goes through Flask's provider, so both
+produce the same values. Without orjson installed, or with JSON_PROVIDER=default,
+Flask's provider is kept.
+"""
+from flask.json.provider import DefaultJSONProvider
+from backend.config import logger, JSON_PROVIDER
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to Flask's provider
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _encode(self, obj, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits; json raises TypeError itself for what neither can encode
+            return super().dumps(obj, indent=2 if indent else None).encode()
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._encode(obj, indent) + b"\n", mimetype=self.mimetype)
+
+def init_app(app):
+    if JSON_PROVIDER == 'default':
+        return
+    if orjson is None:
+        logger.info("orjson is not installed; using Flask's JSON provider")
+        return
+    app.json = OrjsonProvider(app)
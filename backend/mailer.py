@@ -0,0 +1,270 @@
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from backend import db, metrics
+from backend.config import (
+    logger, SENDER_EMAIL, SENDER_PASSWORD, SMTP_SERVER, SMTP_PORT, SMTP_STARTTLS, SMTP_TIMEOUT,
+    SMTP_IDLE_TIMEOUT, SMTP_MAX_ATTEMPTS, SMTP_RETRY_BACKOFF
+)
+
+def _utcnow():
+    return datetime.utcnow().isoformat() + 'Z'
+
+def init_db():
+    with db.get_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id TEXT PRIMARY KEY,
+                recipient TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                error TEXT,
+                owner TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                sent_at TEXT
+            )
+        ''')
+        columns = {row["name"] for row in conn.execute('PRAGMA table_info(email_outbox)')}
+        if 'lease_expires_at' not in columns:
+            conn.execute('ALTER TABLE email_outbox ADD COLUMN lease_expires_at REAL')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at)')
+
+def _row_to_message(row):
+    return {
+        "message_id": row["id"],
+        "recipient_email": row["recipient"],
+        "subject": row["subject"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "sent_at": row["sent_at"]
+    }
+
+def _publish(conn, message_id):
+    # Status changes are pushed to /events subscribers of the emails topic
+    row = conn.execute('SELECT * FROM email_outbox WHERE id = ?', (message_id,)).fetchone()
+    message = _row_to_message(row)
+    db.append_event(conn, 'emails', message, key=message_id)
+    return message
+
+def is_transient(error):
+    # 4xx replies, dropped connections and socket errors are worth retrying;
+    # 5xx replies (bad credentials, rejected recipients) are not
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+class SMTPSession:
+    """One authenticated SMTP connection shared by consecutive messages.
+
+    The connection is opened on first use, closed after idle_timeout seconds
+    without traffic (servers drop idle clients anyway), and reopened once if the
+    server turns out to have hung up between messages.
+    """
+
+    def __init__(self, host=None, port=None, username=None, password=None, starttls=None,
+                 timeout=SMTP_TIMEOUT, idle_timeout=SMTP_IDLE_TIMEOUT):
+        self.host = host or SMTP_SERVER
+        self.port = port or SMTP_PORT
+        self.username = SENDER_EMAIL if username is None else username
+        self.password = SENDER_PASSWORD if password is None else password
+        self.starttls = SMTP_STARTTLS if starttls is None else starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.connections = 0
+        self._server = None
+        self._last_used = 0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except BaseException:
+            server.close()
+            raise
+        self._server = server
+        self.connections += 1
+
+    def send(self, message):
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        reused = self._server is not None
+        with metrics.time_upstream('smtp'):
+            if not reused:
+                self._connect()
+            try:
+                self._server.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                if not reused:
+                    raise
+                self._connect()
+                self._server.send_message(message)
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+def build_message(sender, recipient, subject, body):
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+class MailQueue:
+    """SQLite-backed outbox drained by one sender thread per process.
+
+    Messages are claimed with a conditional UPDATE, so several processes can
+    drain the same outbox without sending anything twice.
+    """
+
+    def __init__(self, session_factory=SMTPSession, max_attempts=SMTP_MAX_ATTEMPTS, retry_backoff=SMTP_RETRY_BACKOFF):
+        self._session_factory = session_factory
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, recipient, subject, body):
+        message_id = uuid.uuid4().hex
+        now = _utcnow()
+        with db.get_connection() as conn:
+            conn.execute(
+                'INSERT INTO email_outbox (id, recipient, subject, body, status, next_attempt_at, created_at, updated_at) '
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (message_id, recipient, subject, body, time.time(), now, now)
+            )
+            message = _publish(conn, message_id)
+        self._start()
+        return message
+
+    def get(self, message_id):
+        with db.get_connection() as conn:
+            row = conn.execute('SELECT * FROM email_outbox WHERE id = ?', (message_id,)).fetchone()
+        return _row_to_message(row) if row else None
+
+    def resume_pending(self):
+        # Messages whose sender let the lease expire (it died) go back to the queue; one
+        # resend after a crash mid-DATA is preferable to silently dropping the message
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE email_outbox SET status = 'queued', owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = 'sending' AND (lease_expires_at IS NULL OR lease_expires_at <= ?)",
+                (_utcnow(), time.time())
+            )
+            pending = conn.execute("SELECT COUNT(*) FROM email_outbox WHERE status = 'queued'").fetchone()[0]
+        if pending:
+            self._start()
+        return pending
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _start(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='mail-sender', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _claim_next(self):
+        with db.get_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT * FROM email_outbox WHERE status = 'queued' AND next_attempt_at <= ? "
+                'ORDER BY next_attempt_at LIMIT 1', (time.time(),)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE email_outbox SET status = 'sending', owner = ?, lease_expires_at = ?, attempts = attempts + 1, "
+                'updated_at = ? WHERE id = ?',
+                (db.owner_id(), db.lease_expiry(), _utcnow(), row["id"])
+            )
+            _publish(conn, row["id"])
+            return row
+
+    def _next_due(self):
+        with db.get_connection() as conn:
+            return conn.execute("SELECT MIN(next_attempt_at) FROM email_outbox WHERE status = 'queued'").fetchone()[0]
+
+    def _deliver(self, session, row):
+        attempts = row["attempts"] + 1
+        try:
+            session.send(build_message(session.username or SENDER_EMAIL, row["recipient"], row["subject"], row["body"]))
+        except Exception as e:
+            if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                session.close()
+            retry = is_transient(e) and attempts < self.max_attempts
+            logger.info(f"Email {row['id']} attempt {attempts} failed ({'retrying' if retry else 'giving up'}): {e}")
+            with db.get_connection() as conn:
+                conn.execute(
+                    'UPDATE email_outbox SET status = ?, error = ?, next_attempt_at = ?, owner = NULL, updated_at = ? WHERE id = ?',
+                    ('queued' if retry else 'failed', str(e),
+                     time.time() + self.retry_backoff * 2 ** (attempts - 1), _utcnow(), row["id"])
+                )
+                _publish(conn, row["id"])
+            return
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE email_outbox SET status = 'sent', error = NULL, owner = NULL, sent_at = ?, updated_at = ? WHERE id = ?",
+                (_utcnow(), _utcnow(), row["id"])
+            )
+            _publish(conn, row["id"])
+        logger.info(f"Email {row['id']} sent to {row['recipient']}")
+
+    def _run(self):
+        session = self._session_factory()
+        try:
+            while not self._stopping:
+                self._wake.clear()
+                try:
+                    row = self._claim_next()
+                    if row is not None:
+                        with db.keep_lease('email_outbox', row["id"]):
+                            self._deliver(session, row)
+                        continue
+                    session.close_if_idle()
+                    next_due = self._next_due()
+                except Exception as e:
+                    logger.info(f"Mail sender error: {e}")
+                    next_due = None
+                wait = session.idle_timeout if next_due is None else max(next_due - time.time(), 0)
+                self._wake.wait(min(wait, session.idle_timeout))
+        finally:
+            session.close()
+
+mail_queue = MailQueue()
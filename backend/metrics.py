@@ -0,0 +1,296 @@
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request
+from backend.config import logger, METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+# Seconds; spans a cached SQLite read (sub-millisecond) up to a slow yt-dlp run
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 120)
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = registry.lock
+        self._values = {}
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value if not isinstance(value, list) else list(value)] for key, value in self._values.items()]
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        # For totals kept elsewhere (cache hit counters) and copied in at collection time
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        # Stored as [non-cumulative bucket counts..., +Inf count, sum]
+        key = self._key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+class Registry:
+    """Process-local metrics rendered in the Prometheus text format.
+
+    Under gunicorn each worker has its own registry. With METRICS_DIR set, every
+    worker writes a snapshot there every METRICS_FLUSH_INTERVAL seconds and
+    /metrics merges them, so a scrape that lands on any worker sees the whole
+    server. Gauges of workers that have exited are dropped; their counters and
+    histograms are kept, as counters must never go down.
+    """
+
+    def __init__(self, directory=None, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._flusher = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def add_collector(self, collect):
+        # collect() is called before each snapshot to copy in values kept elsewhere
+        self.collectors.append(collect)
+
+    def counter(self, name, documentation, labelnames=()):
+        return Counter(self, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return Gauge(self, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return Histogram(self, name, documentation, labelnames, buckets)
+
+    def snapshot(self):
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                logger.info(f"Metrics collector failed: {e}")
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f"metrics_{pid}.json")
+
+    def flush(self):
+        path = self._snapshot_path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def start_flusher(self):
+        if not self.directory or (self._flusher is not None and self._flusher.is_alive()):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.info(f"Could not write metrics snapshot: {e}")
+        self._flusher = threading.Thread(target=run, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _merged_samples(self):
+        own = self.snapshot()
+        if not self.directory:
+            return own
+        merged = {name: {tuple(key): value for key, value in samples} for name, samples in own.items()}
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            pid = os.path.basename(path)[len('metrics_'):-len('.json')]
+            if pid == str(os.getpid()):
+                continue
+            try:
+                with open(path) as f:
+                    other = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(pid)
+            for name, samples in other.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.kind == 'gauge' and not alive):
+                    continue
+                target = merged.setdefault(name, {})
+                for key, value in samples:
+                    key = tuple(key)
+                    current = target.get(key)
+                    if current is None:
+                        target[key] = value
+                    elif isinstance(value, list):
+                        target[key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        target[key] = current + value
+        return {name: [[list(key), value] for key, value in samples.items()] for name, samples in merged.items()}
+
+    def render(self):
+        lines = []
+        for name, samples in sorted(self._merged_samples().items()):
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(samples):
+                if metric.kind != 'histogram':
+                    lines.append(f"{name}{_format_labels(metric.labelnames, key)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value[:-1]):
+                    cumulative += count
+                    labels = _format_labels(metric.labelnames, key, [('le', _format_value(bound))])
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _format_labels(metric.labelnames, key)
+                lines.append(f"{name}_sum{labels} {_format_value(value[-1])}")
+                lines.append(f"{name}_count{labels} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+def _pid_alive(pid):
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+registry = Registry(METRICS_DIR)
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests handled, by route template, method and status code',
+    ('route', 'method', 'status'))
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time from request start to response, by route template and method',
+    ('route', 'method'))
+http_requests_in_flight = registry.gauge('http_requests_in_flight', 'Requests currently being handled')
+upstream_duration = registry.histogram(
+    'upstream_request_duration_seconds',
+    'Calls to external services (HTTP APIs, SMTP, yt-dlp), by service and outcome',
+    ('upstream', 'outcome'))
+upstream_rejections = registry.counter(
+    'upstream_rejections_total', 'Upstream calls refused without a network request, by service and reason',
+    ('upstream', 'reason'))
+upstream_circuit_state = registry.gauge(
+    'upstream_circuit_state', 'Circuit breaker state per service: 0 closed, 1 half-open, 2 open', ('upstream',))
+upstream_read_timeout = registry.gauge(
+    'upstream_read_timeout_seconds', 'Read timeout currently applied per service, adapted to observed latency',
+    ('upstream',))
+upstream_quota_remaining = registry.gauge(
+    'upstream_quota_remaining', 'Quota units left in each metered API key budget, as last read by this process',
+    ('upstream',))
+compressed_bytes = registry.counter(
+    'response_compression_saved_bytes_total', 'Bytes kept off the wire by compressing responses, by encoding',
+    ('encoding',))
+sqlite_transaction_duration = registry.histogram(
+    'sqlite_transaction_duration_seconds', 'Time a pooled SQLite connection is held, including the commit')
+cache_events = registry.counter(
+    'cache_events_total', 'Cache lookups by cache and result (hit, miss, stale_hit, stale_if_error, quota_stale, coalesced)',
+    ('cache', 'result'))
+
+event_subscribers = registry.gauge('event_subscribers', 'Clients connected to the /events stream')
+event_overflows = registry.counter(
+    'event_overflows_total', 'Event stream subscribers disconnected for falling EVENTS_BUFFER_SIZE events behind')
+
+class _UpstreamCall:
+    outcome = 'ok'
+
+@contextmanager
+def time_upstream(upstream):
+    """Time a call to an external service.
+
+    The outcome label is 'ok', whatever the caller sets on the yielded object
+    (an HTTP status code), or the exception class name if the call raises.
+    """
+    call = _UpstreamCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        call.outcome = type(e).__name__
+        raise
+    finally:
+        upstream_duration.observe(time.perf_counter() - started, upstream=upstream, outcome=call.outcome)
+
+def init_app(app):
+    # Routes are labelled by their URL rule ('/api/todos/<todo_id>'), never the raw path,
+    # so the number of series stays bounded
+    # Called before limiter.init_app so rejected (429) requests are counted too
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_in_flight = True
+        http_requests_in_flight.inc()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            http_request_duration.observe(time.perf_counter() - started, route=route, method=request.method)
+            http_requests.inc(route=route, method=request.method, status=response.status_code)
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        if g.pop('metrics_in_flight', False):
+            http_requests_in_flight.dec()
+
+    registry.start_flusher()
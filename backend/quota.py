@@ -0,0 +1,293 @@
+"""Upstream API budgets and per-client rate-limit counters shared by every worker process.
+
+Both live in a SQLite file of their own (QUOTA_DB_PATH), so gunicorn workers draw
+from one budget and enforce one "60 per minute" instead of one each, without their
+per-request writes contending with the todo database for its write lock.
+
+Each metered provider (UPSTREAM_DAILY_QUOTAS) has a token bucket named after a hash
+of its API key, so a new key starts with a fresh budget. http_client.get() spends
+from it before every call. A low bucket (is_low) makes the response cache serve
+stale entries instead of calling the provider; an empty one rejects the call
+before the provider starts answering 429.
+"""
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import count
+from limits.storage import Storage
+from backend import metrics
+from backend.config import (
+    logger, OPENWEATHER_API_KEY, NEWS_API_KEY, YOUTUBE_API_KEY, GOOGLE_MAPS_API_KEY, UPSTREAM_DAILY_QUOTAS,
+    UPSTREAM_CALL_COSTS, QUOTA_BURST_FRACTION, QUOTA_LOW_FRACTION, QUOTA_DB_PATH, QUOTA_BUSY_TIMEOUT,
+    QUOTA_POOL_SIZE
+)
+
+API_KEYS = {'weather': OPENWEATHER_API_KEY, 'news': NEWS_API_KEY, 'youtube': YOUTUBE_API_KEY,
+            'maps': GOOGLE_MAPS_API_KEY}
+DAY = 24 * 3600
+# is_low() runs on every cache lookup, so each process rereads a bucket at most this often (seconds)
+LEVEL_CACHE_SECONDS = 1.0
+
+# capacity and cost are quota units, rate is units per second
+Budget = namedtuple('Budget', ['bucket', 'daily', 'capacity', 'rate', 'cost'])
+
+DB_PATH = QUOTA_DB_PATH
+
+_pool = queue.LifoQueue(maxsize=QUOTA_POOL_SIZE)
+
+def _connect():
+    # The tables are created here rather than by backend.schema: this file holds only
+    # counters, so it can be deleted or put on a tmpfs and comes back empty
+    conn = sqlite3.connect(DB_PATH, timeout=QUOTA_BUSY_TIMEOUT, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS quota_buckets (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT PRIMARY KEY,
+            hits INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.commit()
+    return conn
+
+@contextmanager
+def get_connection():
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def close_connections():
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+def build_budgets(quotas=UPSTREAM_DAILY_QUOTAS, costs=UPSTREAM_CALL_COSTS, burst_fraction=QUOTA_BURST_FRACTION):
+    budgets = {}
+    for provider, daily in quotas.items():
+        if daily <= 0:
+            continue
+        key_hash = hashlib.sha256((API_KEYS.get(provider) or '').encode()).hexdigest()[:12]
+        cost = costs.get(provider, 1)
+        budgets[provider] = Budget(f"{provider}:{key_hash}", daily, max(daily * burst_fraction, cost), daily / DAY, cost)
+    return budgets
+
+budgets = build_budgets()
+
+_levels = {}  # provider -> (tokens, time.monotonic() when read)
+_levels_lock = threading.Lock()
+
+def _refilled(budget, tokens, updated_at, now):
+    return min(budget.capacity, tokens + max(now - updated_at, 0) * budget.rate)
+
+def _remember(provider, tokens):
+    with _levels_lock:
+        _levels[provider] = (tokens, time.monotonic())
+
+def _params(budget, now):
+    return {'name': budget.bucket, 'capacity': budget.capacity, 'rate': budget.rate, 'cost': budget.cost, 'now': now}
+
+def spend(provider, now=None):
+    """Take one call's cost from the provider's bucket; False if it cannot cover it.
+
+    Unmetered providers always return True, and so does a database error: a
+    locked bucket should not take the feature down with it.
+    """
+    budget = budgets.get(provider)
+    if budget is None:
+        return True
+    now = time.time() if now is None else now
+    params = _params(budget, now)
+    try:
+        with get_connection() as conn:
+            # The first statement takes the write lock, so concurrent workers cannot both spend the last tokens
+            conn.execute(
+                'INSERT INTO quota_buckets (name, tokens, updated_at) VALUES (:name, :capacity, :now) '
+                'ON CONFLICT(name) DO NOTHING', params
+            )
+            row = conn.execute(
+                'UPDATE quota_buckets '
+                'SET tokens = MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate) - :cost, '
+                '    updated_at = MAX(:now, updated_at) '
+                'WHERE name = :name AND MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate) >= :cost '
+                'RETURNING tokens', params
+            ).fetchone()
+            if row is None:
+                bucket = conn.execute('SELECT tokens, updated_at FROM quota_buckets WHERE name = ?',
+                                      (budget.bucket,)).fetchone()
+    except sqlite3.Error as e:
+        logger.info(f"Could not check the {provider} quota: {e}")
+        return True
+    if row is not None:
+        _remember(provider, row["tokens"])
+        return True
+    _remember(provider, _refilled(budget, bucket["tokens"], bucket["updated_at"], now))
+    return False
+
+def refund(provider):
+    # For a spend that did not lead to a call, e.g. the circuit breaker refused it
+    budget = budgets.get(provider)
+    if budget is None:
+        return
+    try:
+        with get_connection() as conn:
+            conn.execute('UPDATE quota_buckets SET tokens = MIN(?, tokens + ?) WHERE name = ?',
+                         (budget.capacity, budget.cost, budget.bucket))
+    except sqlite3.Error as e:
+        logger.info(f"Could not refund the {provider} quota: {e}")
+    with _levels_lock:
+        _levels.pop(provider, None)
+
+def drain(provider, now=None):
+    # The provider answered 429: its own count says the key is spent, whatever the bucket thinks
+    budget = budgets.get(provider)
+    if budget is None:
+        return
+    now = time.time() if now is None else now
+    try:
+        with get_connection() as conn:
+            conn.execute(
+                'INSERT INTO quota_buckets (name, tokens, updated_at) VALUES (?, 0, ?) '
+                'ON CONFLICT(name) DO UPDATE SET tokens = 0, updated_at = excluded.updated_at', (budget.bucket, now)
+            )
+    except sqlite3.Error as e:
+        logger.info(f"Could not drain the {provider} quota: {e}")
+    _remember(provider, 0.0)
+    logger.info(f"{provider} answered 429; its budget is drained and refills at {budget.daily}/day")
+
+def remaining(provider, now=None):
+    # -> quota units available now, or None for an unmetered provider
+    budget = budgets.get(provider)
+    if budget is None:
+        return None
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        row = conn.execute('SELECT tokens, updated_at FROM quota_buckets WHERE name = ?', (budget.bucket,)).fetchone()
+    tokens = budget.capacity if row is None else _refilled(budget, row["tokens"], row["updated_at"], now)
+    _remember(provider, tokens)
+    return tokens
+
+def is_low(provider):
+    """True when the provider's bucket is under QUOTA_LOW_FRACTION full (read at most once a second)."""
+    budget = budgets.get(provider)
+    if budget is None:
+        return False
+    with _levels_lock:
+        level = _levels.get(provider)
+    if level is None or time.monotonic() - level[1] >= LEVEL_CACHE_SECONDS:
+        try:
+            tokens = remaining(provider)
+        except sqlite3.Error:
+            return False
+    else:
+        tokens = level[0]
+    return tokens < budget.capacity * QUOTA_LOW_FRACTION
+
+def reset():
+    with get_connection() as conn:
+        conn.execute('DELETE FROM quota_buckets')
+    with _levels_lock:
+        _levels.clear()
+
+def stats():
+    result = {}
+    for provider, budget in sorted(budgets.items()):
+        tokens = remaining(provider)
+        result[provider] = {
+            "daily_quota": budget.daily,
+            "capacity": budget.capacity,
+            "cost_per_call": budget.cost,
+            "remaining": round(tokens, 2),
+            "low": tokens < budget.capacity * QUOTA_LOW_FRACTION,
+        }
+    return result
+
+def _collect_metrics():
+    for provider in budgets:
+        with _levels_lock:
+            level = _levels.get(provider)
+        if level is not None:
+            metrics.upstream_quota_remaining.set(level[0], upstream=provider)
+
+metrics.registry.add_collector(_collect_metrics)
+
+class SQLiteStorage(Storage):
+    """flask-limiter storage for RATELIMIT_STORAGE_URI="sqlite://": fixed-window counters in QUOTA_DB_PATH."""
+    STORAGE_SCHEME = ['sqlite']
+    PRUNE_EVERY = 1000
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._calls = count(1)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        with get_connection() as conn:
+            if next(self._calls) % self.PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM rate_limits WHERE expires_at <= ?', (now,))
+            # A window that has ended starts over; SET expressions all see the old row
+            return conn.execute(
+                'INSERT INTO rate_limits (key, hits, expires_at) VALUES (:key, :amount, :expires) '
+                'ON CONFLICT(key) DO UPDATE SET '
+                '  hits = CASE WHEN expires_at <= :now THEN :amount ELSE hits + :amount END, '
+                '  expires_at = CASE WHEN expires_at <= :now OR :elastic THEN :expires ELSE expires_at END '
+                'RETURNING hits',
+                {'key': key, 'amount': amount, 'expires': now + expiry, 'now': now, 'elastic': bool(elastic_expiry)}
+            ).fetchone()[0]
+
+    def get(self, key):
+        with get_connection() as conn:
+            row = conn.execute('SELECT hits FROM rate_limits WHERE key = ? AND expires_at > ?',
+                               (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        with get_connection() as conn:
+            row = conn.execute('SELECT expires_at FROM rate_limits WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            with get_connection() as conn:
+                conn.execute('SELECT 1 FROM rate_limits LIMIT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with get_connection() as conn:
+            return conn.execute('DELETE FROM rate_limits').rowcount
+
+    def clear(self, key):
+        with get_connection() as conn:
+            conn.execute('DELETE FROM rate_limits WHERE key = ?', (key,))
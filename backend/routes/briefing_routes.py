@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import Blueprint, jsonify, request
+from backend import db
+from backend.cache import response_cache
+from backend.config import logger, BRIEFING_WORKERS, BRIEFING_TIMEOUT, BRIEFING_MAX_REQUESTS
+from backend.routes.dictionary_routes import fetch_definition
+from backend.routes.maps_routes import fetch_places
+from backend.routes.news_routes import fetch_news
+from backend.routes.todo_routes import _parse_completed
+from backend.routes.weather_routes import fetch_weather
+from backend.routes.wikipedia_routes import fetch_wikipedia_summary
+from backend.routes.youtube_routes import fetch_youtube_videos
+
+briefing_bp = Blueprint('briefing', __name__)
+
+_executor = ThreadPoolExecutor(max_workers=BRIEFING_WORKERS, thread_name_prefix='briefing')
+
+def _cached(endpoint, params, fetch):
+    payload, status, _ = response_cache.get_or_fetch(endpoint, params, fetch)
+    return payload, status
+
+def _todos(params):
+    # Same parsing as ?completed= on /api/todos; str() lets JSON booleans through too
+    completed = params.get('completed')
+    return db.get_all_todos(completed=_parse_completed(None if completed is None else str(completed))), 200
+
+# source -> (required params, handler); params mirror the query string of the matching GET endpoint
+SOURCES = {
+    'weather': (('city',), lambda p: _cached('weather', {'city': p['city']}, lambda: fetch_weather(p['city']))),
+    'news': ((), lambda p: _cached(
+        'news', {'query': p.get('query', ''), 'country': p.get('country', 'us')},
+        lambda: fetch_news(p.get('query', ''), p.get('country', 'us'))
+    )),
+    'wikipedia': (('query',), lambda p: _cached(
+        'wikipedia', {'query': p['query']}, lambda: fetch_wikipedia_summary(p['query'])
+    )),
+    'dictionary': (('word',), lambda p: _cached('dictionary', {'word': p['word']}, lambda: fetch_definition(p['word']))),
+    'youtube': (('query',), lambda p: _cached('youtube', {'query': p['query']}, lambda: fetch_youtube_videos(p['query']))),
+    'maps': (('query',), lambda p: _cached('maps', {'query': p['query']}, lambda: fetch_places(p['query']))),
+    'todos': ((), _todos),
+}
+
+def _timed(handler, params):
+    started = time.perf_counter()
+    try:
+        payload, status = handler(params)
+    except Exception as e:
+        logger.info(f"Briefing source failed: {e}")
+        payload, status = {"error": f"An unknown server error occurred: {e}"}, 500
+    return payload, status, time.perf_counter() - started
+
+def _parse(sub_requests):
+    # -> ([(source, params, timeout)], error)
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return None, "requests must be a non-empty list"
+    if len(sub_requests) > BRIEFING_MAX_REQUESTS:
+        return None, f"At most {BRIEFING_MAX_REQUESTS} requests per briefing"
+
+    parsed = []
+    for item in sub_requests:
+        if not isinstance(item, dict) or item.get('source') not in SOURCES:
+            return None, f"Each request needs a source, one of: {', '.join(SOURCES)}"
+        params = item.get('params') or {}
+        if not isinstance(params, dict):
+            return None, f"params of '{item['source']}' must be an object"
+        missing = [name for name in SOURCES[item['source']][0] if not params.get(name)]
+        if missing:
+            return None, f"'{item['source']}' requires {', '.join(missing)}"
+        try:
+            timeout = min(float(item.get('timeout', BRIEFING_TIMEOUT)), BRIEFING_TIMEOUT)
+        except (TypeError, ValueError):
+            return None, f"timeout of '{item['source']}' must be a number of seconds"
+        parsed.append((item['source'], params, max(timeout, 0)))
+    return parsed, None
+
+def run_briefing(sub_requests):
+    """Run sub-requests concurrently and collect what finishes within each one's deadline.
+
+    A source that misses its deadline is reported with status 504; its call keeps
+    running in the background and still fills the response cache for next time.
+    """
+    started = time.perf_counter()
+    futures = [
+        (source, timeout, _executor.submit(_timed, SOURCES[source][1], params))
+        for source, params, timeout in sub_requests
+    ]
+
+    results = []
+    for source, timeout, future in futures:
+        remaining = started + timeout - time.perf_counter()
+        try:
+            payload, status, elapsed = future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            results.append({
+                "source": source,
+                "status": 504,
+                "elapsed_ms": round(timeout * 1000, 1),
+                "error": f"{source} did not respond within {timeout:g} seconds"
+            })
+            continue
+        result = {"source": source, "status": status, "elapsed_ms": round(elapsed * 1000, 1)}
+        if status < 400:
+            result["data"] = payload
+        else:
+            result["error"] = payload.get("error")
+        results.append(result)
+
+    return {"results": results, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+@briefing_bp.route('/briefing', methods=['GET', 'POST'])
+def briefing():
+    # GET is the morning briefing: weather for ?city=, top news (optionally ?news_query=) and the
+    # to-do list. POST runs any {"requests": [{"source", "params", "timeout"?}]} list.
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Invalid JSON"}), 400
+        sub_requests = data.get('requests')
+    else:
+        sub_requests = [{"source": "news", "params": {"query": request.args.get('news_query', '')}},
+                        {"source": "todos"}]
+        city = request.args.get('city')
+        if city:
+            sub_requests.insert(0, {"source": "weather", "params": {"city": city}})
+
+    parsed, error = _parse(sub_requests)
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(run_briefing(parsed)), 200
@@ -0,0 +1,288 @@
+import threading
+import time
+from flask import Blueprint, jsonify, request
+from backend import db
+from backend.cache import response_cache
+from backend.config import logger
+from backend.extensions import limiter, ACTION_LIMIT
+from backend.intents import matcher
+from backend.routes.dictionary_routes import fetch_definition
+from backend.routes.email_routes import queue_email
+from backend.routes.maps_routes import fetch_places
+from backend.routes.news_routes import fetch_news
+from backend.routes.weather_routes import fetch_weather
+from backend.routes.wikipedia_routes import fetch_wikipedia_summary
+from backend.routes.youtube_routes import fetch_youtube_videos, queue_download
+from backend.utils.auth import has_valid_api_key
+
+command_bp = Blueprint('command', __name__)
+
+# Intents that need browser state (clock, speech voices, player, new tab); the server
+# only parses them and the client acts on the returned slots
+CLIENT_INTENTS = {'time', 'download_current_video', 'female_voice', 'male_voice', 'open_website'}
+PROTECTED_INTENTS = {'send_email', 'download_video'}
+
+# Read-only lookups worth starting before the user has finished speaking
+PREFETCH_INTENTS = {'weather', 'news', 'wikipedia', 'define'}
+# Shorter slots are most likely a word the recognizer has not finished ("what is the weather in Pa")
+PREFETCH_MIN_SLOT_LENGTH = 3
+# A slot that is a prefix of one prefetched this recently is the recognizer revising a word
+PREFETCH_RECENT_SECONDS = 10.0
+# Interim transcripts end mid-word until the recognizer moves on to the next one
+WORD_BOUNDARY_CHARS = ' \t\n.,?!'
+
+_recent_prefetches = {}  # intent -> (lowercased slot values, time.monotonic() when prefetched)
+_recent_lock = threading.Lock()
+
+MAX_COMMAND_LENGTH = 1000
+
+def _upstream(intent, slots):
+    # (cache endpoint, params, fetch) of intents answered by one cached upstream call; the
+    # same cache entries as the REST endpoints, so a spoken query warms the typed one and vice versa
+    if intent == 'weather':
+        city = slots['city']
+        return 'weather', {'city': city}, lambda: fetch_weather(city)
+    if intent == 'news':
+        query = slots.get('query', '')
+        return 'news', {'query': query, 'country': 'us'}, lambda: fetch_news(query, 'us')
+    if intent == 'wikipedia':
+        query = slots['query']
+        return 'wikipedia', {'query': query}, lambda: fetch_wikipedia_summary(query)
+    if intent == 'define':
+        word = slots['word']
+        return 'dictionary', {'word': word}, lambda: fetch_definition(word)
+    if intent in ('youtube_search', 'play'):
+        query = slots['query']
+        return 'youtube', {'query': query}, lambda: fetch_youtube_videos(query)
+    if intent == 'maps':
+        query = slots['query']
+        return 'maps', {'query': query}, lambda: fetch_places(query)
+    raise KeyError(intent)
+
+def _cached(intent, slots):
+    payload, status, _ = response_cache.get_or_fetch(*_upstream(intent, slots))
+    return payload, status
+
+def _todo_by_number(number):
+    # Todos are numbered as "show my todo list" reads them out: oldest first, from 1
+    todos = db.get_all_todos()
+    index = int(number) - 1
+    return todos[index] if 0 <= index < len(todos) else None
+
+def greeting(slots):
+    return "Hello there! How can I assist you?", None, 200
+
+def add_todo(slots):
+    todo = db.create_todo(slots['task'])
+    return f"Okay, I've added \"{todo['task']}\" to your to-do list.", todo, 201
+
+def list_todos(slots):
+    todos = db.get_all_todos()
+    if not todos:
+        return "You don't have any to-do items yet.", todos, 200
+    todo_list = ', '.join(f"{i}. {todo['task']}" for i, todo in enumerate(todos, start=1))
+    return f"Here are your to-do items: {todo_list}.", todos, 200
+
+def complete_todo(slots):
+    todo = _todo_by_number(slots['number'])
+    if todo is None or db.update_todo(todo['id'], completed=True) is None:
+        return "I couldn't find a to-do item with that number. Please specify a valid number.", None, 404
+    return f"Okay, I've marked \"{todo['task']}\" as complete.", {**todo, "completed": True}, 200
+
+def delete_todo(slots):
+    todo = _todo_by_number(slots['number'])
+    if todo is None or not db.delete_todo(todo['id']):
+        return "I couldn't find a to-do item with that number. Please specify a valid number.", None, 404
+    return f"I've removed \"{todo['task']}\" from your to-do list.", todo, 200
+
+def weather(slots):
+    city = slots['city']
+    payload, status = _cached('weather', slots)
+    if status != 200:
+        return f"Sorry, I couldn't get the weather for {city}.", payload, status
+    return (f"The weather in {payload['city']} is {payload['description']} with a temperature of "
+            f"{payload['temperature']} degrees Celsius."), payload, status
+
+def news(slots):
+    query = slots.get('query', '')
+    payload, status = _cached('news', slots)
+    articles = payload.get('articles') if status == 200 else None
+    if not articles:
+        return f"Sorry, I couldn't find any news{' about ' + query if query else ''}.", payload, status
+    return f"Here's the top news: \"{articles[0]['title']}\" and more.", payload, status
+
+def wikipedia(slots):
+    query = slots['query']
+    payload, status = _cached('wikipedia', slots)
+    if status != 200:
+        return f"Sorry, I couldn't find a Wikipedia page for \"{query}\".", payload, status
+    return payload['summary'], payload, status
+
+def define(slots):
+    word = slots['word']
+    payload, status = _cached('define', slots)
+    definitions = payload.get('definitions') if status == 200 else None
+    if not definitions:
+        return f"Sorry, I couldn't find a definition for \"{word}\".", payload, status
+    first = definitions[0]
+    word = payload.get('corrected_word') or payload['original_word']
+    return f"{word}, {first['part_of_speech']}: {first['meanings'][0]}", payload, status
+
+def youtube_search(slots, playing=False):
+    query = slots['query']
+    payload, status = _cached('youtube_search', slots)
+    videos = payload.get('videos') if status == 200 else None
+    if not videos:
+        return f"Sorry, I couldn't find any YouTube videos for \"{query}\".", payload, status
+    if playing:
+        return f"Now playing \"{videos[0]['title']}\".", payload, status
+    return f"I found \"{videos[0]['title']}\" and more videos on YouTube.", payload, status
+
+def play(slots):
+    return youtube_search(slots, playing=True)
+
+def send_email(slots):
+    payload, status = queue_email(slots['recipient'], slots['subject'], slots['body'])
+    if status >= 400:
+        return "Failed to send email.", payload, status
+    return f"Email queued successfully for {slots['recipient']}!", payload, status
+
+def download_video(slots):
+    payload, status = queue_download(slots['url'])
+    if status >= 400:
+        return "Sorry, video download failed.", payload, status
+    if payload['status'] == 'completed':
+        return "Video downloaded! You can now download it from the link below.", payload, status
+    return "Initiating download for video. This might take a moment.", payload, status
+
+def maps(slots):
+    query = slots['query']
+    payload, status = _cached('maps', slots)
+    results = payload.get('results') if status == 200 else None
+    if not results:
+        return f"Sorry, I couldn't find any map results for \"{query}\".", payload, status
+    return (f"I found {len(results)} results for \"{query}\". The top result is {results[0]['name']}."), payload, status
+
+HANDLERS = {
+    'greeting': greeting,
+    'add_todo': add_todo,
+    'list_todos': list_todos,
+    'complete_todo': complete_todo,
+    'delete_todo': delete_todo,
+    'weather': weather,
+    'news': news,
+    'wikipedia': wikipedia,
+    'define': define,
+    'youtube_search': youtube_search,
+    'play': play,
+    'send_email': send_email,
+    'download_video': download_video,
+    'maps': maps,
+}
+
+def run_command(text):
+    """Parse a transcript and carry it out in-process.
+
+    Returns ({"intent", "slots", "response", "data"}, status). "response" is the
+    sentence to show and speak; it is None for intents the client performs itself.
+    Failures also carry "error", like the other endpoints.
+    """
+    match = matcher.match(text)
+    if match is None:
+        return {
+            "intent": None,
+            "slots": {},
+            "response": f"I understand you said \"{text}\". I am still learning, but for now, "
+                        "I can tell time and manage your to-do list.",
+            "data": None
+        }, 200
+
+    result = {"intent": match.intent, "slots": match.slots, "response": match.prompt, "data": None}
+    if match.prompt or match.intent in CLIENT_INTENTS:
+        return result, 200
+    if match.intent in PROTECTED_INTENTS and not has_valid_api_key():
+        return {**result, "error": "Invalid or missing API key"}, 401
+
+    try:
+        result["response"], result["data"], status = HANDLERS[match.intent](match.slots)
+    except Exception as e:
+        logger.info(f"Error running '{match.intent}' command: {e}")
+        return {**result, "error": f"An unknown server error occurred: {e}"}, 500
+    if status >= 400:
+        result["error"] = (result["data"] or {}).get("error", result["response"])
+    return result, status
+
+def _limited_intent():
+    # The protected intent a /command request would run, or None; it counts against the
+    # same ACTION_LIMIT as the endpoint that performs the action directly
+    data = request.get_json(silent=True)
+    text = data.get('text') if isinstance(data, dict) else None
+    if not isinstance(text, str) or len(text) > MAX_COMMAND_LENGTH:
+        return None
+    match = matcher.match(text.strip())
+    if match is None or match.prompt or match.intent not in PROTECTED_INTENTS:
+        return None
+    return match.intent
+
+@command_bp.route('/command', methods=['POST'])
+@limiter.shared_limit(ACTION_LIMIT, scope=lambda endpoint: _limited_intent() or endpoint,
+                      exempt_when=lambda: _limited_intent() is None, override_defaults=False)
+def command():
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
+
+    text = data.get('text')
+    if not isinstance(text, str) or not text.strip():
+        return jsonify({"error": "text is required"}), 400
+    if len(text) > MAX_COMMAND_LENGTH:
+        return jsonify({"error": f"text must be at most {MAX_COMMAND_LENGTH} characters"}), 400
+
+    payload, status = run_command(text.strip())
+    return jsonify(payload), status
+
+def _revises_recent(intent, values, now):
+    # True when each slot value is a prefix of the one last prefetched for the intent ("Pari" after "Paris")
+    with _recent_lock:
+        recent = _recent_prefetches.get(intent)
+        if recent is not None and now - recent[1] < PREFETCH_RECENT_SECONDS and \
+           all(old.startswith(new) for old, new in zip(recent[0], values)):
+            return True
+        _recent_prefetches[intent] = (values, now)
+        return False
+
+def prefetch(text):
+    """Warm the response cache for a partial transcript; returns the body of /prefetch.
+
+    A slot is only looked up once the transcript has moved past its last word, so
+    "Par", "Pari" and "Paris" do not each cost an upstream call.
+    """
+    match = matcher.match(text)
+    if match is None:
+        return {"intent": None, "prefetching": False}
+    if match.intent not in PREFETCH_INTENTS or match.prompt or not text or text[-1] not in WORD_BOUNDARY_CHARS or \
+       any(len(value) < PREFETCH_MIN_SLOT_LENGTH for value in match.slots.values()):
+        return {"intent": match.intent, "prefetching": False}
+    values = tuple(value.lower() for _, value in sorted(match.slots.items()))
+    if _revises_recent(match.intent, values, time.monotonic()):
+        return {"intent": match.intent, "slots": match.slots, "prefetching": False}
+    started = response_cache.prefetch(*_upstream(match.intent, match.slots))
+    return {"intent": match.intent, "slots": match.slots, "prefetching": started}
+
+@command_bp.route('/prefetch', methods=['POST'])
+@limiter.limit("300 per minute")
+def prefetch_command():
+    # Interim transcripts arrive several times a second while the user speaks;
+    # repeats of an entry that is cached or already being fetched are no-ops
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
+
+    text = data.get('text')
+    if not isinstance(text, str) or not text.strip():
+        return jsonify({"error": "text is required"}), 400
+    if len(text) > MAX_COMMAND_LENGTH:
+        return jsonify({"error": f"text must be at most {MAX_COMMAND_LENGTH} characters"}), 400
+
+    # Not stripped: trailing whitespace is how an interim transcript says its last word is complete
+    return jsonify(prefetch(text)), 202
@@ -1,19 +1,18 @@
 from flask import Blueprint, jsonify, request
 import requests
-from spellchecker import SpellChecker
-from backend.config import logger
-
-spell = SpellChecker()
+from backend import http_client
+from backend import spelling, dictionary_store
+from backend.cache import cached_response
+from backend.config import logger, BASE_DICTIONARY_URL
 
 dictionary_bp = Blueprint('dictionary', __name__)
 
-@dictionary_bp.route('/dictionary', methods=['GET'])
-def get_word_definition():
-    word_query = request.args.get('word')
-    if not word_query:
-        return jsonify({"error": "Word parameter is required"}), 400
-
-    corrected_word = spell.correction(word_query)
+def fetch_definition(word_query):
+    try:
+        corrected_word = spelling.correction(word_query)
+    except spelling.IndexMissingError as e:
+        logger.info(f"Dictionary lookup for {word_query} refused: {e}")
+        return {"error": "Spelling correction is not available yet. Please try again shortly."}, 503
     is_misspelled = False
     if corrected_word and corrected_word.lower() != word_query.lower():
         is_misspelled = True
@@ -22,38 +21,40 @@ def get_word_definition():
         word_to_define = word_query
 
     try:
-        response = requests.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word_to_define}", timeout=10)
-        response.raise_for_status()
-        entries = response.json()
-
-        formatted_definitions = []
-        for entry in entries:
-            for meaning in entry.get('meanings', []):
-                part_of_speech = meaning.get('partOfSpeech', '')
-                definitions = [d.get('definition', '') for d in meaning.get('definitions', []) if d.get('definition')]
-                if definitions:
-                    formatted_definitions.append({
-                        "part_of_speech": part_of_speech,
-                        "meanings": definitions
-                    })
+        # Local store first; the API is only asked about words it has never seen
+        formatted_definitions = dictionary_store.lookup(word_to_define)
+        if formatted_definitions is None:
+            response = http_client.get('dictionary', f"{BASE_DICTIONARY_URL}/{word_to_define}")
+            response.raise_for_status()
+            formatted_definitions = dictionary_store.format_entries(response.json())
+            if formatted_definitions:
+                dictionary_store.store(word_to_define, formatted_definitions)
 
         if formatted_definitions:
-            return jsonify({
+            return {
                 "original_word": word_query,
                 "corrected_word": corrected_word if is_misspelled else None,
                 "definitions": formatted_definitions
-            }), 200
+            }, 200
         else:
-            return jsonify({"error": f"Could not find definitions for '{word_query}'."}), 404
+            return {"error": f"Could not find definitions for '{word_query}'."}, 404
 
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 404:
-            return jsonify({"error": f"Could not find definitions for '{word_query}'."}), 404
-        return jsonify({"error": f"Dictionary API error: {e.response.status_code}"}), e.response.status_code
+            return {"error": f"Could not find definitions for '{word_query}'."}, 404
+        return {"error": f"Dictionary API error: {e.response.status_code}"}, e.response.status_code
     except requests.exceptions.ConnectionError:
-        return jsonify({"error": "Network connection error. Please try again later."}), 503
+        return {"error": "Network connection error. Please try again later."}, 503
     except requests.exceptions.Timeout:
-        return jsonify({"error": "Dictionary request timed out. Please try again."}), 504
+        return {"error": "Dictionary request timed out. Please try again."}, 504
     except Exception as e:
         logger.info(f"Error fetching dictionary definition for {word_to_define}: {e}")
-        return jsonify({"error": "An internal server error occurred."}), 500
+        return {"error": "An internal server error occurred."}, 500
+
+@dictionary_bp.route('/dictionary', methods=['GET'])
+def get_word_definition():
+    word_query = request.args.get('word')
+    if not word_query:
+        return jsonify({"error": "Word parameter is required"}), 400
+
+    return cached_response('dictionary', {'word': word_query}, lambda: fetch_definition(word_query))
@@ -1,15 +1,31 @@
 from flask import Blueprint, jsonify, request
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from backend.config import logger, SENDER_EMAIL, SENDER_PASSWORD, SMTP_SERVER, SMTP_PORT
+from backend.config import logger, SENDER_EMAIL, SENDER_PASSWORD
+from backend.mailer import mail_queue
 from backend.utils.auth import require_api_key
-from flask_limiter import limiter
+from backend.extensions import limiter, ACTION_LIMIT
 
 email_bp = Blueprint('email', __name__)
 
+def queue_email(recipient_email, subject, body):
+    if not SENDER_EMAIL or SENDER_EMAIL == 'your_sender_email@example.com' or \
+       not SENDER_PASSWORD or SENDER_PASSWORD == 'your_email_app_password':
+        logger.info("Warning: Email sender credentials are not set.")
+        return {"error": "Email sender credentials not configured on the server."}, 500
+
+    try:
+        message = mail_queue.submit(recipient_email, subject, body)
+        return {
+            "message": "Email queued.",
+            "message_id": message["message_id"],
+            "status": message["status"],
+            "status_url": f"/send-email/{message['message_id']}"
+        }, 202
+    except Exception as e:
+        logger.info(f"An unexpected error occurred while queueing email: {e}")
+        return {"error": f"An unknown server error occurred: {e}"}, 500
+
 @email_bp.route('/send-email', methods=['POST'])
-@limiter.limit("10 per minute")
+@limiter.shared_limit(ACTION_LIMIT, scope='send_email')
 @require_api_key
 def send_email():
     data = request.get_json(silent=True)
@@ -23,37 +39,13 @@ def send_email():
     if not all([recipient_email, subject, body]):
         return jsonify({"error": "Missing recipient_email, subject, or body"}), 400
 
-    if not SENDER_EMAIL or SENDER_EMAIL == 'your_sender_email@example.com' or \
-       not SENDER_PASSWORD or SENDER_PASSWORD == 'your_email_app_password':
-        logger.info("Warning: Email sender credentials are not set.")
-        return jsonify({"error": "Email sender credentials not configured on the server."}), 500
-
-    msg = MIMEMultipart()
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = recipient_email
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
+    payload, status = queue_email(recipient_email, subject, body)
+    return jsonify(payload), status
 
-    try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(SENDER_EMAIL, recipient_email, text)
-        server.quit()
-
-        logger.info(f"Email sent successfully to {recipient_email}")
-        return jsonify({"message": "Email sent successfully!"}), 200
-
-    except smtplib.SMTPAuthenticationError as e:
-        logger.info(f"SMTP Authentication Error: {e}")
-        return jsonify({"error": "Failed to authenticate with email server. Check sender credentials."}), 500
-    except smtplib.SMTPConnectError as e:
-        logger.info(f"SMTP Connection Error: {e}")
-        return jsonify({"error": "Failed to connect to email server. Check SMTP server/port or network."}), 500
-    except smtplib.SMTPException as e:
-        logger.info(f"SMTP Error: {e}")
-        return jsonify({"error": f"An SMTP error occurred: {e}"}), 500
-    except Exception as e:
-        logger.info(f"An unexpected error occurred during email sending: {e}")
-        return jsonify({"error": f"An unknown server error occurred: {e}"}), 500
+@email_bp.route('/send-email/<message_id>', methods=['GET'])
+@require_api_key
+def email_status(message_id):
+    message = mail_queue.get(message_id)
+    if message is None:
+        return jsonify({"error": "Email not found"}), 404
+    return jsonify(message), 200
@@ -0,0 +1,51 @@
+from flask import Blueprint, Response, jsonify, request
+from backend.events import broker, Subscriber, SubscriberLimitError, TOPICS
+from backend.utils.auth import has_valid_api_key
+
+events_bp = Blueprint('events', __name__)
+
+def _split(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+def _last_event_id():
+    # Browsers send Last-Event-ID when reconnecting; ?last_event_id= is for clients that cannot set headers
+    value = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if value is None:
+        return None
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return 0
+
+@events_bp.route('/events', methods=['GET'])
+def events():
+    # ?topics=todos,downloads,emails (default todos) and ?ids= to follow specific download jobs or emails.
+    # Download progress of a known job id is public, like GET /youtube/download/<job_id>; every
+    # download, and any email status, needs the API key.
+    topics = _split(request.args.get('topics')) or ['todos']
+    unknown = [topic for topic in topics if topic not in TOPICS]
+    if unknown:
+        return jsonify({"error": f"Unknown topic {', '.join(unknown)}; expected one of: {', '.join(TOPICS)}"}), 400
+
+    ids = _split(request.args.get('ids')) or None
+    authorized = has_valid_api_key()
+    if 'emails' in topics and not authorized:
+        return jsonify({"error": "Invalid or missing API key"}), 401
+    if 'downloads' in topics and ids is None and not authorized:
+        return jsonify({"error": "Pass ids=<job_id> to follow downloads, or an API key to follow all of them"}), 401
+
+    subscriber = Subscriber(topics, ids)
+    try:
+        broker.subscribe(subscriber)
+    except SubscriberLimitError as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+
+    response = Response(broker.stream(subscriber, _last_event_id()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stops nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(lambda: broker.unsubscribe(subscriber))
+    return response
@@ -1,8 +1,33 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify
+from backend import quota
 from backend.config import logger
+from backend.cache import response_cache
+from backend.extensions import limiter
+from backend.metrics import registry
 
 health_bp = Blueprint('health', __name__)
 
 @health_bp.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "message": "Backend is running"}), 200
+
+@health_bp.route('/health/cache', methods=['GET'])
+def cache_stats():
+    return jsonify(response_cache.stats()), 200
+
+@health_bp.route('/health/upstreams', methods=['GET'])
+def upstream_stats():
+    # Circuit breaker state, recent failures and the adaptive read timeout of each upstream called so far.
+    # Imported here so processes serving no upstream-backed blueprint never load requests.
+    from backend import http_client
+    return jsonify(http_client.upstream_stats()), 200
+
+@health_bp.route('/health/quotas', methods=['GET'])
+def quota_stats():
+    # Budget left on each metered upstream API key, shared by all workers
+    return jsonify(quota.stats()), 200
+
+@health_bp.route('/metrics', methods=['GET'])
+@limiter.exempt
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
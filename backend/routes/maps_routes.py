@@ -1,18 +1,15 @@
 from flask import Blueprint, jsonify, request
 import requests
+from backend import http_client
+from backend.cache import cached_response
 from backend.config import logger, GOOGLE_MAPS_API_KEY, BASE_PLACES_TEXT_SEARCH_URL
 
 maps_bp = Blueprint('maps', __name__)
 
-@maps_bp.route('/maps/search', methods=['GET'])
-def maps_search():
-    query = request.args.get('query')
-    if not query:
-        return jsonify({"error": "Query parameter is required"}), 400
-
+def fetch_places(query):
     if not GOOGLE_MAPS_API_KEY or GOOGLE_MAPS_API_KEY == 'YOUR_GOOGLE_MAPS_API_KEY_HERE':
         logger.info("Warning: Google Maps API key is not set.")
-        return jsonify({"error": "Google Maps API key not configured on the server."}), 500
+        return {"error": "Google Maps API key not configured on the server."}, 500
 
     params = {
         'query': query,
@@ -20,7 +17,7 @@ def maps_search():
     }
 
     try:
-        response = requests.get(BASE_PLACES_TEXT_SEARCH_URL, params=params, timeout=30)
+        response = http_client.get('maps', BASE_PLACES_TEXT_SEARCH_URL, params=params)
         response.raise_for_status()
         places_data = response.json()
 
@@ -42,24 +39,32 @@ def maps_search():
                     "user_ratings_total": user_ratings_total,
                     "map_url": map_url
                 })
-            return jsonify({"results": results}), 200
+            return {"results": results}, 200
         elif places_data.get('status') == 'ZERO_RESULTS':
-            return jsonify({"error": f"No results found for '{query}'."}), 404
+            return {"error": f"No results found for '{query}'."}, 404
         else:
-            return jsonify({"error": places_data.get('error_message', 'Could not retrieve map data')}), response.status_code
+            return {"error": places_data.get('error_message', 'Could not retrieve map data')}, response.status_code
 
     except requests.exceptions.HTTPError as e:
         logger.info(f"HTTP error occurred during Maps search: {e}")
-        return jsonify({"error": f"Google Maps API Error: {e.response.status_code} - {e.response.text}"}), e.response.status_code
+        return {"error": f"Google Maps API Error: {e.response.status_code} - {e.response.text}"}, e.response.status_code
     except requests.exceptions.ConnectionError as e:
         logger.info(f"Connection error occurred during Maps search: {e}")
-        return jsonify({"error": "Network connection error to Google Maps API. Please try again later."}), 503
+        return {"error": "Network connection error to Google Maps API. Please try again later."}, 503
     except requests.exceptions.Timeout as e:
         logger.info(f"Timeout error occurred during Maps search: {e}")
-        return jsonify({"error": "Google Maps API request timed out. Please try again."}), 504
+        return {"error": "Google Maps API request timed out. Please try again."}, 504
     except requests.exceptions.RequestException as e:
         logger.info(f"An unexpected request error occurred during Maps search: {e}")
-        return jsonify({"error": f"An unexpected request error occurred: {e}"}), 500
+        return {"error": f"An unexpected request error occurred: {e}"}, 500
     except Exception as e:
         logger.info(f"An unknown error occurred during Maps search: {e}")
-        return jsonify({"error": f"An unknown server error occurred: {e}"}), 500
+        return {"error": f"An unknown server error occurred: {e}"}, 500
+
+@maps_bp.route('/maps/search', methods=['GET'])
+def maps_search():
+    query = request.args.get('query')
+    if not query:
+        return jsonify({"error": "Query parameter is required"}), 400
+
+    return cached_response('maps', {'query': query}, lambda: fetch_places(query))
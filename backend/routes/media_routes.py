@@ -0,0 +1,125 @@
+import mimetypes
+import os
+import threading
+import time
+from urllib.parse import quote
+from flask import Blueprint, Response, abort, request
+from werkzeug.http import http_date
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+from backend import jobs
+from backend.config import (
+    logger, DOWNLOAD_DIR, MEDIA_SERVE_MODE, MEDIA_ACCEL_PREFIX, MEDIA_CACHE_MAX_AGE, MEDIA_TOUCH_INTERVAL
+)
+
+media_bp = Blueprint('media', __name__)
+
+_touched = {}
+_touched_lock = threading.Lock()
+
+class FileRange:
+    """Read-only view of `length` bytes of a file starting at `start`.
+
+    Handed to the server's wsgi.file_wrapper: gunicorn sends it with sendfile(2)
+    from the current offset for Content-Length bytes, other servers read it in blocks.
+    """
+
+    def __init__(self, path, start, length):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = length
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+def make_etag(stat):
+    # Same format as nginx's static ETag, so validators survive switching MEDIA_SERVE_MODE
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+def _touch(filename):
+    # Every seek is a new range request; only the first in MEDIA_TOUCH_INTERVAL writes to SQLite
+    now = time.monotonic()
+    with _touched_lock:
+        if now - _touched.get(filename, float('-inf')) < MEDIA_TOUCH_INTERVAL:
+            return
+        _touched[filename] = now
+    try:
+        jobs.touch_download(filename)
+    except Exception as e:
+        logger.info(f"Could not record access to {filename}: {e}")
+
+def _if_range_matches(etag, stat):
+    # A stale If-Range validator means the client's partial copy is outdated: send the whole file
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag.strip('"')
+    if if_range.date is not None:
+        return int(if_range.date.timestamp()) == int(stat.st_mtime)
+    return True
+
+def _byte_range(size, etag, stat):
+    # -> (start, length) of the part to send, None for the whole file, or False if unsatisfiable.
+    # Multi-range requests get the whole file, which RFC 9110 allows.
+    byte_range = request.range
+    if byte_range is None or byte_range.units != 'bytes' or len(byte_range.ranges) != 1:
+        return None
+    if 'If-Range' in request.headers and not _if_range_matches(etag, stat):
+        return None
+    bounds = byte_range.range_for_length(size)
+    if bounds is None:
+        return False
+    start, stop = bounds
+    return start, stop - start
+
+@media_bp.route('/downloads/<filename>', methods=['GET'])
+def serve_downloaded_file(filename):
+    path = safe_join(DOWNLOAD_DIR, filename)
+    if path is None:
+        abort(404)
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        abort(404)
+    if not os.path.isfile(path):
+        abort(404)
+
+    etag = make_etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': f'public, max-age={MEDIA_CACHE_MAX_AGE}',
+        'Accept-Ranges': 'bytes',
+    }
+    if request.if_none_match.contains_weak(etag.strip('"')):
+        return Response(status=304, headers=headers)
+    _touch(filename)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if MEDIA_SERVE_MODE == 'x-accel':
+        # nginx answers the Range / If-Range parts itself from the internal location
+        headers['X-Accel-Redirect'] = f"{MEDIA_ACCEL_PREFIX.rstrip('/')}/{quote(filename)}"
+        return Response(status=200, headers=headers, mimetype=mimetype)
+
+    size = stat.st_size
+    part = _byte_range(size, etag, stat)
+    if part is False:
+        headers['Content-Range'] = f'bytes */{size}'
+        return Response(status=416, headers=headers)
+    start, length = part if part else (0, size)
+    if part:
+        headers['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+    headers['Content-Length'] = str(length)
+
+    body = () if request.method == 'HEAD' else wrap_file(request.environ, FileRange(path, start, length))
+    return Response(body, status=206 if part else 200, headers=headers, mimetype=mimetype,
+                    direct_passthrough=True)
@@ -1,17 +1,15 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
 import requests
-from backend.config import logger, NEWS_API_KEY, BASE_NEWS_URL
+from backend import http_client
+from backend.cache import cached_response
+from backend.config import logger, NEWS_API_KEY, BASE_NEWS_URL, BASE_NEWS_EVERYTHING_URL
 
 news_bp = Blueprint('news', __name__)
 
-@news_bp.route('/news', methods=['GET'])
-def get_news():
-    query = request.args.get('query', '')
-    country = request.args.get('country', 'us')
-
+def fetch_news(query='', country='us'):
     if not NEWS_API_KEY or NEWS_API_KEY == 'YOUR_NEWS_API_KEY_HERE':
         logger.info("Warning: NewsAPI.org API key is not set.")
-        return jsonify({"error": "News API key not configured on the server."}), 500
+        return {"error": "News API key not configured on the server."}, 500
 
     params = {
         'apiKey': NEWS_API_KEY,
@@ -20,13 +18,13 @@ def get_news():
 
     if query:
         params['q'] = query
-        url_to_fetch = "https://newsapi.org/v2/everything"
+        url_to_fetch = BASE_NEWS_EVERYTHING_URL
     else:
         params['country'] = country
         url_to_fetch = BASE_NEWS_URL
 
     try:
-        response = requests.get(url_to_fetch, params=params, timeout=30)
+        response = http_client.get('news', url_to_fetch, params=params)
         response.raise_for_status()
         news_data = response.json()
 
@@ -39,22 +37,29 @@ def get_news():
                     "url": article.get('url'),
                     "source": article.get('source', {}).get('name')
                 })
-            return jsonify({"articles": articles}), 200
+            return {"articles": articles}, 200
         else:
-            return jsonify({"error": news_data.get('message', 'Could not retrieve news data')}), response.status_code
+            return {"error": news_data.get('message', 'Could not retrieve news data')}, response.status_code
 
     except requests.exceptions.HTTPError as e:
         logger.info(f"HTTP error occurred: {e}")
-        return jsonify({"error": f"HTTP Error: {e.response.status_code} - {e.response.text}"}), e.response.status_code
+        return {"error": f"HTTP Error: {e.response.status_code} - {e.response.text}"}, e.response.status_code
     except requests.exceptions.ConnectionError as e:
         logger.info(f"Connection error occurred: {e}")
-        return jsonify({"error": "Network connection error. Please try again later."}), 503
+        return {"error": "Network connection error. Please try again later."}, 503
     except requests.exceptions.Timeout as e:
         logger.info(f"Timeout error occurred: {e}")
-        return jsonify({"error": "Request timed out. Please try again."}), 504
+        return {"error": "Request timed out. Please try again."}, 504
     except requests.exceptions.RequestException as e:
         logger.info(f"An unexpected error occurred: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
+        return {"error": f"An unexpected error occurred: {e}"}, 500
     except Exception as e:
         logger.info(f"An unknown error occurred: {e}")
-        return jsonify({"error": f"An unknown server error occurred: {e}"}), 500
+        return {"error": f"An unknown server error occurred: {e}"}, 500
+
+@news_bp.route('/news', methods=['GET'])
+def get_news():
+    query = request.args.get('query', '')
+    country = request.args.get('country', 'us')
+
+    return cached_response('news', {'query': query, 'country': country}, lambda: fetch_news(query, country))
@@ -1,19 +1,94 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
+from werkzeug.http import is_resource_modified
 import sqlite3
-from backend.db import get_all_todos, create_todo, update_todo, delete_todo
-from backend.config import logger
+import base64
+import json
+from backend import db
+from backend.config import logger, TODO_BULK_MAX_ITEMS, TODO_PAGE_MAX_LIMIT
 
 todo_bp = Blueprint('todos', __name__)
 
+def _encode_cursor(after):
+    return base64.urlsafe_b64encode(json.dumps(after).encode()).decode()
+
+def _decode_cursor(cursor):
+    created_at, todo_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return created_at, todo_id
+
+def _list_etag(version, completed):
+    # Each ?completed= filter is a different list, so it is part of the tag
+    return f"todos-{version}-{'all' if completed is None else str(completed).lower()}"
+
+def _parse_completed(value):
+    if value is None:
+        return None
+    return value.lower() in ('true', '1', 'yes')
+
 @todo_bp.route('/api/todos', methods=['GET'])
 def get_todos():
+    # Without paging or sync parameters the full list is returned, as before
+    completed = _parse_completed(request.args.get('completed'))
+    since = request.args.get('since')
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+
     try:
-        todos = get_all_todos()
-        return jsonify(todos), 200
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return jsonify({"error": "since must be a sync version returned by a previous call"}), 400
+            return jsonify(db.get_todo_changes(since)), 200
+
+        if limit is not None or cursor is not None:
+            try:
+                limit = min(max(int(limit or TODO_PAGE_MAX_LIMIT), 1), TODO_PAGE_MAX_LIMIT)
+                after = _decode_cursor(cursor) if cursor else None
+            except (ValueError, TypeError):
+                return jsonify({"error": "Invalid limit or cursor"}), 400
+            todos, next_after = db.get_todos_page(limit, after=after, completed=completed)
+            return jsonify({
+                "todos": todos,
+                "next_cursor": _encode_cursor(next_after) if next_after else None
+            }), 200
+
+        # The validators change with every write, so a poll that is still current skips the query
+        version, last_modified = db.get_todo_list_state()
+        etag = _list_etag(version, completed)
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            response = Response(status=304)
+        else:
+            todos, version, last_modified = db.get_all_todos_with_state(completed=completed)
+            response = jsonify(todos)
+            etag = _list_etag(version, completed)
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        # Browsers keep the list but revalidate it on every poll
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
         logger.info(f"Error fetching todos: {e}")
         return jsonify({"error": "Failed to fetch todos"}), 500
 
+@todo_bp.route('/api/todos/search', methods=['GET'])
+def search_todos():
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({"error": "Query parameter q is required"}), 400
+
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), TODO_PAGE_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+
+    try:
+        results = db.search_todos(query, limit=limit, completed=_parse_completed(request.args.get('completed')))
+        return jsonify({"results": results}), 200
+    except Exception as e:
+        logger.info(f"Error searching todos: {e}")
+        return jsonify({"error": "Failed to search todos"}), 500
+
 @todo_bp.route('/api/todos', methods=['POST'])
 def create_todo():
     data = request.get_json(silent=True)
@@ -25,7 +100,7 @@ def create_todo():
         return jsonify({"error": "Task is required"}), 400
 
     try:
-        todo = create_todo(task)
+        todo = db.create_todo(task)
         return jsonify(todo), 201
     except Exception as e:
         logger.info(f"Error creating todo: {e}")
@@ -41,7 +116,7 @@ def update_todo(todo_id):
     completed = data.get('completed')
 
     try:
-        result = update_todo(todo_id, task=task, completed=completed)
+        result = db.update_todo(todo_id, task=task, completed=completed)
         if result is None:
             return jsonify({"error": "Todo not found"}), 404
         return jsonify(result), 200
@@ -52,10 +127,99 @@ def update_todo(todo_id):
 @todo_bp.route('/api/todos/<todo_id>', methods=['DELETE'])
 def delete_todo(todo_id):
     try:
-        success = delete_todo(todo_id)
+        success = db.delete_todo(todo_id)
         if not success:
             return jsonify({"error": "Todo not found"}), 404
         return jsonify({"message": "Todo deleted successfully"}), 200
     except Exception as e:
         logger.info(f"Error deleting todo: {e}")
         return jsonify({"error": "Failed to delete todo"}), 500
+
+def _bulk_items(data, key):
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": f"'{key}' must be a non-empty list"}), 400)
+    if len(items) > TODO_BULK_MAX_ITEMS:
+        return None, (jsonify({"error": f"At most {TODO_BULK_MAX_ITEMS} items per request"}), 413)
+    return items, None
+
+@todo_bp.route('/api/todos/bulk', methods=['POST'])
+def bulk_create_todos():
+    tasks, error = _bulk_items(request.get_json(silent=True), 'tasks')
+    if error:
+        return error
+
+    valid = [task for task in tasks if isinstance(task, str) and task.strip()]
+    try:
+        created = iter(db.create_todos(valid)) if valid else iter(())
+        results = []
+        for index, task in enumerate(tasks):
+            if isinstance(task, str) and task.strip():
+                results.append({"index": index, "status": "created", "todo": next(created)})
+            else:
+                results.append({"index": index, "status": "invalid", "error": "Task is required"})
+        return jsonify({"results": results}), 201
+    except Exception as e:
+        logger.info(f"Error bulk creating todos: {e}")
+        return jsonify({"error": "Failed to create todos"}), 500
+
+def _update_error(update):
+    # -> why one bulk update item is invalid, or None; null task / completed mean "leave unchanged"
+    if not isinstance(update, dict) or not isinstance(update.get('id'), str):
+        return "Todo id is required"
+    task = update.get('task')
+    if task is not None and (not isinstance(task, str) or not task.strip()):
+        return "Task must be a non-empty string"
+    if update.get('completed') is not None and not isinstance(update['completed'], bool):
+        return "Completed must be true or false"
+    return None
+
+@todo_bp.route('/api/todos/bulk', methods=['PUT'])
+def bulk_update_todos():
+    updates, error = _bulk_items(request.get_json(silent=True), 'updates')
+    if error:
+        return error
+
+    errors = [_update_error(update) for update in updates]
+    valid = [update for update, error in zip(updates, errors) if error is None]
+    try:
+        updated = iter(db.update_todos(valid)) if valid else iter(())
+        results = []
+        for index, error in enumerate(errors):
+            if error is None:
+                results.append(dict(next(updated), index=index))
+            else:
+                results.append({"index": index, "status": "invalid", "error": error})
+        return jsonify({"results": results}), 200
+    except Exception as e:
+        logger.info(f"Error bulk updating todos: {e}")
+        return jsonify({"error": "Failed to update todos"}), 500
+
+@todo_bp.route('/api/todos/bulk', methods=['DELETE'])
+def bulk_delete_todos():
+    ids, error = _bulk_items(request.get_json(silent=True), 'ids')
+    if error:
+        return error
+
+    valid = [todo_id for todo_id in ids if isinstance(todo_id, str)]
+    try:
+        deleted = iter(db.delete_todos(valid)) if valid else iter(())
+        results = []
+        for index, todo_id in enumerate(ids):
+            if isinstance(todo_id, str):
+                results.append(dict(next(deleted), index=index))
+            else:
+                results.append({"index": index, "status": "invalid", "error": "Todo id is required"})
+        return jsonify({"results": results}), 200
+    except Exception as e:
+        logger.info(f"Error bulk deleting todos: {e}")
+        return jsonify({"error": "Failed to delete todos"}), 500
+
+@todo_bp.route('/api/todos/completed', methods=['DELETE'])
+def clear_completed_todos():
+    try:
+        deleted_ids = db.clear_completed_todos()
+        return jsonify({"deleted": deleted_ids, "count": len(deleted_ids)}), 200
+    except Exception as e:
+        logger.info(f"Error clearing completed todos: {e}")
+        return jsonify({"error": "Failed to clear completed todos"}), 500
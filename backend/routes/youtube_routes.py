@@ -1,23 +1,18 @@
 from flask import Blueprint, jsonify, request
 import requests
-import subprocess
-import uuid
-import os
-from backend.config import logger, YOUTUBE_API_KEY, BASE_YOUTUBE_SEARCH_URL, DOWNLOAD_DIR
+from backend import http_client
+from backend.cache import cached_response
+from backend.config import logger, YOUTUBE_API_KEY, BASE_YOUTUBE_SEARCH_URL
+from backend.jobs import download_jobs
 from backend.utils.auth import require_api_key
-from flask_limiter import limiter
+from backend.extensions import limiter, ACTION_LIMIT
 
 youtube_bp = Blueprint('youtube', __name__)
 
-@youtube_bp.route('/youtube/search', methods=['GET'])
-def youtube_search():
-    query = request.args.get('query')
-    if not query:
-        return jsonify({"error": "Query parameter is required"}), 400
-
+def fetch_youtube_videos(query):
     if not YOUTUBE_API_KEY or YOUTUBE_API_KEY == 'YOUR_YOUTUBE_API_KEY_HERE':
         logger.info("Warning: YouTube API key is not set.")
-        return jsonify({"error": "YouTube API key not configured on the server."}), 500
+        return {"error": "YouTube API key not configured on the server."}, 500
 
     params = {
         'part': 'snippet',
@@ -28,7 +23,7 @@ def youtube_search():
     }
 
     try:
-        response = requests.get(BASE_YOUTUBE_SEARCH_URL, params=params, timeout=30)
+        response = http_client.get('youtube', BASE_YOUTUBE_SEARCH_URL, params=params)
         response.raise_for_status()
         youtube_data = response.json()
 
@@ -47,26 +42,58 @@ def youtube_search():
                     "thumbnail": thumbnail_url,
                     "url": f"https://www.youtube.com/watch?v={video_id}"
                 })
-        return jsonify({"videos": videos}), 200
+        return {"videos": videos}, 200
 
     except requests.exceptions.HTTPError as e:
         logger.info(f"HTTP error occurred during YouTube search: {e}")
-        return jsonify({"error": f"YouTube API Error: {e.response.status_code} - {e.response.text}"}), e.response.status_code
+        return {"error": f"YouTube API Error: {e.response.status_code} - {e.response.text}"}, e.response.status_code
     except requests.exceptions.ConnectionError as e:
         logger.info(f"Connection error occurred during YouTube search: {e}")
-        return jsonify({"error": "Network connection error to YouTube API. Please try again later."}), 503
+        return {"error": "Network connection error to YouTube API. Please try again later."}, 503
     except requests.exceptions.Timeout as e:
         logger.info(f"Timeout error occurred during YouTube search: {e}")
-        return jsonify({"error": "YouTube API request timed out. Please try again."}), 504
+        return {"error": "YouTube API request timed out. Please try again."}, 504
     except requests.exceptions.RequestException as e:
         logger.info(f"An unexpected request error occurred during YouTube search: {e}")
-        return jsonify({"error": f"An unexpected request error occurred: {e}"}), 500
+        return {"error": f"An unexpected request error occurred: {e}"}, 500
     except Exception as e:
         logger.info(f"An unknown error occurred during YouTube search: {e}")
-        return jsonify({"error": f"An unknown server error occurred: {e}"}), 500
+        return {"error": f"An unknown server error occurred: {e}"}, 500
+
+@youtube_bp.route('/youtube/search', methods=['GET'])
+def youtube_search():
+    query = request.args.get('query')
+    if not query:
+        return jsonify({"error": "Query parameter is required"}), 400
+
+    return cached_response('youtube', {'query': query}, lambda: fetch_youtube_videos(query))
+
+def queue_download(video_url):
+    if not ("youtube.com/watch?v=" in video_url or "youtu.be/" in video_url):
+        return {"error": "Invalid YouTube URL provided."}, 400
+
+    try:
+        job = download_jobs.submit(video_url)
+        if job["status"] == 'completed':
+            return {
+                "message": "Video already downloaded.",
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "download_link": job["download_link"],
+                "status_url": f"/youtube/download/{job['job_id']}"
+            }, 200
+        return {
+            "message": "Download queued.",
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/youtube/download/{job['job_id']}"
+        }, 202
+    except Exception as e:
+        logger.info(f"An unexpected error occurred while queueing YouTube download: {e}")
+        return {"error": f"An unknown server error occurred during download: {e}"}, 500
 
 @youtube_bp.route('/youtube/download', methods=['POST'])
-@limiter.limit("10 per minute")
+@limiter.shared_limit(ACTION_LIMIT, scope='download_video')
 @require_api_key
 def youtube_download():
     data = request.get_json(silent=True)
@@ -78,38 +105,12 @@ def youtube_download():
     if not video_url:
         return jsonify({"error": "YouTube video URL is required"}), 400
 
-    if not ("youtube.com/watch?v=" in video_url or "youtu.be/" in video_url):
-        return jsonify({"error": "Invalid YouTube URL provided."}), 400
+    payload, status = queue_download(video_url)
+    return jsonify(payload), status
 
-    try:
-        output_filename = f"{uuid.uuid4().hex}.mp4"
-        output_path = os.path.join(DOWNLOAD_DIR, output_filename)
-
-        command = [
-            "yt-dlp",
-            "-f", "bestvideo[ext=mp4]+bestaudio[ext=m4a]/mp4",
-            "--merge-output-format", "mp4",
-            "-o", output_path,
-            video_url
-        ]
-        result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=300)
-        download_link = f"/downloads/{output_filename}"
-
-        return jsonify({
-            "message": "Video downloaded successfully!",
-            "download_link": download_link,
-            "filename": output_filename,
-            "yt_dlp_stdout": result.stdout,
-            "yt_dlp_stderr": result.stderr
-        }), 200
-
-    except subprocess.CalledProcessError as e:
-        logger.info(f"yt-dlp command failed: {e}")
-        logger.info(f"STDOUT: {e.stdout}")
-        logger.info(f"STDERR: {e.stderr}")
-        return jsonify({"error": f"Failed to download video: {e.stderr}"}), 500
-    except FileNotFoundError:
-        return jsonify({"error": "yt-dlp not found. Please ensure it's installed and in your system's PATH."}), 500
-    except Exception as e:
-        logger.info(f"An unexpected error occurred during YouTube download: {e}")
-        return jsonify({"error": f"An unknown server error occurred during download: {e}"}), 500
+@youtube_bp.route('/youtube/download/<job_id>', methods=['GET'])
+def youtube_download_status(job_id):
+    job = download_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Download job not found"}), 404
+    return jsonify(job), 200
@@ -0,0 +1,52 @@
+"""One-time schema setup for the backend SQLite database.
+
+Each module that owns tables has an idempotent init_db(). They run only when the
+database's PRAGMA user_version is behind SCHEMA_VERSION, and at most once per
+process and database, instead of on every create_app(). Later starts only read
+user_version and prune old tombstones and events.
+
+`python -m backend.schema` migrates ahead of time; gunicorn runs it in its
+on_starting hook so workers never race each other through the DDL. The modules
+owning the tables are imported only when the DDL runs, so a current database does
+not load the mailer (smtplib) or the download workers into every process.
+"""
+import importlib
+import threading
+from backend import db
+from backend.config import logger, EVENTS_RETENTION
+
+# Bump whenever one of the init_db() functions below gains a table, column, index or trigger
+SCHEMA_VERSION = 4
+# Modules whose init_db() creates their tables, in order
+INITIALIZERS = ('backend.db', 'backend.jobs', 'backend.dictionary_store', 'backend.mailer')
+
+_migrated = set()
+_lock = threading.Lock()
+
+def schema_version():
+    with db.get_connection() as conn:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate():
+    # -> True if the DDL ran, False if the database was already current
+    path = db.DB_PATH
+    if path in _migrated:
+        return False
+    with _lock:
+        if path in _migrated:
+            return False
+        ran = schema_version() < SCHEMA_VERSION
+        if ran:
+            for module in INITIALIZERS:
+                importlib.import_module(module).init_db()
+            with db.get_connection() as conn:
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            logger.info(f"Migrated {path} to schema version {SCHEMA_VERSION}")
+        else:
+            db.prune_tombstones()
+            db.prune_events(EVENTS_RETENTION)
+        _migrated.add(path)
+    return ran
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,367 @@
+import argparse
+import mmap
+import os
+import random
+import string
+import struct
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+from functools import lru_cache
+from backend import metrics
+from backend.config import logger, SPELLING_ENGINE, SPELLING_INDEX_PATH, SPELLING_CACHE_SIZE
+
+# Index file layout (native byte order, sections 8-byte aligned):
+#   header | counts: Q[n_words] | word offsets: I[n_words + 1] | bucket starts: I[n_buckets + 1]
+#   | postings: I[n_postings] | UTF-8 word blob
+# Word ids are ordered by descending frequency, so the lowest id wins ties. Each posting
+# keeps the number of characters deleted from the word to reach its key in the top bits.
+MAGIC = b'SYMSPEL1'
+HEADER = struct.Struct('=8sIIIIIQ')
+HEADER_SIZE = 64
+PREFIX_LENGTH = 7
+MAX_DISTANCE = 2
+DEPTH_SHIFT = 30
+WORD_ID_MASK = (1 << DEPTH_SHIFT) - 1
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+def _deletes(word, max_depth):
+    # {string: characters removed} for everything reachable by removing up to max_depth characters
+    found = {word: 0}
+    frontier = {word}
+    for depth in range(1, max_depth + 1):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found.keys()
+        found.update(dict.fromkeys(frontier, depth))
+    return found
+
+def _bucket(key, n_buckets):
+    return zlib.crc32(key.encode('utf-8')) % n_buckets
+
+def _remove_diacritics(text):
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+def _is_checkable(word, longest_word_length):
+    # Same rules pyspellchecker applies before correcting: punctuation, numbers and
+    # words far longer than anything in the dictionary are left alone
+    if len(word) == 1 and word in string.punctuation:
+        return False
+    if len(word) > longest_word_length + 3:
+        return False
+    if word.lower() in ('nan', 'inf', 'infinity'):
+        return True
+    try:
+        float(word)
+        return False
+    except ValueError:
+        return True
+
+# (characters from a, characters from b) consumed by one substitution, insert, delete or swap
+_EDIT_SHAPES = ((1, 1), (0, 1), (1, 0), (2, 2))
+
+def _shape_matches(a, b, shape):
+    if len(a) < shape[0] or len(b) < shape[1]:
+        return False
+    return shape != (2, 2) or (a[0] == b[1] and a[1] == b[0])
+
+def edit_distance(a, b):
+    """Unrestricted Damerau-Levenshtein distance between a and b, capped at MAX_DISTANCE + 1.
+
+    This is the fewest inserts, deletes, substitutions and adjacent swaps, which is
+    what stacking pyspellchecker's single edits produces. Once the common prefix and
+    suffix are gone the strings differ at both ends, so a distance of two means one
+    edit at each end around an identical middle; checking those shapes with slice
+    comparisons avoids filling a dynamic-programming table for every candidate.
+    """
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    a, b = a[start:], b[start:]
+    end = 0
+    while end < len(a) and end < len(b) and a[-1 - end] == b[-1 - end]:
+        end += 1
+    if end:
+        a, b = a[:-end], b[:-end]
+    if abs(len(a) - len(b)) > MAX_DISTANCE:
+        return MAX_DISTANCE + 1
+    if not a or not b:
+        return max(len(a), len(b))
+
+    for shape in _EDIT_SHAPES:
+        if shape == (len(a), len(b)) and _shape_matches(a, b, shape):
+            return 1
+    # The one way two edits overlap: a swap with a character inserted between the pair
+    if sorted((len(a), len(b))) == [2, 3] and a[0] == b[-1] and a[-1] == b[0]:
+        return 2
+    for first in _EDIT_SHAPES:
+        if not _shape_matches(a, b, first):
+            continue
+        for last in _EDIT_SHAPES:
+            a_end, b_end = len(a) - last[0], len(b) - last[1]
+            if (a_end - first[0] == b_end - first[1] and a_end >= first[0] and b_end >= first[1]
+                    and _shape_matches(a[a_end:], b[b_end:], last)
+                    and a[first[0]:a_end] == b[first[1]:b_end]):
+                return 2
+    return MAX_DISTANCE + 1
+
+def build_index(frequencies, path, prefix_length=PREFIX_LENGTH):
+    """Write a symmetric-delete index for {word: count} to path.
+
+    Each word is filed under every deletion of its first prefix_length characters,
+    hashed into a fixed number of buckets. Lookups gather the buckets for the
+    deletions of the query and verify each candidate with an exact edit distance,
+    so hash collisions only cost time, never correctness.
+    """
+    longest = max((len(w) for w in frequencies), default=0)
+    words = sorted((w for w in frequencies if _is_checkable(w, longest)), key=lambda w: (-frequencies[w], w))
+    n_buckets = 1 << max((len(words) * 8 - 1).bit_length(), 4)
+
+    bucket_ids = array('I')
+    word_ids = array('I')
+    for word_id, word in enumerate(words):
+        buckets = {}
+        for key, depth in _deletes(word[:prefix_length], MAX_DISTANCE).items():
+            bucket = _bucket(key, n_buckets)
+            buckets[bucket] = min(depth, buckets.get(bucket, depth))
+        bucket_ids.extend(buckets)
+        word_ids.extend(depth << DEPTH_SHIFT | word_id for depth in buckets.values())
+
+    starts = array('I', [0]) * (n_buckets + 1)
+    for bucket in bucket_ids:
+        starts[bucket + 1] += 1
+    for bucket in range(n_buckets):
+        starts[bucket + 1] += starts[bucket]
+    postings = array('I', [0]) * len(word_ids)
+    cursor = array('I', starts[:-1])
+    for bucket, word_id in zip(bucket_ids, word_ids):
+        postings[cursor[bucket]] = word_id
+        cursor[bucket] += 1
+
+    counts = array('Q', (frequencies[w] for w in words))
+    encoded = [w.encode('utf-8') for w in words]
+    offsets = array('I', [0])
+    for blob in encoded:
+        offsets.append(offsets[-1] + len(blob))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        header = HEADER.pack(MAGIC, prefix_length, MAX_DISTANCE, longest, len(words), n_buckets, len(postings))
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        for section in (counts, offsets, starts, postings):
+            section.tofile(f)
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+        f.write(b''.join(encoded))
+    # Readers either see the previous complete index or the new one
+    os.replace(tmp_path, path)
+    return len(words)
+
+class SymSpellEngine:
+    name = 'symspell'
+
+    def __init__(self, path, cache_size=SPELLING_CACHE_SIZE):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.prefix_length, self.max_distance, self.longest_word_length, n_words, self.n_buckets, n_postings = \
+            HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or self.max_distance != MAX_DISTANCE:
+            raise ValueError(f"{path} is not a spelling index")
+
+        self._view = view = memoryview(self._mmap)
+        offset = HEADER_SIZE
+        sections = []
+        for code, length in (('Q', n_words), ('I', n_words + 1), ('I', self.n_buckets + 1), ('I', n_postings)):
+            size = length * array(code).itemsize
+            sections.append(view[offset:offset + size].cast(code))
+            offset = _align(offset + size)
+        self._counts, self._offsets, self._starts, self._postings = sections
+        self._blob = view[offset:]
+        self.correction = lru_cache(maxsize=cache_size)(self._correction)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def _word(self, word_id):
+        return str(self._blob[self._offsets[word_id]:self._offsets[word_id + 1]], 'utf-8')
+
+    def _postings_for(self, key):
+        bucket = _bucket(key, self.n_buckets)
+        return self._postings[self._starts[bucket]:self._starts[bucket + 1]]
+
+    def _gather(self, word, depth):
+        # Two strings within n edits share a key made by deleting at most n characters
+        # from each, so only postings that deep can hold a match
+        word_ids = set()
+        for key in _deletes(word[:self.prefix_length], depth):
+            word_ids.update(
+                posting & WORD_ID_MASK for posting in self._postings_for(key) if posting >> DEPTH_SHIFT <= depth
+            )
+        return word_ids
+
+    def known(self, word):
+        word = word.lower()
+        return any(self._word(word_id) == word for word_id in self._gather(word, 0))
+
+    def closest(self, word):
+        # Ids of the dictionary words at the smallest edit distance from word, or [] if none are in range
+        word = word.lower()
+        distances = {}
+        for distance in range(1, MAX_DISTANCE + 1):
+            for word_id in self._gather(word, distance) - distances.keys():
+                candidate = self._word(word_id)
+                distances[word_id] = (
+                    edit_distance(word, candidate) if abs(len(candidate) - len(word)) <= MAX_DISTANCE
+                    else MAX_DISTANCE + 1
+                )
+            matches = [word_id for word_id, d in distances.items() if d == distance]
+            if matches:
+                return matches
+        return []
+
+    def _correction(self, word):
+        # Mirrors SpellChecker.correction(): known or uncheckable words come back unchanged,
+        # otherwise the most frequent word at the smallest edit distance, preferring
+        # candidates that only differ from the input in diacritics
+        if not _is_checkable(word, self.longest_word_length) or self.known(word):
+            return word
+        word_ids = self.closest(word)
+        if not word_ids:
+            return None
+        plain = _remove_diacritics(word)
+        preferred = [i for i in word_ids if _remove_diacritics(self._word(i)) == plain]
+        return self._word(min(preferred or word_ids))
+
+    def close(self):
+        self.correction.cache_clear()
+        for view in (self._counts, self._offsets, self._starts, self._postings, self._blob, self._view):
+            view.release()
+        self._mmap.close()
+
+class PySpellCheckerEngine:
+    name = 'pyspellchecker'
+
+    def __init__(self, cache_size=SPELLING_CACHE_SIZE):
+        from spellchecker import SpellChecker
+        self._spell = SpellChecker()
+        self.correction = lru_cache(maxsize=cache_size)(self._spell.correction)
+
+def _pyspellchecker_frequencies():
+    from spellchecker import SpellChecker
+    return dict(SpellChecker().word_frequency.dictionary)
+
+class IndexMissingError(RuntimeError):
+    """The symspell index has not been built yet."""
+
+def ensure_index(path=SPELLING_INDEX_PATH):
+    # -> True if the index had to be built. Building takes seconds, so it happens at
+    # startup (gunicorn on_starting, the Docker build) and never inside a request.
+    if os.path.exists(path):
+        return False
+    started = time.time()
+    count = build_index(_pyspellchecker_frequencies(), path)
+    logger.info(f"Built spelling index with {count} words at {path} in {time.time() - started:.1f}s")
+    return True
+
+def load_symspell(path=SPELLING_INDEX_PATH):
+    if not os.path.exists(path):
+        raise IndexMissingError(f"No spelling index at {path}; run `python -m backend.spelling build`")
+    return SymSpellEngine(path)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    # Raises IndexMissingError, without caching the failure, until the index has been built
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if SPELLING_ENGINE == 'pyspellchecker':
+                    _engine = PySpellCheckerEngine()
+                else:
+                    if SPELLING_ENGINE != 'symspell':
+                        logger.info(f"Unknown SPELLING_ENGINE '{SPELLING_ENGINE}', falling back to symspell")
+                    _engine = load_symspell(SPELLING_INDEX_PATH)
+    return _engine
+
+def correction(word):
+    return get_engine().correction(word)
+
+def _collect_metrics():
+    # Only once an engine is loaded; collecting must not trigger an index build
+    if _engine is not None:
+        info = _engine.correction.cache_info()
+        metrics.cache_events.set_total(info.hits, cache='spelling', result='hits')
+        metrics.cache_events.set_total(info.misses, cache='spelling', result='misses')
+
+metrics.registry.add_collector(_collect_metrics)
+
+def _misspellings(words, count, seed=0):
+    rng = random.Random(seed)
+    letters = string.ascii_lowercase
+    samples = []
+    for _ in range(count):
+        word = list(rng.choice(words))
+        for _ in range(rng.choice((1, 1, 2))):
+            position = rng.randrange(len(word))
+            edit = rng.choice(('delete', 'insert', 'replace', 'swap'))
+            if edit == 'delete' and len(word) > 1:
+                del word[position]
+            elif edit == 'insert':
+                word.insert(position, rng.choice(letters))
+            elif edit == 'swap' and position + 1 < len(word):
+                word[position], word[position + 1] = word[position + 1], word[position]
+            else:
+                word[position] = rng.choice(letters)
+        samples.append(''.join(word))
+    return samples
+
+def benchmark(path=SPELLING_INDEX_PATH, count=2000):
+    from spellchecker import SpellChecker
+    spell = SpellChecker()
+    ensure_index(path)
+    engine = load_symspell(path)
+    frequencies = spell.word_frequency.dictionary
+    common = [w for w in sorted(frequencies, key=frequencies.get, reverse=True)[:20000] if w.isalpha() and len(w) > 3]
+    samples = _misspellings(common, count)
+
+    started = time.perf_counter()
+    expected = [spell.correction(w) for w in samples]
+    baseline = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = [engine._correction(w) for w in samples]
+    indexed = time.perf_counter() - started
+
+    # pyspellchecker breaks frequency ties in set order, so equally frequent answers count as matches
+    mismatches = [
+        (w, e, a) for w, e, a in zip(samples, expected, actual)
+        if e != a and (e is None or a is None or spell[e] != spell[a])
+    ]
+    print(f"{count} words: pyspellchecker {baseline * 1000:.0f} ms, symspell {indexed * 1000:.0f} ms, "
+          f"{baseline / indexed:.1f}x faster, {len(mismatches)} mismatches")
+    for w, e, a in mismatches[:20]:
+        print(f"  {w!r}: expected {e!r}, got {a!r}")
+    return not mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or benchmark the spelling correction index")
+    parser.add_argument('command', choices=('build', 'bench'))
+    parser.add_argument('--path', default=SPELLING_INDEX_PATH)
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--if-missing', action='store_true',
+                        help="build only when the symspell engine is in use and the index does not exist")
+    args = parser.parse_args()
+    if args.command == 'build' and args.if_missing:
+        if SPELLING_ENGINE != 'pyspellchecker':
+            ensure_index(args.path)
+    elif args.command == 'build':
+        started = time.time()
+        count = build_index(_pyspellchecker_frequencies(), args.path)
+        print(f"Wrote {count} words to {args.path} in {time.time() - started:.1f}s")
+    else:
+        raise SystemExit(0 if benchmark(args.path, args.count) else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+import pytest
+from backend import db, quota
+
+@pytest.fixture(autouse=True)
+def todo_db(tmp_path, monkeypatch):
+    db.close_connections()
+    quota.close_connections()
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'todos.db'))
+    monkeypatch.setattr(quota, 'DB_PATH', str(tmp_path / 'quota.db'))
+    yield db.DB_PATH
+    db.close_connections()
+    quota.close_connections()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# Stand-in for yt-dlp: prints --newline style progress and writes a small file to the -o path.
+# FAKE_YTDLP_FAIL=1 makes it exit with an error (FAKE_YTDLP_FAIL_RATE=0.1 for one run in ten);
+# FAKE_YTDLP_DELAY slows each progress step. The random failures are seeded by FAKE_YTDLP_SEED and
+# the URL, so a given video fails or succeeds the same way on every run.
+import os
+import random
+import sys
+import time
+
+args = sys.argv[1:]
+output_path = args[args.index('-o') + 1]
+delay = float(os.environ.get('FAKE_YTDLP_DELAY', 0))
+rng = random.Random(f"{os.environ.get('FAKE_YTDLP_SEED', 0)}:{args[-1]}")
+
+if os.environ.get('FAKE_YTDLP_FAIL') or rng.random() < float(os.environ.get('FAKE_YTDLP_FAIL_RATE', 0)):
+    print('ERROR: [youtube] video unavailable', flush=True)
+    sys.exit(1)
+
+for percent in (0.0, 25.0, 50.0, 75.0, 100.0):
+    print(f'[download]  {percent:5.1f}% of 1.00MiB at 1.00MiB/s ETA 00:00', flush=True)
+    time.sleep(delay)
+
+with open(output_path, 'wb') as f:
+    f.write(b'\0' * int(os.environ.get('FAKE_YTDLP_SIZE', 1024)))
+print(f'[Merger] Merging formats into "{output_path}"', flush=True)
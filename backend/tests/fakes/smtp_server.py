@@ -0,0 +1,92 @@
+# Minimal SMTP stand-in: EHLO with AUTH PLAIN, MAIL/RCPT/DATA, RSET, NOOP, QUIT.
+# Records delivered messages and connection count; fail_next holds replies to
+# give to upcoming MAIL FROM commands (e.g. '451 try again later'). For load
+# tests, each message can also wait latency seconds and be refused with a 451
+# at failure_rate (seeded).
+import random
+import socketserver
+import threading
+import time
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 fake smtp ready')
+        envelope = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().rstrip('\r\n')
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-fake smtp')
+                self.reply('250 AUTH PLAIN')
+            elif verb == 'HELO':
+                self.reply('250 fake smtp')
+            elif verb == 'AUTH':
+                with server.lock:
+                    server.logins += 1
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb == 'MAIL':
+                with server.lock:
+                    failure = server.fail_next.pop(0) if server.fail_next else None
+                    if failure is None and server.rng.random() < server.failure_rate:
+                        failure = '451 4.3.0 injected failure'
+                time.sleep(server.latency)
+                if failure:
+                    self.reply(failure)
+                    continue
+                envelope = {'from': command, 'to': []}
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                envelope['to'].append(command.split(':', 1)[1].strip('<> '))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data_line = self.rfile.readline().decode()
+                    if data_line in ('.\r\n', '.\n', ''):
+                        break
+                    lines.append(data_line)
+                with server.lock:
+                    server.messages.append({'to': envelope['to'], 'data': ''.join(lines)})
+                envelope = None
+                self.reply('250 OK queued')
+            elif verb in ('RSET', 'NOOP'):
+                envelope = None
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.connections = 0
+        self.logins = 0
+        self.messages = []
+        self.fail_next = []
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
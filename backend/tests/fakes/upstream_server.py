@@ -0,0 +1,139 @@
+# Local stand-in for every HTTP API the backend calls (OpenWeather, NewsAPI, YouTube Data,
+# Google Places, dictionaryapi.dev, MediaWiki), answering in each API's response shape.
+# Every request waits latency (+ up to jitter) seconds and fails with a 503 at
+# failure_rate, drawn from a seeded generator so runs are repeatable.
+# env() returns the *_API_URL settings that point the backend at it.
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse, unquote
+
+def weather(params):
+    city = params.get('q', 'Nowhere').title()
+    return {
+        "cod": 200,
+        "name": city,
+        "sys": {"country": "GB"},
+        "main": {"temp": 14.2, "feels_like": 13.1, "humidity": 71},
+        "weather": [{"description": "scattered clouds", "icon": "03d"}],
+        "wind": {"speed": 4.1}
+    }
+
+def news(params):
+    topic = params.get('q') or params.get('country', 'us')
+    return {"status": "ok", "articles": [
+        {"title": f"{topic} story {n}", "description": "Details.", "url": f"https://news.example/{n}",
+         "source": {"name": "Example News"}} for n in range(5)
+    ]}
+
+def youtube(params):
+    query = params.get('q', '')
+    return {"items": [
+        {"id": {"videoId": f"vid{n:08d}"}, "snippet": {
+            "title": f"{query} video {n}", "description": "A video.",
+            "thumbnails": {"default": {"url": f"https://img.example/{n}.jpg"}}
+        }} for n in range(5)
+    ]}
+
+def places(params):
+    query = params.get('query', '')
+    return {"status": "OK", "results": [
+        {"place_id": f"place{n}", "name": f"{query} {n}", "formatted_address": f"{n} High Street",
+         "rating": 4.5, "user_ratings_total": 100 + n} for n in range(5)
+    ]}
+
+def dictionary(word):
+    return [{"word": word, "meanings": [
+        {"partOfSpeech": "noun", "definitions": [{"definition": f"The meaning of {word}."}]}
+    ]}]
+
+def wikipedia(params):
+    def page(title):
+        return {"title": title, "extract": f"{title} is a topic. It has a summary. It goes on.",
+                "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"}
+    if 'gsrsearch' in params:
+        return {"query": {"pages": [page(params['gsrsearch'].title())]}}
+    return {"query": {"pages": [page(title) for title in params.get('titles', '').split('|') if title]}}
+
+ROUTES = {
+    '/weather': weather,
+    '/news/top-headlines': news,
+    '/news/everything': news,
+    '/youtube/search': youtube,
+    '/maps/textsearch': places,
+    '/wikipedia': wikipedia,
+}
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        route = '/dictionary' if url.path.startswith('/dictionary/') else url.path
+        with server.lock:
+            server.requests[route] += 1
+            delay = server.latency + server.rng.uniform(0, server.jitter)
+            failing = server.rng.random() < server.failure_rate
+        time.sleep(delay)
+
+        if failing:
+            return self.send_json(503, {"error": "injected failure"})
+        if route == '/dictionary':
+            return self.send_json(200, dictionary(unquote(url.path[len('/dictionary/'):])))
+        handler = ROUTES.get(route)
+        if handler is None:
+            return self.send_json(404, {"error": f"unknown path {url.path}"})
+        self.send_json(200, handler(params))
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        super().__init__(('127.0.0.1', 0), UpstreamHandler)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.requests = Counter()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def env(self):
+        return {
+            'WEATHER_API_URL': f"{self.url}/weather",
+            'NEWS_API_URL': f"{self.url}/news/top-headlines",
+            'NEWS_EVERYTHING_API_URL': f"{self.url}/news/everything",
+            'YOUTUBE_API_URL': f"{self.url}/youtube/search",
+            'PLACES_API_URL': f"{self.url}/maps/textsearch",
+            'DICTIONARY_API_URL': f"{self.url}/dictionary",
+            'WIKIPEDIA_API_URL': f"{self.url}/wikipedia",
+        }
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -17,3 +17,59 @@ def test_home(client):
     response = client.get('/')
     assert response.status_code == 200
     assert b'Backend is running' in response.data
+
+def test_enabled_blueprints_limit_what_is_served():
+    app = create_app(['todos'])
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        assert client.get('/api/todos').status_code == 200
+        assert client.get('/health').status_code == 200
+        assert client.get('/weather?city=London').status_code == 404
+
+def test_subset_app_does_not_import_unused_services(tmp_path):
+    # A fresh interpreter, since this one has imported every module already
+    import os, subprocess, sys
+    from backend.benchmark import REPO_ROOT
+    env = {**os.environ, 'PYTHONPATH': REPO_ROOT, 'TODO_DB_PATH': str(tmp_path / 'todos.db'),
+           'CACHE_DB_PATH': str(tmp_path / 'cache.db'), 'QUOTA_DB_PATH': str(tmp_path / 'quota.db')}
+    subprocess.run([sys.executable, '-m', 'backend.schema'], cwd=REPO_ROOT, env=env, check=True)
+    probe = ("import sys; from backend.app import create_app; create_app(['todos']); "
+             "print(','.join(m for m in ('smtplib', 'backend.mailer', 'backend.jobs') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', probe], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+def test_schema_migrates_once(todo_db):
+    from backend import schema
+    assert schema.schema_version() == 0
+    assert schema.migrate() is True
+    assert schema.schema_version() == schema.SCHEMA_VERSION
+    assert schema.migrate() is False
+    # A new process sees the stored version and skips the DDL
+    schema._migrated.discard(todo_db)
+    assert schema.migrate() is False
+
+def test_large_json_responses_are_compressed(client, monkeypatch):
+    import gzip
+    from backend import db, compression
+    monkeypatch.setattr(compression, 'PREFERENCE', ['gzip'])
+    for i in range(40):
+        db.create_todo(f"task number {i} with ünïcode")
+    plain = client.get('/api/todos')
+    assert 'Content-Encoding' not in plain.headers and plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = client.get('/api/todos', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].startswith('W/')
+    assert gzip.decompress(response.data) == plain.data
+    assert client.get('/api/todos', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    # Small bodies are not worth it
+    assert 'Content-Encoding' not in client.get('/health', headers={'Accept-Encoding': 'gzip'}).headers
+
+def test_json_provider_round_trips(client):
+    from datetime import datetime
+    app = client.application
+    payload = {"text": "ünïcode", "when": datetime(2024, 1, 2, 3, 4, 5), 1: [1.5, None, True]}
+    assert app.json.loads(app.json.dumps(payload)) == {"text": "ünïcode", "when": "Tue, 02 Jan 2024 03:04:05 GMT",
+                                                        "1": [1.5, None, True]}
+    assert app.json.loads(app.json.dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
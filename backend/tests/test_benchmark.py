@@ -0,0 +1,36 @@
+from backend import benchmark
+
+def test_benchmark_drives_the_backend_against_fake_upstreams():
+    report = benchmark.run(['health', 'weather', 'command'], requests_per_scenario=20, concurrency=4,
+                           distinct=5, latency=0.005)
+
+    for name in ('health', 'weather', 'command'):
+        result = report["scenarios"][name]
+        assert result["requests"] == 20 and result["errors"] == 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+    # Five distinct cities: everything after the first call per city is served from the cache
+    assert report["upstream_calls"]["/weather"] == 5
+
+def test_check_thresholds():
+    report = {"scenarios": {
+        "weather": {"p50_ms": 10, "p95_ms": 80, "p99_ms": 90, "error_rate": 0.0, "throughput_rps": 50},
+        "news": {"p50_ms": 10, "p95_ms": 20, "p99_ms": 30, "error_rate": 0.2, "throughput_rps": 5},
+    }}
+    thresholds = {"*": {"p95_ms": 50, "error_rate": 0.01}, "news": {"min_throughput_rps": 10}, "weather": {"p95_ms": 100}}
+    assert benchmark.check_thresholds(report, thresholds) == [
+        "news: error_rate 0.2 > 0.01",
+        "news: throughput_rps 5 < 10",
+    ]
+
+def test_measure_startup():
+    report = benchmark.measure_startup(runs=1, blueprints=['todos'], path='/api/todos')
+    startup = report["startup"]
+    assert startup["status"] == 200
+    assert startup["first_start"]["create_app_ms"] > 0
+    assert startup["import_ms"] > 0 and startup["process_ms"] > startup["import_ms"]
+
+def test_check_startup_thresholds():
+    report = {"startup": {"import_ms": 300, "create_app_ms": 40, "first_request_ms": 10}}
+    assert benchmark.check_thresholds(report, {"startup": {"import_ms": 250, "create_app_ms": 100}}) == [
+        "startup: import_ms 300 > 250",
+    ]
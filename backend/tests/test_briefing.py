@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+from app import create_app
+from backend.cache import response_cache
+from backend.routes import briefing_routes
+
+@pytest.fixture
+def client():
+    response_cache.clear()
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+    response_cache.clear()
+
+@pytest.fixture
+def slow_sources(monkeypatch):
+    release = threading.Event()
+    def fake_weather(city):
+        time.sleep(0.2)
+        return {"city": city, "temperature": 12}, 200
+    def fake_news(query, country):
+        time.sleep(0.2)
+        return {"articles": [{"title": "Headline"}]}, 200
+    def stuck_wikipedia(query):
+        release.wait(5)
+        return {"title": query, "summary": "Late."}, 200
+    monkeypatch.setattr(briefing_routes, 'fetch_weather', fake_weather)
+    monkeypatch.setattr(briefing_routes, 'fetch_news', fake_news)
+    monkeypatch.setattr(briefing_routes, 'fetch_wikipedia_summary', stuck_wikipedia)
+    yield
+    release.set()
+
+def test_morning_briefing_runs_sources_concurrently(client, slow_sources):
+    client.post('/api/todos', json={"task": "Stretch"})
+
+    started = time.perf_counter()
+    body = client.get('/briefing?city=Oslo').get_json()
+    elapsed = time.perf_counter() - started
+
+    assert [r["source"] for r in body["results"]] == ['weather', 'news', 'todos']
+    assert all(r["status"] == 200 for r in body["results"])
+    assert body["results"][0]["data"]["city"] == 'Oslo'
+    assert body["results"][2]["data"][0]["task"] == 'Stretch'
+    assert body["results"][0]["elapsed_ms"] >= 200
+    assert elapsed < 0.35  # max of the sources, not their sum
+
+def test_slow_source_times_out_with_partial_results(client, slow_sources):
+    body = client.post('/briefing', json={"requests": [
+        {"source": "weather", "params": {"city": "Oslo"}},
+        {"source": "wikipedia", "params": {"query": "Oslo"}, "timeout": 0.3},
+    ]}).get_json()
+
+    weather, wikipedia = body["results"]
+    assert weather["status"] == 200
+    assert wikipedia["status"] == 504 and "error" in wikipedia
+    assert body["elapsed_ms"] < 1000
+
+def test_todos_source_filters_by_completed(client):
+    done = client.post('/api/todos', json={"task": "Stretch"}).get_json()
+    client.post('/api/todos', json={"task": "Read"})
+    client.put(f"/api/todos/{done['id']}", json={"completed": True})
+
+    def tasks(completed):
+        body = client.post('/briefing', json={"requests": [
+            {"source": "todos", "params": {"completed": completed}}
+        ]}).get_json()
+        return [todo["task"] for todo in body["results"][0]["data"]]
+
+    assert tasks("false") == tasks(False) == ['Read']
+    assert tasks("true") == tasks(True) == ['Stretch']
+
+def test_invalid_briefing_requests(client):
+    assert client.post('/briefing', json={"requests": []}).status_code == 400
+    assert client.post('/briefing', json={"requests": [{"source": "stocks"}]}).status_code == 400
+    response = client.post('/briefing', json={"requests": [{"source": "weather"}]})
+    assert response.get_json()["error"] == "'weather' requires city"
@@ -0,0 +1,143 @@
+import threading
+import time
+import pytest
+from app import create_app
+from backend.cache import MemoryBackend, SQLiteBackend, ResponseCache, CacheEntry, response_cache
+from backend.routes import weather_routes
+
+@pytest.fixture
+def client():
+    app = create_app()
+    app.config['TESTING'] = True
+    response_cache.clear()
+    with app.test_client() as client:
+        yield client
+    response_cache.clear()
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', CacheEntry(1, 0, 10))
+    backend.set('b', CacheEntry(2, 0, 10))
+    backend.get('a')
+    backend.set('c', CacheEntry(3, 0, 10))
+    assert backend.get('b') is None
+    assert backend.get('a').value == 1
+
+def test_sqlite_backend_survives_reopen(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    SQLiteBackend(path).set('k', CacheEntry({"x": 1}, 0, 10))
+    assert SQLiteBackend(path).get('k').value == {"x": 1}
+
+def test_keys_are_normalized():
+    cache = ResponseCache(MemoryBackend(), {'weather': 60})
+    assert cache.make_key('weather', {'city': ' London '}) == cache.make_key('weather', {'city': 'london'})
+
+def test_weather_is_served_from_cache(client, monkeypatch):
+    calls = []
+    def fake_fetch(city):
+        calls.append(city)
+        return {"city": city}, 200
+    monkeypatch.setattr(weather_routes, 'fetch_weather', fake_fetch)
+
+    first = client.get('/weather?city=London')
+    second = client.get('/weather?city=london')
+    assert first.get_json() == second.get_json() == {"city": "London"}
+    assert len(calls) == 1
+    assert second.headers['Cache-Control'].startswith('public, max-age=')
+    assert 'Age' in second.headers
+    assert client.get('/health/cache').get_json()['hits'] == 1
+
+def test_errors_are_not_cached(client, monkeypatch):
+    calls = []
+    def fake_fetch(city):
+        calls.append(city)
+        return {"error": "boom"}, 503
+    monkeypatch.setattr(weather_routes, 'fetch_weather', fake_fetch)
+
+    client.get('/weather?city=Paris')
+    response = client.get('/weather?city=Paris')
+    assert response.status_code == 503
+    assert len(calls) == 2
+
+def test_concurrent_misses_share_one_upstream_call():
+    cache = ResponseCache(MemoryBackend(), {'news': 60})
+    calls = []
+    release = threading.Event()
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"articles": []}, 200
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch('news', {}, fetch))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 10
+    assert cache.stats()['coalesced'] == 9
+
+def test_stale_entry_is_served_while_refreshing():
+    cache = ResponseCache(MemoryBackend(), {'weather': 60}, {'weather': 600})
+    now = time.time()
+    cache.backend.set(cache.make_key('weather', {'city': 'oslo'}), CacheEntry({"temp": 1}, now - 120, now - 60))
+    refreshed = threading.Event()
+    def fetch():
+        refreshed.set()
+        return {"temp": 2}, 200
+
+    payload, status, _ = cache.get_or_fetch('weather', {'city': 'oslo'}, fetch)
+    assert (payload, status) == ({"temp": 1}, 200)
+    assert refreshed.wait(5)
+    for _ in range(50):
+        if cache.lookup('weather', {'city': 'oslo'}) is not None:
+            break
+        time.sleep(0.01)
+    assert cache.lookup('weather', {'city': 'oslo'}).value == {"temp": 2}
+    assert cache.stats()['stale_hits'] == 1
+
+def test_prefetch_skips_recent_misses_and_uses_short_ttl():
+    cache = ResponseCache(MemoryBackend(), {'weather': 600})
+    done = threading.Event()
+    def missing():
+        done.set()
+        return {"error": "city not found"}, 404
+
+    assert cache.prefetch('weather', {'city': 'atlantis'}, missing, ttl=30) is True
+    assert done.wait(5)
+    # A failed guess is not retried for every interim transcript
+    assert cache.prefetch('weather', {'city': 'atlantis'}, missing, ttl=30) is False
+
+    assert cache.prefetch('weather', {'city': 'oslo'}, lambda: ({"temp": 1}, 200), ttl=30) is True
+    for _ in range(50):
+        if cache.lookup('weather', {'city': 'oslo'}) is not None:
+            break
+        time.sleep(0.01)
+    entry = cache.lookup('weather', {'city': 'oslo'})
+    assert entry.expires_at - entry.stored_at == 30
+    assert cache.stats()['prefetches'] == 2
+
+def test_stale_entry_is_served_when_upstream_fails():
+    cache = ResponseCache(MemoryBackend(), {'weather': 60}, stale_if_error=600)
+    cache.backend.set(cache.make_key('weather', {'city': 'oslo'}), CacheEntry({"temp": 1}, 0, time.time() - 30))
+
+    payload, status, entry = cache.get_or_fetch('weather', {'city': 'oslo'}, lambda: ({"error": "down"}, 503))
+    assert (payload, status) == ({"temp": 1}, 200)
+    assert cache.stats()['stale_if_error_hits'] == 1
+
+    payload, status, _ = cache.get_or_fetch('weather', {'city': 'rome'}, lambda: ({"error": "down"}, 503))
+    assert status == 503
+
+def test_cached_response_is_revalidated(client, monkeypatch):
+    monkeypatch.setattr(weather_routes, 'fetch_weather', lambda city: ({"city": city}, 200))
+    first = client.get('/weather?city=London')
+    assert first.headers['ETag'] and first.headers['Last-Modified']
+
+    assert client.get('/weather?city=London', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/weather?city=London',
+                      headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+    assert client.get('/weather?city=London', headers={'If-None-Match': '"other"'}).status_code == 200
@@ -0,0 +1,149 @@
+import time
+import pytest
+from app import create_app
+from backend.cache import response_cache
+from backend.config import PREFETCH_TTL
+from backend.intents import matcher
+from backend.routes import command_routes
+from backend.utils import auth
+
+@pytest.mark.parametrize('text, intent, slots', [
+    ('Hello assistant', 'greeting', {}),
+    ('add a to-do Buy milk.', 'add_todo', {'task': 'Buy milk'}),
+    ('mark todo as complete number 2', 'complete_todo', {'number': '2'}),
+    ('what is the weather in Paris?', 'weather', {'city': 'Paris'}),
+    ('what is the news about AI', 'news', {'query': 'AI'}),
+    ('who is Ada Lovelace', 'wikipedia', {'query': 'Ada Lovelace'}),
+    ('what does ephemeral mean', 'define', {'word': 'ephemeral'}),
+    ('download youtube video https://youtu.be/AbC_12', 'download_video', {'url': 'https://youtu.be/AbC_12'}),
+    ('send an email to Bob@example.com with subject Lunch and message see you at noon', 'send_email',
+     {'recipient': 'Bob@example.com', 'subject': 'Lunch', 'body': 'see you at noon'}),
+    ('open website example dot com', 'open_website', {'query': 'example.com'}),
+    ('find coffee near me', 'maps', {'query': 'coffee'}),
+])
+def test_matcher_extracts_intent_and_slots(text, intent, slots):
+    match = matcher.match(text)
+    assert (match.intent, match.slots, match.prompt) == (intent, slots, None)
+
+def test_matcher_priority_and_prompts():
+    # The weather trigger outranks the generic "what is" Wikipedia trigger
+    assert matcher.match('so what is the weather in Oslo').intent == 'weather'
+    assert matcher.match('play').prompt == "What would you like me to play?"
+    assert matcher.match('nothing to see here') is None
+
+@pytest.mark.parametrize('text', ['what is the', 'what is the weather', 'tell me about it'])
+def test_wikipedia_ignores_the_start_of_another_command(text):
+    match = matcher.match(text)
+    assert (match.intent, match.slots) == ('wikipedia', {})
+    assert match.prompt == "What topic or person would you like to know about?"
+
+@pytest.fixture
+def client():
+    response_cache.clear()
+    command_routes._recent_prefetches.clear()
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+    response_cache.clear()
+
+def command(client, text, **kwargs):
+    return client.post('/command', json={"text": text}, **kwargs)
+
+def test_todo_commands(client):
+    response = command(client, 'add a todo water the plants')
+    assert response.status_code == 201
+    assert response.get_json()["response"] == 'Okay, I\'ve added "water the plants" to your to-do list.'
+    command(client, 'add a todo call mum')
+
+    assert command(client, 'show my todo list').get_json()["response"] == \
+        "Here are your to-do items: 1. water the plants, 2. call mum."
+
+    response = command(client, 'complete todo 2')
+    assert response.get_json()["data"]["completed"] is True
+    assert command(client, 'delete todo 1').status_code == 200
+    assert [t["task"] for t in client.get('/api/todos').get_json()] == ['call mum']
+    assert command(client, 'delete todo 5').status_code == 404
+
+def test_weather_command_shares_the_response_cache(client, monkeypatch):
+    calls = []
+    def fake_weather(city):
+        calls.append(city)
+        return {"city": "Paris", "description": "clear sky", "temperature": 21}, 200
+    monkeypatch.setattr(command_routes, 'fetch_weather', fake_weather)
+
+    body = command(client, 'what is the weather in paris').get_json()
+    assert body["intent"] == 'weather'
+    assert body["response"] == "The weather in Paris is clear sky with a temperature of 21 degrees Celsius."
+    command(client, 'What is the weather in Paris')
+    assert calls == ['paris']
+
+def test_client_side_unknown_and_protected_commands(client):
+    body = command(client, 'switch to female voice').get_json()
+    assert (body["intent"], body["response"]) == ('female_voice', None)
+
+    body = command(client, 'sing me a song').get_json()
+    assert body["intent"] is None and body["response"].startswith('I understand you said')
+
+    response = command(client, 'send an email to bob@example.com with subject hi and message see you')
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Invalid or missing API key"
+
+    assert client.post('/command', json={}).status_code == 400
+
+def test_protected_commands_share_the_endpoint_rate_limit(client, monkeypatch):
+    monkeypatch.setattr(auth, 'AUTH_API_KEY', 'test-key')
+    sent = []
+    monkeypatch.setattr(command_routes, 'queue_email',
+                        lambda *args: sent.append(args) or ({"message_id": len(sent), "status": "pending"}, 202))
+    headers = {'X-API-Key': 'test-key'}
+    text = 'send an email to bob@example.com with subject hi and message see you'
+    for _ in range(10):
+        assert command(client, text, headers=headers).status_code == 202
+    assert command(client, text, headers=headers).status_code == 429
+    assert len(sent) == 10
+    # Other intents keep their own budget, and the REST route has spent the same one
+    assert command(client, 'list my todos').status_code == 200
+    assert client.post('/send-email', headers=headers, json={
+        'recipient_email': 'bob@example.com', 'subject': 'hi', 'body': 'see you'
+    }).status_code == 429
+
+def test_prefetch_warms_the_cache_once(client, monkeypatch):
+    calls = []
+    def fake_weather(city):
+        calls.append(city)
+        return {"city": "Paris", "description": "clear sky", "temperature": 21}, 200
+    monkeypatch.setattr(command_routes, 'fetch_weather', fake_weather)
+
+    assert client.post('/prefetch', json={"text": "what is the weather in Pa"}).get_json()["prefetching"] is False
+    assert client.post('/prefetch', json={"text": "what is the weather in Paris "}).get_json()["prefetching"] is True
+    for _ in range(100):
+        if response_cache.lookup('weather', {'city': 'paris'}):
+            break
+        time.sleep(0.01)
+    assert client.post('/prefetch', json={"text": "what is the weather in paris "}).get_json()["prefetching"] is False
+    assert client.post('/prefetch', json={"text": "add a todo milk "}).get_json()["prefetching"] is False
+
+    assert command(client, 'what is the weather in Paris').status_code == 200
+    assert calls == ['Paris']
+    assert response_cache.lookup('weather', {'city': 'paris'}).expires_at <= time.time() + PREFETCH_TTL
+
+def test_prefetch_waits_for_whole_words(client, monkeypatch):
+    calls = []
+    def fake_weather(city):
+        calls.append(city)
+        return {"city": city, "description": "clear sky", "temperature": 21}, 200
+    monkeypatch.setattr(command_routes, 'fetch_weather', fake_weather)
+
+    # The recognizer spelling out a word, then revising it after the lookup started
+    for text in ("what is the weather in Par", "what is the weather in Pari", "what is the weather in Paris.",
+                 "what is the weather in Pari "):
+        client.post('/prefetch', json={"text": text})
+    # The start of the weather command is not a Wikipedia topic
+    for text in ("what is the ", "what is the weather "):
+        assert client.post('/prefetch', json={"text": text}).get_json()["prefetching"] is False
+    for _ in range(100):
+        if response_cache.lookup('weather', {'city': 'paris'}):
+            break
+        time.sleep(0.01)
+    assert calls == ['Paris']
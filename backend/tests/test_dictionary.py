@@ -0,0 +1,80 @@
+import json
+import pytest
+from app import create_app
+from backend import dictionary_store, http_client, spelling
+from backend.cache import response_cache
+
+VOCABULARY = {'apple': 500, 'banana': 300, 'cherry': 100}
+
+API_ENTRY = {
+    "word": "cherry",
+    "meanings": [
+        {"partOfSpeech": "noun", "definitions": [{"definition": "A small red stone fruit."}, {"example": "no text"}]}
+    ]
+}
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = tmp_path / 'spelling.idx'
+    spelling.build_index(VOCABULARY, str(path))
+    monkeypatch.setattr(spelling, '_engine', spelling.SymSpellEngine(str(path)))
+    response_cache.clear()
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+    response_cache.clear()
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+    def fake_get(route, url, params=None, **kwargs):
+        calls.append(url)
+        return FakeResponse([API_ENTRY])
+    monkeypatch.setattr(http_client, 'get', fake_get)
+    return calls
+
+def test_imported_words_are_served_without_the_api(client, upstream, tmp_path):
+    dump = tmp_path / 'dump.jsonl'
+    dump.write_text('\n'.join([
+        json.dumps({"word": "Apple", "definitions": [{"part_of_speech": "noun", "meanings": ["A fruit."]}]}),
+        json.dumps({"word": "banana", "meanings": [{"partOfSpeech": "noun", "definitions": [{"definition": "A long fruit."}]}]}),
+        json.dumps({"word": "banana", "meanings": [{"partOfSpeech": "verb", "definitions": [{"definition": "To go bananas."}]}]}),
+    ]))
+    assert dictionary_store.import_dump(str(dump)) == 2
+
+    data = client.get('/dictionary?word=appel').get_json()
+    assert data['corrected_word'] == 'apple'
+    assert data['definitions'] == [{"part_of_speech": "noun", "meanings": ["A fruit."]}]
+    assert [d['part_of_speech'] for d in dictionary_store.lookup('banana')] == ['noun', 'verb']
+    assert upstream == []
+
+def test_api_results_are_written_through(client, upstream):
+    data = client.get('/dictionary?word=cherry').get_json()
+    assert data['definitions'] == [{"part_of_speech": "noun", "meanings": ["A small red stone fruit."]}]
+    assert len(upstream) == 1
+    assert dictionary_store.lookup('CHERRY') == data['definitions']
+
+def test_missing_spelling_index_answers_503_without_building_it(client, upstream, tmp_path, monkeypatch):
+    missing = tmp_path / 'missing.idx'
+    monkeypatch.setattr(spelling, '_engine', None)
+    monkeypatch.setattr(spelling, 'SPELLING_ENGINE', 'symspell')
+    monkeypatch.setattr(spelling, 'SPELLING_INDEX_PATH', str(missing))
+    response = client.get('/dictionary?word=cherry')
+    assert response.status_code == 503
+    assert not missing.exists() and upstream == []
+
+    spelling.build_index(VOCABULARY, str(missing))
+    assert client.get('/dictionary?word=chery').get_json()['corrected_word'] == 'cherry'
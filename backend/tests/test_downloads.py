@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import pytest
+from app import create_app
+from backend import jobs
+from backend.routes import media_routes
+from backend.utils import auth
+
+FAKE_YTDLP = [sys.executable, os.path.join(os.path.dirname(__file__), 'fakes', 'fake_yt_dlp.py')]
+HEADERS = {'X-API-Key': 'test-key'}
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'YTDLP_COMMAND', FAKE_YTDLP)
+    monkeypatch.setattr(jobs, 'DOWNLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(media_routes, 'DOWNLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(auth, 'AUTH_API_KEY', 'test-key')
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f'/youtube/download/{job_id}').get_json()
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_download_returns_job_and_completes(client, tmp_path):
+    response = client.post('/youtube/download', json={'url': 'https://www.youtube.com/watch?v=abc123'}, headers=HEADERS)
+    assert response.status_code == 202
+    job = wait_for_job(client, response.get_json()['job_id'])
+    assert job['status'] == 'completed'
+    assert job['progress'] == 100
+    assert job['download_link'] == f"/downloads/{job['filename']}"
+    assert (tmp_path / job['filename']).exists()
+
+def test_failed_download_reports_error(client, monkeypatch):
+    monkeypatch.setenv('FAKE_YTDLP_FAIL', '1')
+    response = client.post('/youtube/download', json={'url': 'https://youtu.be/abc123'}, headers=HEADERS)
+    job = wait_for_job(client, response.get_json()['job_id'])
+    assert job['status'] == 'failed'
+    assert 'video unavailable' in job['error']
+
+def test_queued_jobs_resume_after_restart(client):
+    # The lease of 'orphan' ran out; 'elsewhere' is still being renewed by a worker on another host
+    with jobs.db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO download_jobs (id, url, status, progress, owner, lease_expires_at, created_at, updated_at) "
+            "VALUES (?, 'https://youtu.be/xyz', 'running', 40, 'other-host:1', ?, 'now', 'now')",
+            [('orphan', time.time() - 1), ('elsewhere', time.time() + 60)]
+        )
+    jobs.download_jobs.resume_pending()
+    assert wait_for_job(client, 'orphan')['status'] == 'completed'
+    assert jobs.download_jobs.get('elsewhere')['status'] == 'running'
+
+def test_running_jobs_renew_their_lease(client, monkeypatch):
+    monkeypatch.setattr(jobs.db, 'JOB_LEASE_SECONDS', 0.3)
+    monkeypatch.setenv('FAKE_YTDLP_DELAY', '0.2')
+    job_id = client.post('/youtube/download', json={'url': 'https://youtu.be/lease1'}, headers=HEADERS).get_json()['job_id']
+    time.sleep(0.05)
+    with jobs.db.get_connection() as conn:
+        claimed = conn.execute('SELECT lease_expires_at FROM download_jobs WHERE id = ?', (job_id,)).fetchone()[0]
+    time.sleep(0.4)
+    with jobs.db.get_connection() as conn:
+        renewed = conn.execute('SELECT lease_expires_at FROM download_jobs WHERE id = ?', (job_id,)).fetchone()[0]
+    assert renewed > claimed
+    assert wait_for_job(client, job_id)['status'] == 'completed'
+
+def test_unknown_job_and_auth(client):
+    assert client.get('/youtube/download/missing').status_code == 404
+    assert client.post('/youtube/download', json={'url': 'https://youtu.be/abc'}).status_code == 401
+
+def test_repeat_download_is_served_from_disk(client):
+    url = 'https://www.youtube.com/watch?v=dedup1'
+    first = client.post('/youtube/download', json={'url': url}, headers=HEADERS).get_json()
+    job = wait_for_job(client, first['job_id'])
+    response = client.post('/youtube/download', json={'url': 'https://youtu.be/dedup1'}, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.get_json()['download_link'] == job['download_link']
+
+def test_concurrent_requests_share_a_job(client, monkeypatch):
+    monkeypatch.setenv('FAKE_YTDLP_DELAY', '0.1')
+    url = 'https://www.youtube.com/watch?v=shared1'
+    first = client.post('/youtube/download', json={'url': url}, headers=HEADERS).get_json()
+    second = client.post('/youtube/download', json={'url': url}, headers=HEADERS).get_json()
+    assert first['job_id'] == second['job_id']
+    wait_for_job(client, first['job_id'])
+
+def test_storage_limit_evicts_least_recently_used(client, tmp_path):
+    finished = []
+    for video_id in ('lru1', 'lru2'):
+        response = client.post('/youtube/download', json={'url': f'https://youtu.be/{video_id}'}, headers=HEADERS)
+        finished.append(wait_for_job(client, response.get_json()['job_id']))
+    assert client.get(finished[0]['download_link']).status_code == 200
+
+    assert jobs.enforce_storage_limits(max_bytes=1024) == [finished[1]['filename']]
+    assert not (tmp_path / finished[1]['filename']).exists()
+    assert client.get(f"/youtube/download/{finished[1]['job_id']}").get_json()['status'] == 'expired'
+    assert (tmp_path / finished[0]['filename']).exists()
+
+def test_media_supports_ranges_and_validators(client, tmp_path):
+    (tmp_path / 'clip.mp4').write_bytes(bytes(range(256)) * 4)
+    full = client.get('/downloads/clip.mp4')
+    assert full.status_code == 200
+    assert full.mimetype == 'video/mp4'
+    assert full.headers['Accept-Ranges'] == 'bytes'
+    etag = full.headers['ETag']
+    assert not etag.startswith('W/')
+
+    part = client.get('/downloads/clip.mp4', headers={'Range': 'bytes=100-199'})
+    assert part.status_code == 206
+    assert part.headers['Content-Range'] == 'bytes 100-199/1024'
+    assert part.data == bytes(range(100, 200))
+    assert client.get('/downloads/clip.mp4', headers={'Range': 'bytes=1000-'}).data == bytes(range(232, 256))
+
+    assert client.get('/downloads/clip.mp4', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/downloads/clip.mp4', headers={'Range': 'bytes=0-9', 'If-Range': etag}).status_code == 206
+    stale = client.get('/downloads/clip.mp4', headers={'Range': 'bytes=0-9', 'If-Range': '"0-0"'})
+    assert stale.status_code == 200 and len(stale.data) == 1024
+    unsatisfiable = client.get('/downloads/clip.mp4', headers={'Range': 'bytes=5000-'})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers['Content-Range'] == 'bytes */1024'
+
+    assert client.get('/downloads/missing.mp4').status_code == 404
+    assert client.get('/downloads/..%2Ftodos.db').status_code == 404
+
+def test_media_can_be_handed_to_nginx(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(media_routes, 'MEDIA_SERVE_MODE', 'x-accel')
+    (tmp_path / 'clip.mp4').write_bytes(b'x' * 10)
+    response = client.get('/downloads/clip.mp4', headers={'Range': 'bytes=0-4'})
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == '/protected-downloads/clip.mp4'
+    assert response.data == b''
@@ -0,0 +1,83 @@
+import time
+from functools import partial
+import pytest
+from app import create_app
+from backend import mailer
+from backend.routes import email_routes
+from backend.utils import auth
+from fakes.smtp_server import FakeSMTPServer
+
+HEADERS = {'X-API-Key': 'test-key'}
+
+@pytest.fixture
+def smtp_server():
+    server = FakeSMTPServer().start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def queue(smtp_server, monkeypatch):
+    session = partial(mailer.SMTPSession, host='127.0.0.1', port=smtp_server.server_address[1],
+                      username='sender@example.com', password='secret', starttls=False)
+    queue = mailer.MailQueue(session_factory=session, max_attempts=3, retry_backoff=0)
+    monkeypatch.setattr(email_routes, 'mail_queue', queue)
+    yield queue
+    queue.stop()
+
+@pytest.fixture
+def client(queue, monkeypatch):
+    monkeypatch.setattr(auth, 'AUTH_API_KEY', 'test-key')
+    monkeypatch.setattr(email_routes, 'SENDER_EMAIL', 'sender@example.com')
+    monkeypatch.setattr(email_routes, 'SENDER_PASSWORD', 'secret')
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def send(client, n):
+    response = client.post('/send-email', headers=HEADERS, json={
+        'recipient_email': f'user{n}@example.com', 'subject': f'Hello {n}', 'body': 'Hi there'
+    })
+    assert response.status_code == 202
+    return response.get_json()['message_id']
+
+def wait_for_message(client, message_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        message = client.get(f'/send-email/{message_id}', headers=HEADERS).get_json()
+        if message['status'] in ('sent', 'failed'):
+            return message
+        time.sleep(0.02)
+    raise AssertionError(f"email {message_id} was not delivered")
+
+def test_messages_share_one_authenticated_session(client, smtp_server):
+    message_ids = [send(client, n) for n in range(5)]
+    for message_id in message_ids:
+        assert wait_for_message(client, message_id)['status'] == 'sent'
+    assert sorted(m['to'][0] for m in smtp_server.messages) == [f'user{n}@example.com' for n in range(5)]
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+
+def test_transient_failures_are_retried(client, smtp_server):
+    smtp_server.fail_next = ['451 4.3.0 try again later']
+    message = wait_for_message(client, send(client, 1))
+    assert message['status'] == 'sent'
+    assert message['attempts'] == 2
+
+def test_permanent_failures_are_not_retried(client, smtp_server):
+    smtp_server.fail_next = ['550 5.7.1 sender rejected']
+    message = wait_for_message(client, send(client, 1))
+    assert message['status'] == 'failed'
+    assert message['attempts'] == 1
+    assert '550' in message['error']
+
+def test_idle_session_is_reopened(client, smtp_server, queue):
+    queue._session_factory = partial(queue._session_factory, idle_timeout=0.05)
+    queue.stop()
+    wait_for_message(client, send(client, 1))
+    time.sleep(0.2)
+    wait_for_message(client, send(client, 2))
+    assert smtp_server.connections == 2
+
+def test_unknown_message(client):
+    assert client.get('/send-email/missing', headers=HEADERS).status_code == 404
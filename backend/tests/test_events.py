@@ -0,0 +1,83 @@
+import json
+import time
+import pytest
+from app import create_app
+from backend import db
+from backend.events import broker, Event, Subscriber
+from backend.utils import auth
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(broker, 'poll_interval', 0.02)
+    monkeypatch.setattr(broker, 'heartbeat', 0.2)
+    monkeypatch.setattr(auth, 'AUTH_API_KEY', 'test-key')
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def next_event(frames, timeout=5):
+    # -> (event, id, data) of the next frame that is not a comment or retry hint
+    deadline = time.time() + timeout
+    for chunk in frames:
+        fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n') if not line.startswith(':'))
+        if 'event' in fields:
+            return fields['event'], int(fields['id']), json.loads(fields['data'])
+        assert time.time() < deadline, "no event before the deadline"
+
+def test_todo_changes_are_pushed(client):
+    response = client.get('/events', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    frames = iter(response.response)
+    try:
+        assert next_event(frames)[0] == 'ready'
+        todo = db.create_todo('buy milk')
+        event, _, data = next_event(frames)
+        assert event == 'todos'
+        assert data['changed'] == [todo] and data['deleted'] == []
+
+        db.update_todo(todo['id'], completed=True)
+        assert next_event(frames)[2]['changed'][0]['completed'] is True
+        db.delete_todo(todo['id'])
+        assert next_event(frames)[2]['deleted'] == [todo['id']]
+    finally:
+        response.close()
+    assert broker.subscriber_count() == 0
+
+def test_reconnect_replays_missed_events(client):
+    first = db.create_todo('one')
+    db.create_todo('two')
+    response = client.get('/events', headers={'Last-Event-ID': '0'}, buffered=False)
+    frames = iter(response.response)
+    try:
+        event, event_id, data = next_event(frames)
+        assert (event, data['changed'][0]['id']) == ('todos', first['id'])
+        assert next_event(frames)[1] == event_id + 1
+    finally:
+        response.close()
+
+def test_pruned_history_sends_reset(client):
+    db.create_todo('one')
+    db.create_todo('two')
+    db.prune_events(-1)
+    response = client.get('/events?last_event_id=1', buffered=False)
+    try:
+        assert next_event(iter(response.response))[0] == 'reset'
+    finally:
+        response.close()
+
+def test_protected_topics_need_an_api_key(client):
+    assert client.get('/events?topics=emails').status_code == 401
+    assert client.get('/events?topics=downloads').status_code == 401
+    assert client.get('/events?topics=weather').status_code == 400
+    response = client.get('/events?topics=emails', headers={'X-API-Key': 'test-key'}, buffered=False)
+    assert response.status_code == 200
+    response.close()
+
+def test_subscriber_that_falls_behind_is_disconnected():
+    subscriber = Subscriber(['todos'], buffer_size=2)
+    for event_id in range(1, 4):
+        subscriber.offer(Event(event_id, 'todos', None, ''))
+    assert subscriber.overflowed
+    assert subscriber.wants('todos', None)
+    assert not Subscriber(['downloads'], ['job1']).wants('downloads', 'job2')
@@ -0,0 +1,99 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from backend import http_client
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    calls = 0
+
+    def do_GET(self):
+        FlakyHandler.calls += 1
+        status = 503 if FlakyHandler.calls == 1 else 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def upstream():
+    FlakyHandler.calls = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+def test_session_is_shared():
+    assert http_client.get_session() is http_client.get_session()
+
+def test_per_route_timeouts():
+    assert http_client.get_timeout('dictionary') == (http_client.HTTP_CONNECT_TIMEOUT, 10)
+    assert http_client.get_timeout('unknown')[1] == http_client.DEFAULT_READ_TIMEOUT
+
+def test_get_retries_gateway_errors(upstream, monkeypatch):
+    monkeypatch.setattr(http_client, 'HTTP_RETRY_BACKOFF', 0)
+    http_client.close_session()
+    try:
+        response = http_client.get('weather', upstream)
+        assert response.status_code == 200
+        assert FlakyHandler.calls == 2
+    finally:
+        http_client.close_session()
+
+class FakeClock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_circuit_breaker_opens_and_recovers_through_half_open():
+    clock = FakeClock()
+    breaker = http_client.CircuitBreaker(window=10, min_calls=4, failure_ratio=0.5, slow_call_seconds=1,
+                                         open_seconds=30, clock=clock)
+    for failed in (False, True, False):
+        assert breaker.allow()
+        breaker.record(failed)
+    assert breaker.state == breaker.CLOSED
+    assert breaker.allow()
+    breaker.record(False, duration=2)  # slow calls count as failures
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 31
+    assert breaker.allow()
+    assert not breaker.allow()  # a single trial call at a time
+    breaker.record(True)
+    assert breaker.state == breaker.OPEN
+
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == breaker.CLOSED
+    assert breaker.stats()['opens'] == 2
+
+def test_open_circuit_fails_fast_without_calling_upstream(upstream):
+    http_client.reset_upstreams()
+    try:
+        breaker = http_client.get_upstream('news').breaker
+        for _ in range(breaker.min_calls):
+            breaker.record(True)
+        with pytest.raises(http_client.UpstreamRejectedError) as excinfo:
+            http_client.get('news', upstream)
+        assert isinstance(excinfo.value, http_client.requests.exceptions.ConnectionError)
+        assert FlakyHandler.calls == 0
+    finally:
+        http_client.reset_upstreams()
+
+def test_read_timeout_adapts_to_observed_latency():
+    tracker = http_client.LatencyTracker(size=100, min_samples=10, multiplier=3, floor=0.5)
+    assert tracker.read_timeout(30) == 30
+    for _ in range(10):
+        tracker.record(0.4)
+    assert tracker.read_timeout(30) == pytest.approx(1.2)
+    assert tracker.read_timeout(1) == 1
+    tracker.record(20)
+    assert tracker.read_timeout(30) == 30
@@ -0,0 +1,67 @@
+import json
+import pytest
+from app import create_app
+from backend import metrics
+from backend.metrics import Registry
+
+@pytest.fixture
+def client():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def sample(text, line_prefix):
+    return next(float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(line_prefix))
+
+def test_metrics_endpoint_reports_routes_sqlite_and_cache(client):
+    before = client.get('/metrics').get_data(as_text=True)
+    client.post('/api/todos', json={"task": "Measure"})
+    client.get('/api/todos/does-not-exist/nothing')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    created = 'http_requests_total{route="/api/todos",method="POST",status="201"}'
+    assert sample(text, created) == 1 + (sample(before, created) if created in before else 0)
+    assert 'http_requests_total{route="unmatched",method="GET",status="404"}' in text
+    assert 'http_request_duration_seconds_bucket{route="/api/todos",method="POST",le="+Inf"}' in text
+    assert sample(text, 'sqlite_transaction_duration_seconds_count') > 0
+    assert 'cache_events_total{cache="response",result="hits"}' in text
+    # The /metrics request itself is the only one in flight while rendering
+    assert sample(text, 'http_requests_in_flight') == 1
+
+def test_upstream_timing_by_outcome():
+    with metrics.time_upstream('test-api') as call:
+        call.outcome = '200'
+    with pytest.raises(TimeoutError):
+        with metrics.time_upstream('test-api'):
+            raise TimeoutError()
+
+    text = metrics.registry.render()
+    assert 'upstream_request_duration_seconds_count{upstream="test-api",outcome="200"} 1' in text
+    assert 'upstream_request_duration_seconds_count{upstream="test-api",outcome="TimeoutError"} 1' in text
+
+def test_registry_merges_worker_snapshots(tmp_path):
+    registry = Registry(str(tmp_path))
+    requests_total = registry.counter('requests_total', 'Requests', ('route',))
+    in_flight = registry.gauge('in_flight', 'In flight')
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1))
+    requests_total.inc(route='/a')
+    in_flight.inc()
+    latency.observe(0.05)
+
+    # A worker that has exited: its counters still count, its gauges do not
+    dead_worker = {
+        'requests_total': [[['/a'], 2]],
+        'in_flight': [[[], 5]],
+        'latency_seconds': [[[], [0, 1, 0, 0.5]]],
+    }
+    (tmp_path / 'metrics_999999999.json').write_text(json.dumps(dead_worker))
+
+    text = registry.render()
+    assert 'requests_total{route="/a"} 3' in text
+    assert 'in_flight 1' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_count 2' in text
+    assert 'latency_seconds_sum 0.55' in text
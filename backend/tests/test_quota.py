@@ -0,0 +1,64 @@
+import time
+import pytest
+from backend import db, http_client, quota
+from backend.cache import CacheEntry, MemoryBackend, ResponseCache
+
+@pytest.fixture
+def budgets(monkeypatch):
+    # news: 40 calls a day, bucket of 10
+    monkeypatch.setattr(quota, 'budgets', quota.build_budgets({'news': 40}, {}, burst_fraction=0.25))
+    quota._levels.clear()
+    yield quota.budgets
+    quota._levels.clear()
+
+def test_budget_is_a_refilling_token_bucket(budgets):
+    now = time.time()
+    assert all(quota.spend('news', now) for _ in range(10))
+    assert not quota.spend('news', now)
+    assert quota.is_low('news')
+    # One call's worth comes back every day / 40
+    assert quota.spend('news', now + quota.DAY / 40)
+    assert quota.spend('weather', now), "unmetered providers are never refused"
+
+def test_spent_budget_rejects_without_calling_upstream(budgets):
+    quota.drain('news')
+    with pytest.raises(http_client.UpstreamRejectedError) as excinfo:
+        http_client.get('news', 'http://127.0.0.1:9/unreachable')
+    assert excinfo.value.reason == 'quota exhausted'
+    assert quota.stats()['news']['remaining'] < 1
+
+def test_low_budget_serves_stale_entries_instead_of_fetching():
+    low = {'news': False}
+    cache = ResponseCache(MemoryBackend(), {'news': 60}, stale_if_error=3600, conserve=lambda endpoint: low[endpoint])
+    now = time.time()
+    cache.backend.set(cache.make_key('news', {'query': 'x'}), CacheEntry({"articles": ["old"]}, now - 600, now - 300))
+    calls = []
+    def fetch():
+        calls.append(1)
+        return {"articles": ["new"]}, 200
+
+    low['news'] = True
+    assert cache.get_or_fetch('news', {'query': 'x'}, fetch)[0] == {"articles": ["old"]}
+    assert calls == [] and cache.quota_stale_hits == 1
+    low['news'] = False
+    assert cache.get_or_fetch('news', {'query': 'x'}, fetch)[0] == {"articles": ["new"]}
+    assert calls == [1]
+
+def test_rate_limit_counters_are_shared_between_workers():
+    first, second = quota.SQLiteStorage('sqlite://'), quota.SQLiteStorage('sqlite://')
+    assert first.incr('client', 60) == 1
+    assert second.incr('client', 60) == 2
+    assert first.get('client') == 2 and second.get_expiry('client') > time.time()
+    # An ended window starts over
+    assert first.incr('short', -1) == 1 and first.incr('short', 60) == 1
+    second.clear('client')
+    assert first.get('client') == 0
+
+def test_counters_do_not_wait_on_the_todo_database(budgets):
+    # A long todo write holds the todo database's lock; budgets and limits live in another file
+    with db.get_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        started = time.monotonic()
+        assert quota.spend('news')
+        assert quota.SQLiteStorage('sqlite://').incr('client', 60) == 1
+        assert time.monotonic() - started < 0.5
@@ -0,0 +1,49 @@
+import itertools
+import pytest
+from spellchecker import SpellChecker
+from backend import spelling
+
+VOCABULARY = {
+    'the': 5000, 'their': 900, 'there': 1200, 'these': 700, 'three': 400, 'help': 300, 'hello': 250,
+    'held': 120, 'spelling': 40, 'definitely': 60, 'receive': 80, 'accommodate': 15, 'café': 12,
+    'international': 90, 'internal': 110, 'interval': 70, 'abc': 5, 'bac': 5, 'cab': 3
+}
+
+def single_edits(word, letters):
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    return ({left + right[1:] for left, right in splits if right}
+            | {left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1}
+            | {left + c + right[1:] for left, right in splits if right for c in letters}
+            | {left + c + right for left, right in splits for c in letters})
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / 'spelling.idx'
+    spelling.build_index(VOCABULARY, str(path))
+    engine = spelling.SymSpellEngine(str(path))
+    yield engine
+    engine.close()
+
+def test_edit_distance_matches_stacked_single_edits():
+    words = [''.join(p) for n in range(5) for p in itertools.product('abc', repeat=n)]
+    for a in words:
+        one = single_edits(a, 'abc')
+        two = set().union(*(single_edits(w, 'abc') for w in one))
+        for b in words:
+            expected = 0 if a == b else 1 if b in one else 2 if b in two else 3
+            assert spelling.edit_distance(a, b) == expected, (a, b)
+
+def test_corrections_match_pyspellchecker(engine):
+    spell = SpellChecker(language=None)
+    spell.word_frequency.load_json(VOCABULARY)
+    samples = ['teh', 'thier', 'helo', 'speling', 'definately', 'recieve', 'acommodate', 'cafe',
+               'internationl', 'intrval', 'Hello', 'xyzzy', '42', 'ab', 'thre', 'ca']
+    for word in samples:
+        assert engine.correction(word) == spell.correction(word), word
+
+def test_correction_cache_and_known_words(engine):
+    assert engine.known('Their')
+    assert not engine.known('thier')
+    engine.correction('thier')
+    engine.correction('thier')
+    assert engine.correction.cache_info().hits == 1
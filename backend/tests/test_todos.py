@@ -0,0 +1,147 @@
+import threading
+import pytest
+from app import create_app
+from backend import db
+
+@pytest.fixture
+def client():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_todo_crud(client):
+    created = client.post('/api/todos', json={'task': ' buy milk '})
+    assert created.status_code == 201
+    todo = created.get_json()
+    assert todo['task'] == 'buy milk'
+
+    assert client.put(f"/api/todos/{todo['id']}", json={'completed': True}).status_code == 200
+    todos = client.get('/api/todos').get_json()
+    assert todos == [dict(todo, completed=True)]
+
+    assert client.delete(f"/api/todos/{todo['id']}").status_code == 200
+    assert client.delete(f"/api/todos/{todo['id']}").status_code == 404
+    assert client.put('/api/todos/missing', json={'task': 'x'}).status_code == 404
+
+def test_connections_use_wal_and_are_reused():
+    db.init_db()
+    with db.get_connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        first = conn
+    with db.get_connection() as conn:
+        assert conn is first
+
+def test_concurrent_writers():
+    db.init_db()
+    threads = [threading.Thread(target=db.create_todo, args=(f"task {i}",)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(db.get_all_todos()) == 20
+
+def test_bulk_operations(client):
+    created = client.post('/api/todos/bulk', json={'tasks': ['a', '', 'b', 'c']})
+    assert created.status_code == 201
+    results = created.get_json()['results']
+    assert [r['status'] for r in results] == ['created', 'invalid', 'created', 'created']
+    ids = [r['todo']['id'] for r in results if r['status'] == 'created']
+
+    updated = client.put('/api/todos/bulk', json={'updates': [
+        {'id': ids[0], 'completed': True}, {'id': ids[1], 'completed': True}, {'id': 'missing', 'completed': True}
+    ]}).get_json()['results']
+    assert [r['status'] for r in updated] == ['updated', 'updated', 'not_found']
+
+    mixed = client.put('/api/todos/bulk', json={'updates': [
+        {'id': ids[2], 'task': 5}, {'id': ids[2], 'completed': 'yes'}, {'id': ids[2], 'task': ' renamed '}
+    ]})
+    assert mixed.status_code == 200
+    assert [r['status'] for r in mixed.get_json()['results']] == ['invalid', 'invalid', 'updated']
+
+    cleared = client.delete('/api/todos/completed').get_json()
+    assert sorted(cleared['deleted']) == sorted(ids[:2])
+
+    deleted = client.delete('/api/todos/bulk', json={'ids': [ids[2], ids[0]]}).get_json()['results']
+    assert [r['status'] for r in deleted] == ['deleted', 'not_found']
+    assert client.get('/api/todos').get_json() == []
+
+def test_bulk_rejects_bad_payloads(client):
+    assert client.post('/api/todos/bulk', json={'tasks': []}).status_code == 400
+    assert client.delete('/api/todos/bulk', json={}).status_code == 400
+
+def test_keyset_pagination_and_filter(client):
+    client.post('/api/todos/bulk', json={'tasks': [f"task {i}" for i in range(5)]})
+    first = client.get('/api/todos?limit=2').get_json()
+    second = client.get(f"/api/todos?limit=2&cursor={first['next_cursor']}").get_json()
+    third = client.get(f"/api/todos?limit=2&cursor={second['next_cursor']}").get_json()
+    ids = [t['id'] for page in (first, second, third) for t in page['todos']]
+    assert ids == [t['id'] for t in client.get('/api/todos').get_json()]
+    assert third['next_cursor'] is None
+
+    client.put(f"/api/todos/{ids[0]}", json={'completed': True})
+    assert [t['id'] for t in client.get('/api/todos?completed=true').get_json()] == [ids[0]]
+    assert client.get('/api/todos?limit=2&cursor=bogus').status_code == 400
+
+def test_delta_sync(client):
+    keep = client.post('/api/todos', json={'task': 'keep'}).get_json()
+    drop = client.post('/api/todos', json={'task': 'drop'}).get_json()
+    initial = client.get('/api/todos?since=0').get_json()
+    assert {t['id'] for t in initial['changed']} == {keep['id'], drop['id']}
+
+    client.put(f"/api/todos/{keep['id']}", json={'completed': True})
+    client.delete(f"/api/todos/{drop['id']}")
+    delta = client.get(f"/api/todos?since={initial['version']}").get_json()
+    assert [t['id'] for t in delta['changed']] == [keep['id']]
+    assert delta['deleted'] == [drop['id']]
+    assert client.get(f"/api/todos?since={delta['version']}").get_json()['changed'] == []
+
+def test_migrates_legacy_table(todo_db):
+    import sqlite3
+    conn = sqlite3.connect(todo_db)
+    conn.execute('CREATE TABLE todos (id TEXT PRIMARY KEY, task TEXT NOT NULL, completed BOOLEAN DEFAULT 0, created_at TEXT NOT NULL)')
+    conn.execute("INSERT INTO todos VALUES ('old', 'legacy', 0, '2024-01-01T00:00:00Z')")
+    conn.commit()
+    conn.close()
+    db.init_db()
+    assert [t['id'] for t in db.get_todo_changes(0)['changed']] == ['old']
+
+def test_full_text_search_ranks_and_tracks_writes(client):
+    created = client.post('/api/todos/bulk', json={'tasks': [
+        'buy milk and eggs', 'call the plumber', 'buy a birthday present for mom', 'walk the dog'
+    ]}).get_json()['results']
+    ids = {r['todo']['task']: r['todo']['id'] for r in created}
+
+    results = client.get('/api/todos/search?q=buy milk').get_json()['results']
+    assert results[0]['id'] == ids['buy milk and eggs']
+    assert ids['buy a birthday present for mom'] in [r['id'] for r in results]
+
+    client.put(f"/api/todos/{ids['walk the dog']}", json={'task': 'walk the cat'})
+    assert client.get('/api/todos/search?q=dog').get_json()['results'] == []
+    assert client.get('/api/todos/search?q=cat').get_json()['results'][0]['id'] == ids['walk the dog']
+
+    client.delete(f"/api/todos/{ids['call the plumber']}")
+    assert client.get('/api/todos/search?q=plumber').get_json()['results'] == []
+    assert client.get('/api/todos/search').status_code == 400
+
+def test_list_is_revalidated_by_etag(client):
+    client.post('/api/todos', json={'task': 'one'})
+    first = client.get('/api/todos')
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    assert client.get('/api/todos', headers={'If-None-Match': etag}).status_code == 304
+    client.post('/api/todos', json={'task': 'two'})
+    changed = client.get('/api/todos', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and len(changed.get_json()) == 2
+    assert changed.headers['ETag'] != etag
+
+    # Another filter is another list, even at the same version
+    current = changed.headers['ETag']
+    assert client.get('/api/todos?completed=false', headers={'If-None-Match': current}).status_code == 200
+
+def test_list_is_revalidated_by_last_modified(client):
+    client.post('/api/todos', json={'task': 'one'})
+    last_modified = client.get('/api/todos').headers['Last-Modified']
+    assert client.get('/api/todos', headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get('/api/todos', headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'}).status_code == 200
@@ -0,0 +1,85 @@
+import pytest
+from app import create_app
+from backend import http_client
+from backend.cache import response_cache
+from backend.routes import wikipedia_routes
+from backend.wikipedia_service import WikipediaService, truncate_summary
+
+PAGES = {
+    'Albert Einstein': 'Albert Einstein was a physicist. He developed relativity. He won a Nobel Prize.',
+    'Python (programming language)': 'Python is a programming language. It is popular.',
+}
+REDIRECTS = {'Einstein': 'Albert Einstein'}
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+def page(title):
+    if title not in PAGES:
+        return {"title": title, "missing": True}
+    return {"title": title, "extract": PAGES[title], "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"}
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+    def fake_get(route, url, params=None, **kwargs):
+        calls.append(params)
+        if 'gsrsearch' in params:
+            matches = [t for t in PAGES if params['gsrsearch'].lower() in t.lower()]
+            return FakeResponse({"query": {"pages": [page(t) for t in matches[:1]]}} if matches else {})
+        titles = params['titles'].split('|')
+        normalized = [{"from": t, "to": t[0].upper() + t[1:]} for t in titles if t[0].islower()]
+        names = [t[0].upper() + t[1:] for t in titles]
+        redirects = [{"from": t, "to": REDIRECTS[t]} for t in names if t in REDIRECTS]
+        targets = dict.fromkeys(REDIRECTS.get(t, t) for t in names)
+        return FakeResponse({"query": {"normalized": normalized, "redirects": redirects,
+                                       "pages": [page(t) for t in targets]}})
+    monkeypatch.setattr(http_client, 'get', fake_get)
+    return calls
+
+@pytest.fixture
+def client(upstream, monkeypatch):
+    monkeypatch.setattr(wikipedia_routes, 'wikipedia_service', WikipediaService())
+    response_cache.clear()
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+    response_cache.clear()
+
+def test_truncate_summary():
+    assert truncate_summary('One. Two. Three.') == 'One. Two.'
+    assert truncate_summary('No full stop') == 'No full stop'
+    assert truncate_summary('x' * 600) == 'x' * 500 + '...'
+
+def test_redirects_share_one_summary(client, upstream):
+    data = client.get('/wikipedia?query=einstein').get_json()
+    assert data['title'] == 'Albert Einstein'
+    assert data['summary'] == 'Albert Einstein was a physicist. He developed relativity.'
+    assert len(upstream) == 1
+    summary, status = wikipedia_routes.wikipedia_service.lookup('EINSTEIN ')
+    assert (summary['title'], status) == ('Albert Einstein', 200)
+    assert len(upstream) == 1
+
+def test_missing_title_falls_back_to_search(client, upstream):
+    data = client.get('/wikipedia?query=python').get_json()
+    assert data['title'] == 'Python (programming language)'
+    assert len(upstream) == 2
+    assert client.get('/wikipedia?query=nothing like it').status_code == 404
+
+def test_batch_resolves_titles_in_one_call(client, upstream):
+    response = client.get('/wikipedia/batch?query=Einstein&query=Albert Einstein&query=zzz')
+    results = response.get_json()['results']
+    assert [r['status'] for r in results] == [200, 200, 404]
+    assert results[0]['title'] == results[1]['title'] == 'Albert Einstein'
+    assert len([c for c in upstream if 'titles' in c]) == 1
+    assert client.post('/wikipedia/batch', json={'queries': []}).status_code == 400
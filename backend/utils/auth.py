@@ -2,11 +2,14 @@ from functools import wraps
 from flask import request, jsonify
 from backend.config import AUTH_API_KEY
 
+def has_valid_api_key():
+    api_key = request.headers.get('X-API-Key')
+    return bool(api_key) and api_key == AUTH_API_KEY
+
 def require_api_key(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        api_key = request.headers.get('X-API-Key')
-        if not api_key or api_key != AUTH_API_KEY:
+        if not has_valid_api_key():
             return jsonify({"error": "Invalid or missing API key"}), 401
         return f(*args, **kwargs)
     return decorated_function
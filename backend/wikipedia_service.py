@@ -0,0 +1,148 @@
+import time
+import requests
+from backend import http_client
+from backend.cache import CacheEntry, MemoryBackend
+from backend.config import logger, BASE_WIKIPEDIA_API_URL, CACHE_TTLS, WIKIPEDIA_CACHE_SIZE
+
+SUMMARY_MAX_CHARS = 500
+TITLES_PER_REQUEST = 20  # the extracts module returns intros for at most 20 pages per call
+
+PAGE_PARAMS = {
+    'action': 'query',
+    'format': 'json',
+    'formatversion': 2,
+    'redirects': 1,
+    'prop': 'extracts|info',
+    'exintro': 1,
+    'explaintext': 1,
+    'exlimit': 'max',
+    'inprop': 'url',
+}
+
+def truncate_summary(text):
+    # First two sentences, capped at SUMMARY_MAX_CHARS
+    sentences = text.split('.')
+    summary = '.'.join(sentences[:2]) + '.' if len(sentences) > 2 else text
+    if len(summary) > SUMMARY_MAX_CHARS:
+        summary = summary[:SUMMARY_MAX_CHARS] + "..."
+    return summary
+
+def _query_key(query):
+    return ' '.join(query.split()).lower()
+
+def _follow(title, mapping):
+    seen = set()
+    while title in mapping and title not in seen:
+        seen.add(title)
+        title = mapping[title]
+    return title
+
+class WikipediaService:
+    """Long-lived Wikipedia client on the shared HTTP session.
+
+    Resolves queries with the MediaWiki query API, which follows redirects and
+    returns intro extracts for up to 20 titles in one call, and falls back to a
+    single full-text search call for queries that are not page titles. Resolved
+    titles (query -> canonical title) and truncated summaries are cached
+    separately, so different phrasings of the same page share one summary.
+    """
+
+    def __init__(self, api_url=BASE_WIKIPEDIA_API_URL, cache_size=WIKIPEDIA_CACHE_SIZE, ttl=CACHE_TTLS['wikipedia']):
+        self.api_url = api_url
+        self.ttl = ttl
+        self.titles = MemoryBackend(cache_size)
+        self.summaries = MemoryBackend(cache_size)
+
+    def _cached(self, backend, key):
+        entry = backend.get(key)
+        if entry is None or entry.expires_at <= time.time():
+            return None
+        return entry.value
+
+    def _remember(self, backend, key, value):
+        now = time.time()
+        backend.set(key, CacheEntry(value, now, now + self.ttl))
+
+    def _call(self, params):
+        response = http_client.get('wikipedia', self.api_url, params={**PAGE_PARAMS, **params})
+        response.raise_for_status()
+        return response.json().get('query', {})
+
+    def _store_pages(self, pages):
+        found = {}
+        for page in pages:
+            if page.get('missing') or page.get('invalid') or not page.get('extract'):
+                continue
+            summary = {
+                "title": page['title'],
+                "summary": truncate_summary(page['extract']),
+                "full_url": page.get('fullurl')
+            }
+            self._remember(self.summaries, page['title'], summary)
+            found[page['title']] = summary
+        return found
+
+    def _resolve_titles(self, queries):
+        # One API call per 20 queries: {query: summary} for those that name an existing page
+        resolved = {}
+        for start in range(0, len(queries), TITLES_PER_REQUEST):
+            chunk = queries[start:start + TITLES_PER_REQUEST]
+            data = self._call({'titles': '|'.join(chunk)})
+            mapping = {item['from']: item['to'] for item in data.get('normalized', []) + data.get('redirects', [])}
+            found = self._store_pages(data.get('pages', []))
+            for query in chunk:
+                title = _follow(query, mapping)
+                if title in found:
+                    resolved[query] = found[title]
+        return resolved
+
+    def _search(self, query):
+        data = self._call({'generator': 'search', 'gsrsearch': query, 'gsrlimit': 1})
+        found = self._store_pages(data.get('pages', []))
+        return next(iter(found.values()), None)
+
+    def lookup_many(self, queries):
+        """Return {query: (payload, status)} for each query, in the fetch_* shape."""
+        results = {}
+        pending = []
+        for query in dict.fromkeys(queries):
+            title = self._cached(self.titles, _query_key(query))
+            summary = self._cached(self.summaries, title) if title else None
+            if summary is not None:
+                results[query] = (summary, 200)
+            else:
+                pending.append(query)
+        if not pending:
+            return results
+
+        try:
+            resolved = self._resolve_titles(pending)
+            for query in pending:
+                summary = resolved.get(query) or self._search(query)
+                if summary is None:
+                    results[query] = ({"error": f"No Wikipedia page found for '{query}'."}, 404)
+                    continue
+                self._remember(self.titles, _query_key(query), summary["title"])
+                results[query] = (summary, 200)
+        except requests.exceptions.HTTPError as e:
+            logger.info(f"HTTP error occurred during Wikipedia query: {e}")
+            error = ({"error": f"Wikipedia API error: {e.response.status_code}"}, e.response.status_code)
+        except requests.exceptions.ConnectionError as e:
+            logger.info(f"Connection error occurred during Wikipedia query: {e}")
+            error = ({"error": "Network connection error to Wikipedia. Please try again later."}, 503)
+        except requests.exceptions.Timeout as e:
+            logger.info(f"Timeout error occurred during Wikipedia query: {e}")
+            error = ({"error": "Wikipedia request timed out. Please try again."}, 504)
+        except Exception as e:
+            logger.info(f"An error occurred during Wikipedia query: {e}")
+            error = ({"error": f"An internal server error occurred: {e}"}, 500)
+        else:
+            return results
+        for query in pending:
+            results.setdefault(query, error)
+        return results
+
+    def lookup(self, query):
+        return self.lookup_many([query])[query]
+
+wikipedia_service = WikipediaService()
@@ -1,15 +1,17 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useSpeechRecognition } from './hooks/useSpeechRecognition';
 import { useSpeechSynthesis } from './hooks/useSpeechSynthesis';
 import { useTodos } from './hooks/useTodos';
 import { api } from './services/api';
-import { WeatherData, NewsArticle, WikipediaData, DictionaryData, YouTubeVideo, MapsResult, Todo, DictionaryDefinition } from './types';
+import { CommandResult, WeatherData, NewsArticle, WikipediaData, DictionaryData, YouTubeVideo, MapsResult, Todo, DictionaryDefinition } from './types';
 
 const sanitizeText = (text: string) => {
     return text.replace(/</g, '&lt;').replace(/>/g, '&gt;');
 };
 
 const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || 'http://127.0.0.1:5000';
+// A partial transcript is sent for prefetching once it has been stable this long
+const PREFETCH_DEBOUNCE_MS = 250;
 
 // Main App component
 const App = () => {
@@ -18,33 +20,41 @@ const App = () => {
     const [assistantResponse, setAssistantResponse] = useState('Hello! How can I help you today?');
     const [newTodo, setNewTodo] = useState('');
 
+    const [runningCommand, setRunningCommand] = useState(false);
+    const [loadingBriefing, setLoadingBriefing] = useState(false);
+
     const [weatherData, setWeatherData] = useState<WeatherData | null>(null);
-    const [loadingWeather, setLoadingWeather] = useState(false);
     const [newsArticles, setNewsArticles] = useState<NewsArticle[]>([]);
-    const [loadingNews, setLoadingNews] = useState(false);
     const [wikipediaData, setWikipediaData] = useState<WikipediaData | null>(null);
-    const [loadingWikipedia, setLoadingWikipedia] = useState(false);
     const [dictionaryData, setDictionaryData] = useState<DictionaryData | null>(null);
-    const [loadingDictionary, setLoadingDictionary] = useState(false);
     const [youtubeResults, setYoutubeResults] = useState<YouTubeVideo[]>([]);
-    const [loadingYouTube, setLoadingYouTube] = useState(false);
     const [currentPlayingVideoId, setCurrentPlayingVideoId] = useState<string | null>(null);
-    const [sendingEmail, setSendingEmail] = useState(false);
     const [emailStatusMessage, setEmailStatusMessage] = useState<string | null>(null);
     const [downloadStatus, setDownloadStatus] = useState<string | null>(null);
     const [downloadLink, setDownloadLink] = useState<string | null>(null);
     const [loadingDownload, setLoadingDownload] = useState(false);
     const [mapsResults, setMapsResults] = useState<MapsResult[]>([]);
-    const [loadingMaps, setLoadingMaps] = useState(false);
     const [commandHistory, setCommandHistory] = useState<string[]>([]);
 
-    const { todos, addTodo, toggleTodo, deleteTodo } = useTodos();
+    const { todos, syncTodos, addTodo, toggleTodo, deleteTodo, completeTodos, clearCompleted } = useTodos();
+    const openTodoIds = todos.filter(todo => !todo.completed).map(todo => todo.id);
+    const hasCompletedTodos = todos.some(todo => todo.completed);
+    const prefetchTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+    const prefetchPartial = useCallback((transcript: string) => {
+        if (prefetchTimerRef.current) clearTimeout(prefetchTimerRef.current);
+        prefetchTimerRef.current = setTimeout(() => {
+            api.prefetch(transcript).catch(() => {});
+        }, PREFETCH_DEBOUNCE_MS);
+    }, []);
+
     const { start: startRecognition, stop: stopRecognition, isListening: recognitionIsListening, isSupported: speechRecognitionSupported } = useSpeechRecognition(
       (transcript) => {
+        if (prefetchTimerRef.current) clearTimeout(prefetchTimerRef.current);
         setSpokenText(transcript);
         processCommand(transcript);
       },
-      true
+      true,
+      prefetchPartial
     );
     const { speak, voices } = useSpeechSynthesis();
 
@@ -76,133 +86,27 @@ const App = () => {
       }
     }, [speechRecognitionSupported]);
 
-    // Weather data from the Python backend
-    const fetchWeather = async (city: string) => {
-        setLoadingWeather(true);
-        setAssistantResponse(`Fetching weather for ${city}...`);
-        try {
-            const data = await api.getWeather(city);
-            setWeatherData(data);
-            const weatherText = `The weather in ${data.city} is ${data.description} with a temperature of ${Math.round(data.temperature)} degrees Celsius. Wind speed is ${Math.round(data.wind_speed)} meters per second, and humidity is ${data.humidity} percent.`;
-            setAssistantResponse(weatherText);
-            speak(weatherText);
-        } catch (error: unknown) {
-            console.error("Error fetching weather:", error);
-            const errorMessage = error instanceof Error ? error.message : 'Please try again later.';
-            setAssistantResponse(`Sorry, I couldn't get the weather for ${city}. ${errorMessage}`);
-            speak(`Sorry, I couldn't get the weather for ${city}.`);
-            setWeatherData(null);
-        } finally {
-            setLoadingWeather(false);
-        }
-    };
-
-    // News data from the Python backend
-    const fetchNews = async (query: string = '') => {
-        setLoadingNews(true);
-        setNewsArticles([]);
-        setAssistantResponse(query ? `Fetching news about ${query}...` : 'Fetching top headlines...');
-        try {
-            const data = await api.getNews(query);
-            if (data.articles && data.articles.length > 0) {
-                setNewsArticles(data.articles);
-                const firstArticleTitle = data.articles[0].title;
-                setAssistantResponse(`Here's the top news: "${firstArticleTitle}" and more.`);
-                speak(`Here's the top news: "${firstArticleTitle}" and more.`);
-            } else {
-                setAssistantResponse(`Sorry, I couldn't find any news ${query ? 'about ' + query : ''}.`);
-                speak(`Sorry, I couldn't find any news ${query ? 'about ' + query : ''}.`);
-                setNewsArticles([]);
-            }
-        } catch (error: unknown) {
-            console.error("Error fetching news:", error);
-            setAssistantResponse("There was a problem connecting to the news service. Please ensure the backend is running and check your internet connection.");
-            speak("There was a problem connecting to the news service. Please ensure the backend is running and check your internet connection.");
-            setNewsArticles([]);
-        } finally {
-            setLoadingNews(false);
-        }
-    };
-
-    // Wikipedia data from the Python backend
-    const fetchWikipedia = async (query: string) => {
-        setLoadingWikipedia(true);
-        setWikipediaData(null);
-        setAssistantResponse(`Searching Wikipedia for "${query}"...`);
-        try {
-            const data = await api.getWikipedia(query);
-            setWikipediaData(data);
-            const wikipediaText = `According to Wikipedia, ${data.summary}`;
-            setAssistantResponse(wikipediaText);
-            speak(wikipediaText);
-        } catch (error: unknown) {
-            console.error("Error fetching Wikipedia data:", error);
-            setAssistantResponse(`Sorry, I couldn't find a Wikipedia page for "${query}".`);
-            speak(`Sorry, I couldn't find a Wikipedia page for "${query}".`);
-            setWikipediaData(null);
-        } finally {
-            setLoadingWikipedia(false);
-        }
-    };
-
-    // Dictionary definition from the Python backend
-    const fetchDictionaryDefinition = async (word: string) => {
-        setLoadingDictionary(true);
-        setDictionaryData(null);
-        setAssistantResponse(`Looking up "${word}" in the dictionary...`);
-        try {
-            const data = await api.getDictionary(word);
-            setDictionaryData(data);
-            let textResponse = '';
-            if (data.corrected_word) {
-                textResponse = `Did you mean "${data.corrected_word}"? The definition of ${data.corrected_word} is: `;
-            } else {
-                textResponse = `The definition of ${data.original_word} is: `;
-            }
-            textResponse += data.definitions[0].meanings[0];
-            setAssistantResponse(textResponse);
-            speak(textResponse);
-        } catch (error: unknown) {
-            console.error("Error fetching dictionary data:", error);
-            setAssistantResponse(`Sorry, I couldn't find a definition for "${word}".`);
-            speak(`Sorry, I couldn't find a definition for "${word}".`);
-            setDictionaryData(null);
-        } finally {
-            setLoadingDictionary(false);
+    // Follows a queued YouTube download until it finishes
+    const followDownload = async (jobId: string) => {
+        const job = await api.watchDownloadJob(jobId, progress => {
+            setDownloadStatus(`Processing download... ${Math.round(progress.progress)}%`);
+        });
+        if (job.status === 'failed' || !job.download_link) {
+            throw new Error(job.error || 'Download failed.');
         }
+        setDownloadStatus(`Download successful! Click here to download:`);
+        setDownloadLink(`${BACKEND_URL}${job.download_link}`);
+        setAssistantResponse(`Video downloaded! You can now download it from the link below.`);
+        speak(`Video downloaded!`);
     };
 
-    // YouTube videos from the Python backend
-    const fetchYouTubeVideos = async (query: string, autoPlayFirst: boolean = false) => {
-        setLoadingYouTube(true);
-        setYoutubeResults([]);
-        setCurrentPlayingVideoId(null);
-        setAssistantResponse(`Searching YouTube for "${query}"...`);
-        try {
-            const data = await api.searchYouTube(query);
-            if (data.videos && data.videos.length > 0) {
-                setYoutubeResults(data.videos);
-                const firstVideoTitle = data.videos[0].title;
-                setAssistantResponse(`I found "${firstVideoTitle}" and more videos on YouTube.`);
-                speak(`I found "${firstVideoTitle}" and more videos on YouTube.`);
-                if (autoPlayFirst) {
-                    setCurrentPlayingVideoId(data.videos[0].id);
-                    setAssistantResponse(`Now playing "${firstVideoTitle}".`);
-                    speak(`Now playing "${firstVideoTitle}".`);
-                }
-            } else {
-                setAssistantResponse(`Sorry, I couldn't find any YouTube videos for "${query}".`);
-                speak(`Sorry, I couldn't find any YouTube videos for "${query}".`);
-                setYoutubeResults([]);
-            }
-        } catch (error: unknown) {
-            console.error("Error fetching YouTube videos:", error);
-            setAssistantResponse("There was a problem connecting to the YouTube service. Please ensure the backend is running and check your internet connection.");
-            speak("There was a problem connecting to the YouTube service. Please ensure the backend is running and check your internet connection.");
-            setYoutubeResults([]);
-        } finally {
-            setLoadingYouTube(false);
-        }
+    const reportDownloadError = (error: unknown) => {
+        console.error("Error downloading YouTube video:", error);
+        const errorMessage = error instanceof Error ? error.message : 'Unknown error.';
+        setDownloadStatus(`Download failed: ${errorMessage}`);
+        setAssistantResponse(`Sorry, video download failed. ${errorMessage}`);
+        speak(`Sorry, video download failed.`);
+        setDownloadLink(null);
     };
 
     // YouTube video download via the Python backend
@@ -214,319 +118,163 @@ const App = () => {
         speak(`Initiating download for video. This might take a moment.`);
 
         try {
-            const data = await api.downloadYouTube(videoUrl);
-            setDownloadStatus(`Download successful! Click here to download:`);
-            setDownloadLink(`${BACKEND_URL}${data.download_link}`);
-            setAssistantResponse(`Video downloaded! You can now download it from the link below.`);
-            speak(`Video downloaded!`);
+            const { job_id } = await api.downloadYouTube(videoUrl);
+            await followDownload(job_id);
         } catch (error: unknown) {
-            console.error("Error initiating YouTube download:", error);
-            const errorMessage = error instanceof Error ? error.message : 'Unknown error.';
-            setDownloadStatus(`Download failed: ${errorMessage}`);
-            setAssistantResponse(`Sorry, video download failed. ${errorMessage}`);
-            speak(`Sorry, video download failed.`);
-            setDownloadLink(null);
+            reportDownloadError(error);
         } finally {
             setLoadingDownload(false);
         }
     };
-    
-    // Send an email via the Python backend
-    const sendEmailCommand = async (recipient: string, subject: string, body: string) => {
-        setSendingEmail(true);
-        setEmailStatusMessage(null);
-        setAssistantResponse(`Sending email to ${recipient}...`);
-        speak(`Sending email to ${recipient}...`);
-        try {
-            void api.sendEmail(recipient, subject, body);
-            setEmailStatusMessage(`Email sent successfully to ${recipient}!`);
-            setAssistantResponse(`Email sent successfully to ${recipient}!`);
-            speak(`Email sent successfully to ${recipient}!`);
-        } catch (error: unknown) {
-            console.error("Error sending email:", error);
-            const errorMessage = error instanceof Error ? error.message : 'Unknown error.';
-            setEmailStatusMessage(`Failed to send email: ${errorMessage}`);
-            setAssistantResponse(`Failed to send email: ${errorMessage}`);
-            speak(`Failed to send email.`);
-        } finally {
-            setSendingEmail(false);
+
+    const switchVoice = (gender: 'female' | 'male') => {
+        const preferred = gender === 'female'
+            ? voices.find(voice => voice.lang === 'en-US' && (voice.name.toLowerCase().includes('zira') || voice.name.toLowerCase().includes('samantha') || voice.name.toLowerCase().includes('karen') || voice.name.toLowerCase().includes('moira') || voice.name.toLowerCase().includes('tessa') || voice.name.toLowerCase().includes('google') && voice.localService))
+            : voices.find(voice => voice.lang === 'en-US' && (voice.name.toLowerCase().includes('david') || voice.name.toLowerCase().includes('daniel') || voice.name.toLowerCase().includes('james') || voice.name.toLowerCase().includes('google') && voice.localService && !voice.name.toLowerCase().includes('zira') && !voice.name.toLowerCase().includes('samantha')));
+        const voice = preferred || voices.find(voice => voice.lang === 'en-US');
+        const response = voice ? `Switching to a ${gender} voice.` : `Sorry, a suitable ${gender} voice is not available.`;
+        setAssistantResponse(response);
+        speak(response, voice?.name);
+    };
+
+    // Intents the server only parses: they need the clock, speech voices, player or a new tab
+    const runClientIntent = (intent: string, slots: Record<string, string>) => {
+        let response = '';
+        if (intent === 'time') {
+            response = `The current time is ${new Date().toLocaleTimeString()}.`;
+        } else if (intent === 'female_voice' || intent === 'male_voice') {
+            switchVoice(intent === 'female_voice' ? 'female' : 'male');
+            return;
+        } else if (intent === 'download_current_video') {
+            if (currentPlayingVideoId) {
+                handleYouTubeDownload(`https://www.youtube.com/watch?v=${currentPlayingVideoId}`);
+                return;
+            }
+            response = "There is no video currently playing to download. Please play a video first or provide a URL.";
+        } else if (intent === 'open_website') {
+            const url = /^https?:\/\//.test(slots.query) ? slots.query : `http://${slots.query}`;
+            try {
+                window.open(url, '_blank');
+                response = `Opening ${url}.`;
+            } catch (e) {
+                console.error("Failed to open URL:", e);
+                response = `Sorry, I couldn't open ${url}.`;
+            }
         }
+        setAssistantResponse(response);
+        speak(response);
     };
 
-    // Maps search from the Python backend
-    const fetchMapsSearch = async (query: string) => {
-        setLoadingMaps(true);
-        setMapsResults([]);
-        setAssistantResponse(`Searching maps for "${query}"...`);
-        try {
-            const data = await api.searchMaps(query);
-            if (data.results && data.results.length > 0) {
-                setMapsResults(data.results);
-                const firstResult = data.results[0];
-                setAssistantResponse(`I found ${data.results.length} results for "${query}". The top result is ${firstResult.name}.`);
-                speak(`I found ${data.results.length} results for "${query}". The top result is ${firstResult.name}.`);
-            } else {
-                setAssistantResponse(`Sorry, I couldn't find any map results for "${query}".`);
-                speak(`Sorry, I couldn't find any map results for "${query}".`);
-                setMapsResults([]);
+    // Shows the data the server looked up for the command alongside its spoken response
+    const showCommandData = (result: CommandResult) => {
+        const data = result.data as Record<string, unknown>;
+        switch (result.intent) {
+            case 'add_todo':
+            case 'complete_todo':
+            case 'delete_todo':
+                syncTodos();
+                break;
+            case 'weather':
+                setWeatherData(data as unknown as WeatherData);
+                break;
+            case 'news':
+                setNewsArticles(data.articles as NewsArticle[]);
+                break;
+            case 'wikipedia':
+                setWikipediaData(data as unknown as WikipediaData);
+                break;
+            case 'define':
+                setDictionaryData(data as unknown as DictionaryData);
+                break;
+            case 'youtube_search':
+            case 'play': {
+                const videos = data.videos as YouTubeVideo[];
+                setYoutubeResults(videos);
+                setCurrentPlayingVideoId(result.intent === 'play' && videos.length > 0 ? videos[0].id : null);
+                break;
             }
-        } catch (error: unknown) {
-            console.error("Error fetching maps data:", error);
-            setAssistantResponse("There was a problem connecting to the maps service. Please ensure the backend is running and check your internet connection.");
-            speak("There was a problem connecting to the maps service.");
-            setMapsResults([]);
-        } finally {
-            setLoadingMaps(false);
+            case 'maps':
+                setMapsResults(data.results as MapsResult[]);
+                break;
+            case 'send_email':
+                setEmailStatusMessage(result.response);
+                break;
+            case 'download_video':
+                setDownloadStatus(null);
+                setDownloadLink(null);
+                if (data.download_link) {
+                    setDownloadStatus(`Download successful! Click here to download:`);
+                    setDownloadLink(`${BACKEND_URL}${data.download_link}`);
+                } else {
+                    setLoadingDownload(true);
+                    followDownload(data.job_id as string)
+                        .catch(reportDownloadError)
+                        .finally(() => setLoadingDownload(false));
+                }
+                break;
         }
     };
 
-    const processCommand = (command: string) => {
+    // Transcripts are parsed and carried out by the backend's /command endpoint
+    const processCommand = async (command: string) => {
         setCommandHistory(prev => {
           const updated = [command, ...prev].slice(0, 20);
           localStorage.setItem('commandHistory', JSON.stringify(updated));
           return updated;
         });
-        const lowerCommand = command.toLowerCase();
-        let response = '';
-
-        if (lowerCommand.includes('hello') || lowerCommand.includes('hi assistant')) {
-            response = 'Hello there! How can I assist you?';
-        } else if (lowerCommand.includes('what time is it')) {
-            const date = new Date();
-            response = `The current time is ${date.toLocaleTimeString()}.`;
-        } else if (lowerCommand.includes('add a todo') || lowerCommand.includes('add to do') || lowerCommand.includes('create a todo')) {
-            const todoMatch = lowerCommand.match(/(?:add|create)\s+a\s+to\s*do\s+(?:item\s+)?(.*?)(?:\.|$)/);
-            if (todoMatch && todoMatch[1]) {
-                const task = todoMatch[1].trim();
-                addTodo(task);
-                response = `Okay, I've added "${task}" to your to-do list.`;
-            } else {
-                response = "What would you like to add to your to-do list?";
-            }
-        } else if (lowerCommand.includes('show my todo list') || lowerCommand.includes('what are my todos')) {
-            if (todos.length > 0) {
-                const todoList = todos.map((todo: Todo, index: number) => `${index + 1}. ${todo.task}`).join(', ');
-                response = `Here are your to-do items: ${todoList}.`;
-            } else {
-                response = "You don't have any to-do items yet.";
-            }
-        } else if (lowerCommand.includes('mark todo as complete') || lowerCommand.includes('complete todo')) {
-            const markMatch = lowerCommand.match(/(?:mark|complete)\s+todo\s+(\d+)/);
-            if (markMatch && markMatch[1]) {
-                const todoIndex = parseInt(markMatch[1]) - 1;
-                if (todoIndex >= 0 && todoIndex < todos.length) {
-                    const todoId = todos[todoIndex].id;
-                    toggleTodo(todoId, true);
-                    response = `Okay, I've marked "${todos[todoIndex].task}" as complete.`;
-                } else {
-                    response = "I couldn't find a to-do item with that number. Please specify a valid number.";
-                }
-            } else {
-                response = "Which to-do item would you like to mark as complete? Please say 'mark todo as complete number X'.";
-            }
-        } else if (lowerCommand.includes('delete todo') || lowerCommand.includes('remove todo')) {
-            const deleteMatch = lowerCommand.match(/(?:delete|remove)\s+todo\s+(\d+)/);
-            if (deleteMatch && deleteMatch[1]) {
-                const todoIndex = parseInt(deleteMatch[1]) - 1;
-                if (todoIndex >= 0 && todoIndex < todos.length) {
-                    const todoId = todos[todoIndex].id;
-                    deleteTodo(todoId);
-                    response = `I've removed "${todos[todoIndex].task}" from your to-do list.`;
-                } else {
-                    response = "I couldn't find a to-do item with that number. Please specify a valid number.";
-                }
-            } else {
-                response = "Which to-do item would you like to delete? Please say 'delete todo number X'.";
-            }
-        } else if (lowerCommand.includes('what is the weather in')) {
-            const cityMatch = lowerCommand.match(/what is the weather in (.+)/);
-            if (cityMatch && cityMatch[1]) {
-                const city = cityMatch[1].trim();
-                fetchWeather(city);
-                return;
-            } else {
-                response = "For which city would you like to know the weather?";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        } else if (lowerCommand.includes('what is the news') || lowerCommand.includes('tell me the news')) {
-            const queryMatch = lowerCommand.match(/(?:what is the news about|tell me the news about)\s+(.+)/);
-            if (queryMatch && queryMatch[1]) {
-                const query = queryMatch[1].trim();
-                fetchNews(query);
-                return;
-            } else {
-                fetchNews();
-                return;
-            }
-        } else if (lowerCommand.includes('tell me about') || lowerCommand.includes('who is') || lowerCommand.includes('what is')) {
-            let query = '';
-            if (lowerCommand.includes('tell me about')) {
-                query = lowerCommand.replace('tell me about', '').trim();
-            } else if (lowerCommand.includes('who is')) {
-                query = lowerCommand.replace('who is', '').trim();
-            } else if (lowerCommand.includes('what is')) {
-                query = lowerCommand.replace('what is', '').trim();
-            }
 
-            if (query) {
-                fetchWikipedia(query);
+        setRunningCommand(true);
+        try {
+            const result = await api.runCommand(command);
+            if (result.intent && result.response === null) {
+                runClientIntent(result.intent, result.slots);
                 return;
-            } else {
-                response = "What topic or person would you like to know about?";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        } else if (lowerCommand.includes('define') || lowerCommand.includes('what does mean')) {
-            let word = '';
-            const defineMatch = lowerCommand.match(/define\s+(.+)/);
-            const whatDoesMatch = lowerCommand.match(/what does\s+(.+)\s+mean/);
-
-            if (defineMatch && defineMatch[1]) {
-                word = defineMatch[1].trim();
-            } else if (whatDoesMatch && whatDoesMatch[1]) {
-                word = whatDoesMatch[1].trim();
             }
+            if (result.data) showCommandData(result);
+            setAssistantResponse(result.response || '');
+            speak(result.response || '');
+        } catch (error: unknown) {
+            console.error("Error running command:", error);
+            const errorMessage = error instanceof Error ? error.message : 'Please try again later.';
+            setAssistantResponse(`Sorry, I couldn't do that. ${errorMessage}`);
+            speak(`Sorry, I couldn't do that.`);
+        } finally {
+            setRunningCommand(false);
+        }
+    };
 
-            if (word) {
-                fetchDictionaryDefinition(word);
-                return;
-            } else {
-                response = "Which word would you like me to define?";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        } else if (lowerCommand.includes('search youtube for') || lowerCommand.includes('find on youtube')) {
-            const queryMatch = lowerCommand.match(/(?:search youtube for|find on youtube)\s+(.+)/);
-            if (queryMatch && queryMatch[1]) {
-                const query = queryMatch[1].trim();
-                fetchYouTubeVideos(query, false);
-                return;
-            } else {
-                response = "What would you like to search for on YouTube?";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        } else if (lowerCommand.includes('play')) {
-            const playMatch = lowerCommand.match(/play\s+(.+)/);
-            if (playMatch && playMatch[1]) {
-                const query = playMatch[1].trim();
-                fetchYouTubeVideos(query, true);
-                return;
-            } else {
-                response = "What would you like me to play?";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        } else if (lowerCommand.includes('send an email to')) {
-            const emailMatch = lowerCommand.match(/send an email to\s+([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\s+with subject\s+(.+?)\s+and message\s+(.+)/);
-
-            if (emailMatch && emailMatch[1] && emailMatch[2] && emailMatch[3]) {
-                const recipient = emailMatch[1].trim();
-                const subject = emailMatch[2].trim();
-                const body = emailMatch[3].trim();
-                sendEmailCommand(recipient, subject, body);
-                return;
-            } else {
-                response = "I couldn't understand the email command. Please say 'send an email to [recipient email] with subject [subject] and message [body]'.";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        } else if (lowerCommand.includes('download youtube video')) {
-            const urlMatch = lowerCommand.match(/download youtube video\s+(https?:\/\/(?:www\.)?youtube\.com\/watch\?v=|https?:\/\/youtu\.be\/)([a-zA-Z0-9_-]+)/);
-            if (urlMatch && urlMatch[1] && urlMatch[2]) {
-                const videoUrl = `${urlMatch[1]}${urlMatch[2]}`;
-                handleYouTubeDownload(videoUrl);
-                return;
-            } else {
-                response = "Please provide a valid YouTube video URL after 'download YouTube video'.";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        } else if (lowerCommand.includes('download this video') || lowerCommand.includes('download current video')) {
-            if (currentPlayingVideoId) {
-                const videoUrl = `https://www.youtube.com/watch?v=${currentPlayingVideoId}`;
-                handleYouTubeDownload(videoUrl);
-            } else {
-                response = "There is no video currently playing to download. Please play a video first or provide a URL.";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        } else if (lowerCommand.includes('switch to female voice')) {
-            const femaleVoice = voices.find(voice => voice.lang === 'en-US' && (voice.name.toLowerCase().includes('zira') || voice.name.toLowerCase().includes('samantha') || voice.name.toLowerCase().includes('karen') || voice.name.toLowerCase().includes('moira') || voice.name.toLowerCase().includes('tessa') || voice.name.toLowerCase().includes('google') && voice.localService));
-            if (femaleVoice) {
-                response = 'Switching to a female voice.';
-                speak(response, femaleVoice.name);
-                return;
-            } else {
-                const anyEnVoice = voices.find(voice => voice.lang === 'en-US');
-                if (anyEnVoice) {
-                    response = 'Switching to a female voice.';
-                    speak(response, anyEnVoice.name);
-                    return;
-                }
-                response = 'Sorry, a suitable female voice is not available.';
-            }
-        } else if (lowerCommand.includes('switch to male voice')) {
-            const maleVoice = voices.find(voice => voice.lang === 'en-US' && (voice.name.toLowerCase().includes('david') || voice.name.toLowerCase().includes('daniel') || voice.name.toLowerCase().includes('james') || voice.name.toLowerCase().includes('google') && voice.localService && !voice.name.toLowerCase().includes('zira') && !voice.name.toLowerCase().includes('samantha')));
-            if (maleVoice) {
-                response = 'Switching to a male voice.';
-                speak(response, maleVoice.name);
-                return;
-            } else {
-                const anyEnVoice = voices.find(voice => voice.lang === 'en-US');
-                if (anyEnVoice) {
-                    response = 'Switching to a male voice.';
-                    speak(response, anyEnVoice.name);
-                    return;
-                }
-                response = 'Sorry, a suitable male voice is not available.';
-            }
-        } else if (lowerCommand.includes('open website')) {
-            let urlCommand = lowerCommand.replace('open website', '').trim();
-            urlCommand = urlCommand.replace(/ dot /g, '.').replace(/ dot$/g, '.');
-            const urlMatch = urlCommand.match(/(.+?)(?:\s*$)/);
-            if (urlMatch && urlMatch[1]) {
-                let url = urlMatch[1].trim();
-                if (!url.startsWith('http://') && !url.startsWith('https://')) {
-                    url = 'http://' + url;
-                }
-                try {
-                    window.open(url, '_blank');
-                    response = `Opening ${url}.`;
-                } catch (e) {
-                    console.error("Failed to open URL:", e);
-                    response = `Sorry, I couldn't open ${url}.`;
+    // Weather for the last city asked about, top headlines and the to-do list in one /briefing request
+    const runBriefing = async () => {
+        setLoadingBriefing(true);
+        setAssistantResponse('Preparing your briefing...');
+        try {
+            const { results } = await api.getBriefing(weatherData?.city);
+            const parts: string[] = [];
+            for (const result of results) {
+                if (result.status >= 400 || !result.data) continue;
+                if (result.source === 'weather') {
+                    const weather = result.data as WeatherData;
+                    setWeatherData(weather);
+                    parts.push(`It is ${Math.round(weather.temperature)} degrees with ${weather.description} in ${weather.city}.`);
+                } else if (result.source === 'news') {
+                    const { articles } = result.data as { articles: NewsArticle[] };
+                    setNewsArticles(articles);
+                    if (articles.length > 0) parts.push(`The top story is "${articles[0].title}".`);
+                } else if (result.source === 'todos') {
+                    const open = (result.data as Todo[]).filter(todo => !todo.completed).length;
+                    parts.push(open ? `You have ${open} open to-do item${open === 1 ? '' : 's'}.` : 'Your to-do list is clear.');
                 }
-            } else {
-                response = "Which website would you like to open? Please say 'open website example dot com'.";
             }
+            const response = parts.length > 0 ? parts.join(' ') : "Sorry, I couldn't prepare your briefing right now.";
             setAssistantResponse(response);
             speak(response);
-        } else if (lowerCommand.includes('find') || lowerCommand.includes('search for') || lowerCommand.includes('maps')) {
-            let query = '';
-            if (lowerCommand.includes('find')) {
-                query = lowerCommand.replace('find', '').trim();
-            } else if (lowerCommand.includes('search for')) {
-                query = lowerCommand.replace('search for', '').trim();
-            } else if (lowerCommand.includes('maps')) {
-                query = lowerCommand.replace('maps', '').trim();
-            }
-            query = query.replace(/ near me/g, '').replace(/ on maps/g, '').trim();
-            if (query) {
-                fetchMapsSearch(query);
-                return;
-            } else {
-                response = "What would you like to search for on maps?";
-                setAssistantResponse(response);
-                speak(response);
-            }
-        }  else {
-            response = `I understand you said "${command}". I am still learning, but for now, I can tell time and manage your to-do list.`;
+        } catch (error: unknown) {
+            console.error("Error fetching briefing:", error);
+            setAssistantResponse("There was a problem preparing your briefing. Please ensure the backend is running.");
+            speak("There was a problem preparing your briefing.");
+        } finally {
+            setLoadingBriefing(false);
         }
-
-        setAssistantResponse(response);
-        speak(response);
     };
 
     // Start listening
@@ -573,7 +321,7 @@ const App = () => {
                         AI Voice Assistant
                     </h1>
                     <div className="text-lg text-center text-gray-200 min-h-[4rem] flex items-center justify-center">
-                        {loadingWeather || loadingNews || loadingWikipedia || loadingDictionary || loadingYouTube || sendingEmail || loadingDownload || loadingMaps ? (
+                        {runningCommand || loadingBriefing || loadingDownload ? (
                             <div className="flex items-center space-x-2">
                                 <svg className="animate-spin h-5 w-5 text-white" xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24">
                                     <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4"></circle>
@@ -619,6 +367,17 @@ const App = () => {
                     >
                         Stop Listening
                     </button>
+                    <button
+                        onClick={runBriefing}
+                        disabled={loadingBriefing}
+                        className={`px-8 py-3 rounded-full text-lg font-semibold transition-all duration-300 transform ${
+                            loadingBriefing
+                                ? 'bg-gray-500 cursor-not-allowed'
+                                : 'bg-teal-600 hover:bg-teal-700 hover:scale-105 active:scale-95'
+                        } shadow-lg`}
+                    >
+                        Briefing
+                    </button>
                 </div>
 
                 {/* Weather Display */}
@@ -901,6 +660,25 @@ const App = () => {
                             ))}
                         </ul>
                     )}
+
+                    {todos.length > 0 && (
+                        <div className="flex justify-end space-x-2 mt-4">
+                            <button
+                                onClick={() => completeTodos(openTodoIds)}
+                                disabled={openTodoIds.length === 0}
+                                className="px-4 py-2 bg-indigo-600 hover:bg-indigo-700 disabled:bg-gray-500 disabled:cursor-not-allowed rounded-lg text-sm font-semibold transition-transform transform hover:scale-105 active:scale-95 shadow-md"
+                            >
+                                Complete All
+                            </button>
+                            <button
+                                onClick={() => clearCompleted()}
+                                disabled={!hasCompletedTodos}
+                                className="px-4 py-2 bg-red-600 hover:bg-red-700 disabled:bg-gray-500 disabled:cursor-not-allowed rounded-lg text-sm font-semibold transition-transform transform hover:scale-105 active:scale-95 shadow-md"
+                            >
+                                Clear Completed
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
         </div>
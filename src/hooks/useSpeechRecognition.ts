@@ -3,6 +3,7 @@ import { useEffect, useRef, useCallback, useState } from 'react';
 interface RecognitionResult {
   results: {
     [key: number]: {
+      isFinal?: boolean;
       [key: number]: {
         transcript: string;
       };
@@ -33,9 +34,14 @@ const SpeechRecognition = (() => {
   return SR as { new (): SpeechRecognitionInstance } | undefined;
 })();
 
-export function useSpeechRecognition(onResult: (transcript: string) => void, autoRestart: boolean = false) {
+export function useSpeechRecognition(
+  onResult: (transcript: string) => void,
+  autoRestart: boolean = false,
+  onInterim?: (transcript: string) => void
+) {
   const recognitionRef = useRef<SpeechRecognitionInstance | null>(null);
   const onResultRef = useRef(onResult);
+  const onInterimRef = useRef(onInterim);
   const autoRestartRef = useRef(autoRestart);
   const [isListening, setIsListening] = useState(false);
 
@@ -43,6 +49,10 @@ export function useSpeechRecognition(onResult: (transcript: string) => void, aut
     onResultRef.current = onResult;
   }, [onResult]);
 
+  useEffect(() => {
+    onInterimRef.current = onInterim;
+  }, [onInterim]);
+
   useEffect(() => {
     autoRestartRef.current = autoRestart;
   }, [autoRestart]);
@@ -52,7 +62,8 @@ export function useSpeechRecognition(onResult: (transcript: string) => void, aut
 
     const recognition = new SpeechRecognition();
     recognition.continuous = false;
-    recognition.interimResults = false;
+    // Partial transcripts are only requested when someone listens for them
+    recognition.interimResults = !!onInterimRef.current;
     recognition.lang = 'en-US';
 
     recognition.onstart = () => {
@@ -61,7 +72,12 @@ export function useSpeechRecognition(onResult: (transcript: string) => void, aut
     };
 
     recognition.onresult = (event) => {
-      const transcript = event.results[0][0].transcript;
+      const result = event.results[0];
+      const transcript = result[0].transcript;
+      if (recognition.interimResults && !result.isFinal) {
+        onInterimRef.current?.(transcript);
+        return;
+      }
       onResultRef.current(transcript);
     };
 
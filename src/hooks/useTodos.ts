@@ -1,22 +1,48 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { api } from '../services/api';
-import { Todo } from '../types';
+import { Todo, TodoChanges } from '../types';
+
+// Where EventSource is unavailable, changes from other devices are picked up by polling
+const SYNC_POLL_MS = 5000;
 
 export function useTodos() {
   const [todos, setTodos] = useState<Todo[]>([]);
   const [loading, setLoading] = useState(false);
+  const syncVersionRef = useRef(0);
+
+  const applyChanges = useCallback((changes: TodoChanges) => {
+    syncVersionRef.current = Math.max(syncVersionRef.current, changes.version);
+    setTodos(prev => {
+      const deleted = new Set(changes.deleted);
+      const byId = new Map((changes.reset ? [] : prev).map(todo => [todo.id, todo]));
+      changes.changed.forEach(todo => byId.set(todo.id, todo));
+      return [...byId.values()]
+        .filter(todo => !deleted.has(todo.id))
+        .sort((a, b) => a.createdAt.localeCompare(b.createdAt) || a.id.localeCompare(b.id));
+    });
+  }, []);
+
+  // Applies only the rows changed or deleted since the last sync
+  const syncTodos = useCallback(async () => {
+    try {
+      applyChanges(await api.getTodoChanges(syncVersionRef.current));
+    } catch (error) {
+      console.error('Error syncing todos:', error);
+    }
+  }, [applyChanges]);
 
+  // Reloads the whole list, recording the version it was read at
   const fetchTodos = useCallback(async () => {
     setLoading(true);
     try {
-      const data = await api.getTodos();
-      setTodos(data);
+      syncVersionRef.current = 0;
+      applyChanges({ ...(await api.getTodoChanges(0)), reset: true });
     } catch (error) {
       console.error('Error fetching todos:', error);
     } finally {
       setLoading(false);
     }
-  }, []);
+  }, [applyChanges]);
 
   const addTodo = useCallback(async (task: string) => {
     try {
@@ -50,9 +76,47 @@ export function useTodos() {
     }
   }, []);
 
+  const completeTodos = useCallback(async (ids: string[]) => {
+    try {
+      const { results } = await api.bulkUpdateTodos(ids.map(id => ({ id, completed: true })));
+      const updatedIds = new Set(results.filter(r => r.status === 'updated').map(r => r.id));
+      setTodos(prev => prev.map(todo => updatedIds.has(todo.id) ? { ...todo, completed: true } : todo));
+      return results;
+    } catch (error) {
+      console.error('Error completing todos:', error);
+      throw error;
+    }
+  }, []);
+
+  const clearCompleted = useCallback(async () => {
+    try {
+      const { deleted } = await api.clearCompletedTodos();
+      const deletedIds = new Set(deleted);
+      setTodos(prev => prev.filter(todo => !deletedIds.has(todo.id)));
+      return deleted;
+    } catch (error) {
+      console.error('Error clearing completed todos:', error);
+      throw error;
+    }
+  }, []);
+
   useEffect(() => {
     fetchTodos();
   }, [fetchTodos]);
 
-  return { todos, loading, fetchTodos, addTodo, toggleTodo, deleteTodo };
+  // Changes made on other devices are pushed over /events in the same shape as a sync.
+  // 'reset' means the stream no longer has the missed events, so catch up from the last
+  // synced version instead; the server sends the whole list only if that is too old too.
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') {
+      const timer = setInterval(syncTodos, SYNC_POLL_MS);
+      return () => clearInterval(timer);
+    }
+    const source = new EventSource(api.eventsUrl(['todos']));
+    source.addEventListener('todos', event => applyChanges(JSON.parse((event as MessageEvent).data)));
+    source.addEventListener('reset', () => syncTodos());
+    return () => source.close();
+  }, [applyChanges, syncTodos]);
+
+  return { todos, loading, fetchTodos, syncTodos, addTodo, toggleTodo, deleteTodo, completeTodos, clearCompleted };
 }
@@ -1,4 +1,4 @@
-import { Todo, WeatherData, NewsArticle, WikipediaData, DictionaryData, YouTubeVideo, MapsResult } from '../types';
+import { Todo, TodoBulkResult, TodoChanges, DownloadJob, EmailMessage, CommandResult, Briefing, WeatherData, NewsArticle, WikipediaData, DictionaryData, YouTubeVideo, MapsResult } from '../types';
 
 const API_BASE = import.meta.env.VITE_BACKEND_URL || 'http://127.0.0.1:5000';
 
@@ -23,8 +23,51 @@ async function request<T>(
   return response.json();
 }
 
+export type EventTopic = 'todos' | 'downloads' | 'emails';
+
+const isFinished = (job: DownloadJob) => job.status !== 'queued' && job.status !== 'running';
+
+// Resolves once the job finishes, reporting progress pushed over /events along the way.
+// Falls back to polling where EventSource is unavailable.
+function watchDownloadJob(jobId: string, onUpdate: (job: DownloadJob) => void): Promise<DownloadJob> {
+  if (typeof EventSource === 'undefined') {
+    return (async () => {
+      let job = await api.getDownloadJob(jobId);
+      while (!isFinished(job)) {
+        onUpdate(job);
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        job = await api.getDownloadJob(jobId);
+      }
+      return job;
+    })();
+  }
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(api.eventsUrl(['downloads'], [jobId]));
+    const handle = (job: DownloadJob) => {
+      if (!isFinished(job)) {
+        onUpdate(job);
+        return;
+      }
+      source.close();
+      resolve(job);
+    };
+    // The job may have moved on before the stream opened, so read it once the subscription is live
+    source.addEventListener('ready', () => {
+      api.getDownloadJob(jobId).then(handle).catch(error => {
+        source.close();
+        reject(error);
+      });
+    });
+    source.addEventListener('downloads', event => handle(JSON.parse((event as MessageEvent).data)));
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) reject(new Error('Lost connection to the event stream.'));
+    };
+  });
+}
+
 export const api = {
   getTodos: () => request<Todo[]>('/api/todos'),
+  getTodoChanges: (since: number) => request<TodoChanges>(`/api/todos?since=${since}`),
   createTodo: (task: string) => request<Todo>('/api/todos', {
     method: 'POST',
     body: JSON.stringify({ task }),
@@ -37,6 +80,14 @@ export const api = {
   deleteTodo: (id: string) => request<{ message: string }>(`/api/todos/${id}`, {
     method: 'DELETE',
   }),
+  bulkUpdateTodos: (updates: { id: string; task?: string; completed?: boolean }[]) =>
+    request<{ results: TodoBulkResult[] }>('/api/todos/bulk', {
+      method: 'PUT',
+      body: JSON.stringify({ updates }),
+    }),
+  clearCompletedTodos: () => request<{ deleted: string[]; count: number }>('/api/todos/completed', {
+    method: 'DELETE',
+  }),
   getWeather: (city: string) => request<WeatherData>(`/weather?city=${encodeURIComponent(city)}`),
   getNews: (query?: string) => {
     const params = new URLSearchParams();
@@ -50,15 +101,37 @@ export const api = {
   searchYouTube: (query: string) =>
     request<{ videos: YouTubeVideo[] }>(`/youtube/search?query=${encodeURIComponent(query)}`),
   downloadYouTube: (url: string) =>
-    request<{ message: string; download_link: string; filename: string }>('/youtube/download', {
+    request<{ message: string; job_id: string; status: DownloadJob['status']; status_url: string }>('/youtube/download', {
       method: 'POST',
       body: JSON.stringify({ url }),
     }),
+  getDownloadJob: (jobId: string) => request<DownloadJob>(`/youtube/download/${jobId}`),
+  watchDownloadJob,
   sendEmail: (recipient: string, subject: string, body: string) =>
-    request<{ message: string }>('/send-email', {
+    request<{ message: string; message_id: string; status: EmailMessage['status']; status_url: string }>('/send-email', {
       method: 'POST',
       body: JSON.stringify({ recipient_email: recipient, subject, body }),
     }),
+  getEmailStatus: (messageId: string) => request<EmailMessage>(`/send-email/${messageId}`),
+  runCommand: (text: string) => request<CommandResult>('/command', {
+    method: 'POST',
+    body: JSON.stringify({ text }),
+  }),
+  prefetch: (text: string) => request<{ intent: string | null; prefetching: boolean }>('/prefetch', {
+    method: 'POST',
+    body: JSON.stringify({ text }),
+  }),
+  getBriefing: (city?: string, newsQuery?: string) => {
+    const params = new URLSearchParams();
+    if (city) params.append('city', city);
+    if (newsQuery) params.append('news_query', newsQuery);
+    return request<Briefing>(`/briefing?${params.toString()}`);
+  },
   searchMaps: (query: string) =>
     request<{ results: MapsResult[] }>(`/maps/search?query=${encodeURIComponent(query)}`),
+  eventsUrl: (topics: EventTopic[], ids: string[] = []) => {
+    const params = new URLSearchParams({ topics: topics.join(',') });
+    if (ids.length) params.append('ids', ids.join(','));
+    return `${API_BASE}/events?${params.toString()}`;
+  },
 };
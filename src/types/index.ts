@@ -5,6 +5,21 @@ export interface Todo {
   createdAt: string;
 }
 
+export interface TodoChanges {
+  changed: Todo[];
+  deleted: string[];
+  version: number;
+  reset: boolean;
+}
+
+export interface TodoBulkResult {
+  index: number;
+  id?: string;
+  status: 'created' | 'updated' | 'deleted' | 'not_found' | 'invalid';
+  todo?: Todo;
+  error?: string;
+}
+
 export interface WeatherData {
   city: string;
   country: string;
@@ -55,3 +70,48 @@ export interface MapsResult {
   user_ratings_total: number;
   map_url: string;
 }
+
+export interface DownloadJob {
+  job_id: string;
+  url: string;
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'expired';
+  progress: number;
+  filename: string | null;
+  download_link: string | null;
+  error: string | null;
+  created_at: string;
+  updated_at: string;
+}
+
+export interface EmailMessage {
+  message_id: string;
+  recipient_email: string;
+  subject: string;
+  status: 'queued' | 'sending' | 'sent' | 'failed';
+  attempts: number;
+  error: string | null;
+  created_at: string;
+  updated_at: string;
+  sent_at: string | null;
+}
+
+export interface CommandResult {
+  intent: string | null;
+  slots: Record<string, string>;
+  response: string | null;
+  data: unknown;
+  error?: string;
+}
+
+export interface BriefingResult {
+  source: 'weather' | 'news' | 'wikipedia' | 'dictionary' | 'youtube' | 'maps' | 'todos';
+  status: number;
+  elapsed_ms: number;
+  data?: unknown;
+  error?: string;
+}
+
+export interface Briefing {
+  results: BriefingResult[];
+  elapsed_ms: number;
+}